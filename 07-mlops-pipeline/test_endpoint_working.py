@@ -1,6 +1,10 @@
-import boto3
+import os
+import sys
 
-runtime = boto3.client('sagemaker-runtime')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from inference_client import CSVBatcher, endpoint_invoker, shared_runtime_client
+
+runtime = shared_runtime_client()
 
 # Test samples - 7 features each (NO label)
 # Format: value1, value2, value3, value4, value5, value6, value7
@@ -30,15 +34,13 @@ test_samples = [
 print("🧪 Testing MLOps Production Endpoint")
 print("="*70)
 
-for i, sample in enumerate(test_samples, 1):
+# All samples go out as one multi-row CSV request
+with CSVBatcher(endpoint_invoker('mlops-production-endpoint', runtime)) as batcher:
+    futures = [batcher.submit(sample['data']) for sample in test_samples]
+
+for i, (sample, future) in enumerate(zip(test_samples, futures), 1):
     try:
-        response = runtime.invoke_endpoint(
-            EndpointName='mlops-production-endpoint',
-            Body=sample['data'],
-            ContentType='text/csv'
-        )
-        
-        prediction = float(response['Body'].read().decode('utf-8').strip())
+        prediction = future.result()
         
         # XGBoost returns probability for binary classification
         predicted_class = 1 if prediction > 0.5 else 0
@@ -0,0 +1,87 @@
+"""
+Benchmark step caching: run the local pipeline cold, then again with identical
+inputs, check that every cache-enabled step was skipped and report wall time saved
+"""
+import argparse
+import contextlib
+import io
+import shutil
+import sys
+import tempfile
+
+from local_pipeline import parse_parameter, run_local_pipeline
+from pipeline_dag import CACHE_EXPIRE_AFTER, all_steps
+
+def run_quietly(verbose, **kwargs):
+    if verbose:
+        return run_local_pipeline(**kwargs)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return run_local_pipeline(**kwargs)
+
+def benchmark(store_root, parameter_overrides=None, warm_runs=1, verbose=False):
+    """
+    One cold run into an empty store, then warm_runs reruns; returns the
+    executions and the names of cache-enabled steps that reran when warm
+    """
+    cached_steps = [spec.name for spec in all_steps() if getattr(spec, 'cache', False)]
+    kwargs = {'store_root': store_root, 'parameter_overrides': parameter_overrides,
+              'cache_expire_after': CACHE_EXPIRE_AFTER}
+
+    cold = run_quietly(verbose, **kwargs)
+    warm = [run_quietly(verbose, **kwargs) for _ in range(warm_runs)]
+
+    reran = []
+    for execution in warm:
+        hits = {s['StepName']: s.get('CacheHit', False) for s in execution['PipelineExecutionSteps']}
+        reran += [name for name in cached_steps if not hits.get(name)]
+    return cold, warm, cached_steps, sorted(set(reran))
+
+def print_report(cold, warm, cached_steps):
+    def durations(execution):
+        return {s['StepName']: s for s in execution['PipelineExecutionSteps']}
+
+    cold_steps = durations(cold)
+    warm_steps = durations(warm[-1])
+    print(f"\n{'Step':<18}{'Cold (s)':>10}{'Warm (s)':>10}  Warm run")
+    print("-"*50)
+    for name, step in cold_steps.items():
+        warm_step = warm_steps[name]
+        cold_s = f"{step['DurationSeconds']:.2f}" if 'DurationSeconds' in step else "-"
+        warm_s = f"{warm_step['DurationSeconds']:.2f}" if 'DurationSeconds' in warm_step else "-"
+        status = "cached" if warm_step.get('CacheHit') else warm_step['StepStatus']
+        print(f"{name:<18}{cold_s:>10}{warm_s:>10}  {status}")
+
+    cold_wall = cold['WallSeconds']
+    warm_wall = sum(e['WallSeconds'] for e in warm) / len(warm)
+    saved = cold_wall - warm_wall
+    print("-"*50)
+    print(f"Cold run: {cold_wall:.2f}s")
+    print(f"Warm run: {warm_wall:.2f}s (mean of {len(warm)})")
+    print(f"Wall time saved: {saved:.2f}s ({saved / cold_wall:.0%})")
+    print(f"Cache-enabled steps: {', '.join(cached_steps)} (expire after {CACHE_EXPIRE_AFTER})")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--parameter', type=parse_parameter, action='append', default=[],
+                        metavar='NAME=VALUE', help='Override a pipeline parameter (repeatable)')
+    parser.add_argument('--warm-runs', type=int, default=3)
+    parser.add_argument('--store', type=str, default=None,
+                        help='Store directory (default: a temporary directory, removed afterwards)')
+    parser.add_argument('--verbose', action='store_true', help='Show the pipeline output')
+
+    args = parser.parse_args()
+
+    store_root = args.store or tempfile.mkdtemp(prefix='cache-bench-')
+    try:
+        cold, warm, cached_steps, reran = benchmark(store_root, dict(args.parameter),
+                                                    args.warm_runs, args.verbose)
+    finally:
+        if not args.store:
+            shutil.rmtree(store_root, ignore_errors=True)
+
+    print_report(cold, warm, cached_steps)
+    if cold['PipelineExecutionStatus'] != 'Succeeded' or reran:
+        print(f"\n❌ Cache-enabled steps reran with identical inputs: {', '.join(reran) or '-'}"
+              if reran else f"\n❌ Cold run {cold['PipelineExecutionStatus']}")
+        sys.exit(1)
+    print("\n✅ Second run skipped every cache-enabled step")
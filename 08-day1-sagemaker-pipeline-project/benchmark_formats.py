@@ -0,0 +1,93 @@
+"""
+Benchmark preprocess.py output formats: bytes written, write time and parse time
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from preprocess import COLUMNS, FILE_EXTENSIONS, ChannelWriter, SyntheticGenerator, channel_file_name
+from evaluate import read_test_file
+
+def xgboost_parse_seconds(path, output_format):
+    """
+    Time XGBoost's native DMatrix loader (what the training container uses for text formats)
+    """
+    try:
+        import xgboost as xgb
+    except ImportError:
+        return None
+
+    if output_format == 'csv':
+        uri = f"{path}?format=csv&label_column=0"
+    elif output_format == 'libsvm':
+        uri = f"{path}?format=libsvm"
+    else:
+        return None
+
+    start = time.perf_counter()
+    xgb.DMatrix(uri)
+    return time.perf_counter() - start
+
+def benchmark(n_rows, formats, repeats=3):
+    data = SyntheticGenerator(block_size=n_rows).block(0, n_rows)
+    workdir = tempfile.mkdtemp(prefix='format-bench-')
+    results = {}
+
+    try:
+        for output_format in formats:
+            path = os.path.join(workdir, channel_file_name('train', output_format))
+
+            write_times = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                with ChannelWriter(path, output_format) as writer:
+                    writer.write(data)
+                write_times.append(time.perf_counter() - start)
+
+            parse_times = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                labels, features = read_test_file(path)
+                parse_times.append(time.perf_counter() - start)
+            assert len(labels) == n_rows and features.shape[1] == len(COLUMNS) - 1
+
+            results[output_format] = {
+                'bytes': os.path.getsize(path),
+                'write_s': min(write_times),
+                'parse_s': min(parse_times),
+                'xgb_parse_s': xgboost_parse_seconds(path, output_format),
+            }
+    finally:
+        shutil.rmtree(workdir)
+
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--formats', nargs='+', default=list(FILE_EXTENSIONS),
+                        choices=list(FILE_EXTENSIONS))
+    args = parser.parse_args()
+
+    print("="*70)
+    print(f"OUTPUT FORMAT BENCHMARK ({args.rows:,} rows, best of {args.repeats})")
+    print("="*70)
+
+    results = benchmark(args.rows, args.formats, args.repeats)
+    csv_bytes = results.get('csv', {}).get('bytes')
+
+    print(f"\n{'Format':<20}{'Size (MB)':>12}{'vs CSV':>9}{'Write (s)':>11}{'Parse (s)':>11}{'XGB parse (s)':>15}")
+    print("-"*78)
+    for output_format, r in results.items():
+        ratio = f"{r['bytes'] / csv_bytes:.2f}x" if csv_bytes else "-"
+        xgb_parse = f"{r['xgb_parse_s']:.3f}" if r['xgb_parse_s'] is not None else "-"
+        print(f"{output_format:<20}{r['bytes'] / 1e6:>12.1f}{ratio:>9}"
+              f"{r['write_s']:>11.3f}{r['parse_s']:>11.3f}{xgb_parse:>15}")
+
+    print("""
+Parse (s) uses evaluate.read_test_file; XGB parse (s) uses xgboost's native
+DMatrix loader, which is what the training container does for csv/libsvm.
+""")
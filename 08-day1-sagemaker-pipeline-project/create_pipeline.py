@@ -4,22 +4,29 @@ SageMaker Pipeline Definition - Local Execution
 import boto3
 import sagemaker
 from sagemaker.workflow.pipeline import Pipeline
-from sagemaker.workflow.steps import ProcessingStep, TrainingStep
+from sagemaker.workflow.steps import CacheConfig, ProcessingStep, TrainingStep, TuningStep
 from sagemaker.workflow.step_collections import RegisterModel
 from sagemaker.workflow.conditions import ConditionGreaterThanOrEqualTo
 from sagemaker.workflow.condition_step import ConditionStep
 from sagemaker.workflow.functions import JsonGet
-from sagemaker.workflow.parameters import ParameterString, ParameterFloat
+from sagemaker.workflow.parameters import ParameterString, ParameterFloat, ParameterInteger
 from sagemaker.sklearn.processing import SKLearnProcessor
 from sagemaker.processing import ProcessingOutput
 from sagemaker.estimator import Estimator
 from sagemaker.inputs import TrainingInput
+from sagemaker.parameter import ContinuousParameter, IntegerParameter
+from sagemaker.tuner import (HyperparameterTuner, HyperbandStrategyConfig, StrategyConfig, WarmStartConfig,
+                             WarmStartTypes)
 from sagemaker.model_metrics import MetricsSource, ModelMetrics
 from sagemaker.workflow.properties import PropertyFile
 from sagemaker.processing import ProcessingInput
+import hashlib
 import json
 import os
 from sagemaker.processing import ScriptProcessor
+from pipeline_dag import (PIPELINE_NAME, OUTPUT_FORMAT, CONTENT_TYPE, PARAMETERS, CACHE_EXPIRE_AFTER,
+                          PREPROCESS, MODEL_STEP, EVALUATE, CHECK, REGISTER, TuningSpec, cache_expiry,
+                          processing_arguments, resolve_argument)
 
 
 # Get configuration
@@ -42,33 +49,91 @@ print(f"Region: {region}")
 print(f"Bucket: {bucket}")
 print(f"Role: {role}")
 
-# Define pipeline parameters
-processing_instance_type = ParameterString(
-    name="ProcessingInstanceType",
-    default_value="ml.m5.xlarge"
-)
+print(f"Output format: {OUTPUT_FORMAT} ({CONTENT_TYPE})")
 
-training_instance_type = ParameterString(
-    name="TrainingInstanceType",
-    default_value="ml.m5.xlarge"
-)
+# Steps with cache=True reuse a previous execution's results when their
+# arguments match, until the results are older than CACHE_EXPIRE_AFTER
+print(f"Step cache expires after: {CACHE_EXPIRE_AFTER} ({cache_expiry(CACHE_EXPIRE_AFTER)})")
+cache_config = CacheConfig(enable_caching=True, expire_after=CACHE_EXPIRE_AFTER)
 
-accuracy_threshold = ParameterFloat(
-    name="AccuracyThreshold",
-    default_value=0.75
-)
+def step_cache_config(spec):
+    return cache_config if spec.cache else None
+
+# Define pipeline parameters (names and defaults shared with local_pipeline.py)
+PARAMETER_TYPES = {"String": ParameterString, "Float": ParameterFloat, "Integer": ParameterInteger}
+parameters = {
+    name: PARAMETER_TYPES[kind](name=name, default_value=default)
+    for name, (kind, default) in PARAMETERS.items()
+}
+processing_instance_type = parameters["ProcessingInstanceType"]
+training_instance_type = parameters["TrainingInstanceType"]
+
+def container_path(channel):
+    return channel.path
+
+def step_output_uri(step_output):
+    """
+    Property reference to an upstream step output (a pipeline_dag.StepOutput)
+    """
+    step = pipeline_steps[step_output.step]
+    if isinstance(step, TrainingStep):
+        return step.properties.ModelArtifacts.S3ModelArtifacts
+    if isinstance(step, TuningStep):
+        # The best training job's model.tar.gz
+        return step.get_top_model_s3_uri(top_k=0, s3_bucket=bucket, prefix=MODEL_OUTPUT_PREFIX)
+    return step.properties.ProcessingOutputConfig.Outputs[step_output.output].S3Output.S3Uri
+
+pipeline_steps = {}
+
+MODEL_OUTPUT_PREFIX = "pipeline-output"
+RANGE_TYPES = {"Continuous": ContinuousParameter, "Integer": IntegerParameter}
+
+def previous_tuning_job(step_name, sm_client=None):
+    """
+    Tuning job run by `step_name` in the pipeline's most recent successful
+    execution (the warm-start parent), or None.
+    
+    Looked up once, when this script defines and upserts the pipeline: the
+    parent is baked into the definition, so every later execution warm-starts
+    from this same job until the script is rerun
+    """
+    sm_client = sm_client or boto3.client('sagemaker')
+    try:
+        executions = sm_client.list_pipeline_executions(
+            PipelineName=PIPELINE_NAME, SortBy='CreationTime', SortOrder='Descending', MaxResults=20
+        )['PipelineExecutionSummaries']
+    except sm_client.exceptions.ResourceNotFound:
+        return None
+    for execution in executions:
+        if execution['PipelineExecutionStatus'] != 'Succeeded':
+            continue
+        steps = sm_client.list_pipeline_execution_steps(
+            PipelineExecutionArn=execution['PipelineExecutionArn'])['PipelineExecutionSteps']
+        for step in steps:
+            tuning_job = step.get('Metadata', {}).get('TuningJob')
+            if step['StepName'] == step_name and tuning_job:
+                return tuning_job['Arn'].split('/')[-1]
+    return None
+
+def code_prefix(path):
+    """
+    S3 prefix keyed by the script's content: the cache key only sees the code
+    URI, so an edited script must get a new URI to invalidate cached steps
+    """
+    with open(path, 'rb') as f:
+        return f"pipeline-code/{hashlib.sha256(f.read()).hexdigest()[:12]}"
 
 # Upload scripts to S3
 print("\nUploading scripts to S3...")
 preprocess_s3 = sagemaker_session.upload_data(
-    path='preprocess.py',
+    path=PREPROCESS.code,
     bucket=bucket,
-    key_prefix='pipeline-code'
+    key_prefix=code_prefix(PREPROCESS.code)
 )
 evaluate_s3 = sagemaker_session.upload_data(
-    path='evaluate.py',
+    path=EVALUATE.code,
     bucket=bucket,
-    key_prefix='pipeline-code'
+    key_prefix=code_prefix(EVALUATE.code)
 )
 print(f"Scripts uploaded to s3://{bucket}/pipeline-code/")
 
@@ -77,24 +142,27 @@ print("\nCreating processing step...")
 sklearn_processor = SKLearnProcessor(
     framework_version="1.2-1",
     instance_type=processing_instance_type,
-    instance_count=1,
+    instance_count=resolve_argument(PREPROCESS.instance_count, parameters),
     base_job_name="pipeline-preprocess",
     role=role,
     sagemaker_session=sagemaker_session
 )
 
 step_process = ProcessingStep(
-    name="PreprocessData",
+    name=PREPROCESS.name,
     processor=sklearn_processor,
     outputs=[
-        ProcessingOutput(output_name="train", source="/opt/ml/processing/train"),
-        ProcessingOutput(output_name="validation", source="/opt/ml/processing/validation")
+        ProcessingOutput(output_name=channel.name, source=channel.path)
+        for channel in PREPROCESS.outputs
     ],
-    code=preprocess_s3
+    job_arguments=processing_arguments(PREPROCESS, parameters, container_path),
+    code=preprocess_s3,
+    cache_config=step_cache_config(PREPROCESS)
 )
+pipeline_steps[step_process.name] = step_process
 
-# Step 2: Training
-print("Creating training step...")
+# Step 2: Training (or tuning)
+print(f"Creating {'tuning' if isinstance(MODEL_STEP, TuningSpec) else 'training'} step...")
 image_uri = sagemaker.image_uris.retrieve(
     framework="xgboost",
     region=region,
@@ -105,34 +173,69 @@ image_uri = sagemaker.image_uris.retrieve(
 xgb_estimator = Estimator(
     image_uri=image_uri,
     instance_type=training_instance_type,
-    instance_count=1,
-    output_path=f"s3://{bucket}/pipeline-output",
+    instance_count=resolve_argument(MODEL_STEP.instance_count, parameters),
+    output_path=f"s3://{bucket}/{MODEL_OUTPUT_PREFIX}",
     base_job_name="pipeline-train",
     role=role,
     sagemaker_session=sagemaker_session,
-    hyperparameters={
-        "objective": "binary:logistic",
-        "num_round": "100",
-        "max_depth": "5",
-        "eta": "0.2",
-        "subsample": "0.8"
-    }
+    hyperparameters=MODEL_STEP.hyperparameters
 )
 
-step_train = TrainingStep(
-    name="TrainModel",
-    estimator=xgb_estimator,
-    inputs={
-        "train": TrainingInput(
-            s3_data=step_process.properties.ProcessingOutputConfig.Outputs["train"].S3Output.S3Uri,
-            content_type="text/csv"
-        ),
-        "validation": TrainingInput(
-            s3_data=step_process.properties.ProcessingOutputConfig.Outputs["validation"].S3Output.S3Uri,
-            content_type="text/csv"
-        )
-    }
-)
+training_inputs = {
+    name: TrainingInput(
+        s3_data=step_output_uri(source),
+        content_type=CONTENT_TYPE,
+        # each training instance gets its own train part files
+        distribution="ShardedByS3Key" if name == "train" else "FullyReplicated"
+    )
+    for name, source in MODEL_STEP.channels.items()
+}
+
+if isinstance(MODEL_STEP, TuningSpec):
+    num_round = int(MODEL_STEP.hyperparameters["num_round"])
+    tuner_options = {}
+    if MODEL_STEP.strategy == "Hyperband":
+        # Hyperband stops weak trials itself, by comparing them at num_round checkpoints
+        tuner_options["strategy_config"] = StrategyConfig(HyperbandStrategyConfig(
+            max_resource=num_round, min_resource=max(1, num_round // 9)))
+    else:
+        tuner_options["early_stopping_type"] = "Auto"
+        # Fixed at upsert time (WarmStartConfig takes job names, not pipeline parameters):
+        # rerun this script after an execution to warm-start the next one from it
+        parent = previous_tuning_job(MODEL_STEP.name)
+        if parent:
+            # Data changes between executions, so transfer rather than identical-data warm start
+            print(f"Warm start from tuning job: {parent} (fixed until create_pipeline.py is rerun)")
+            tuner_options["warm_start_config"] = WarmStartConfig(WarmStartTypes.TRANSFER_LEARNING, {parent})
+
+    tuner = HyperparameterTuner(
+        estimator=xgb_estimator,
+        objective_metric_name=MODEL_STEP.objective_metric,
+        objective_type=MODEL_STEP.objective_type,
+        hyperparameter_ranges={
+            name: RANGE_TYPES[r.kind](r.min_value, r.max_value, scaling_type=r.scaling)
+            for name, r in MODEL_STEP.ranges.items()
+        },
+        strategy=MODEL_STEP.strategy,
+        max_jobs=resolve_argument(MODEL_STEP.max_jobs, parameters),
+        max_parallel_jobs=resolve_argument(MODEL_STEP.max_parallel_jobs, parameters),
+        base_tuning_job_name="pipeline-tune",
+        **tuner_options
+    )
+    step_train = TuningStep(
+        name=MODEL_STEP.name,
+        tuner=tuner,
+        inputs=training_inputs,
+        cache_config=step_cache_config(MODEL_STEP)
+    )
+else:
+    step_train = TrainingStep(
+        name=MODEL_STEP.name,
+        estimator=xgb_estimator,
+        inputs=training_inputs,
+        cache_config=step_cache_config(MODEL_STEP)
+    )
+pipeline_steps[step_train.name] = step_train
 
 # Step 3: Evaluation with XGBoost container
 print("3️⃣  Creating Evaluation Step...")
@@ -154,30 +257,28 @@ eval_processor = ScriptProcessor(
 )
 
 evaluation_report = PropertyFile(
-    name="EvaluationReport",
-    output_name="evaluation",
-    path="evaluation.json"
+    name=EVALUATE.property_file.name,
+    output_name=EVALUATE.property_file.output,
+    path=EVALUATE.property_file.path
 )
 
 step_eval = ProcessingStep(
-    name="EvaluateModel",
+    name=EVALUATE.name,
     processor=eval_processor,
     inputs=[
-        ProcessingInput(
-            source=step_train.properties.ModelArtifacts.S3ModelArtifacts,
-            destination="/opt/ml/processing/model"
-        ),
-        ProcessingInput(
-            source=step_process.properties.ProcessingOutputConfig.Outputs["validation"].S3Output.S3Uri,
-            destination="/opt/ml/processing/test"
-        )
+        ProcessingInput(source=step_output_uri(channel.source), destination=channel.path)
+        for channel in EVALUATE.inputs
     ],
     outputs=[
-        ProcessingOutput(output_name="evaluation", source="/opt/ml/processing/evaluation")
+        ProcessingOutput(output_name=channel.name, source=channel.path)
+        for channel in EVALUATE.outputs
     ],
-    code=f"s3://{bucket}/pipeline-code/evaluate.py",
-    property_files=[evaluation_report]
+    job_arguments=processing_arguments(EVALUATE, parameters, container_path),
+    code=evaluate_s3,
+    property_files=[evaluation_report],
+    cache_config=step_cache_config(EVALUATE)
 )
+pipeline_steps[step_eval.name] = step_eval
 
 # Step 4: Register Model (with metrics)
 print("Creating register model step...")
@@ -191,32 +292,35 @@ model_metrics = ModelMetrics(
 )
 
 step_register = RegisterModel(
-    name="RegisterModel",
+    name=REGISTER.name,
     estimator=xgb_estimator,
-    model_data=step_train.properties.ModelArtifacts.S3ModelArtifacts,
+    model_data=step_output_uri(REGISTER.model),
     content_types=["text/csv"],
     response_types=["text/csv"],
     inference_instances=["ml.t2.medium", "ml.m5.large"],
     transform_instances=["ml.m5.large"],
-    model_package_group_name="mlops-pipeline-models",
+    model_package_group_name=REGISTER.model_package_group,
     approval_status="PendingManualApproval",
     model_metrics=model_metrics
 )
 
-# Step 5: Condition (only register if accuracy meets threshold)
+# Step 5: Condition (only register if accuracy and ROC-AUC meet thresholds)
 print("Creating condition step...")
-cond_gte = ConditionGreaterThanOrEqualTo(
-    left=JsonGet(
-        step_name=step_eval.name,
-        property_file=evaluation_report,
-        json_path="accuracy"
-    ),
-    right=accuracy_threshold
-)
+conditions = [
+    ConditionGreaterThanOrEqualTo(
+        left=JsonGet(
+            step_name=condition.step,
+            property_file=evaluation_report,
+            json_path=condition.json_path
+        ),
+        right=resolve_argument(condition.threshold, parameters)
+    )
+    for condition in CHECK.conditions
+]
 
 step_cond = ConditionStep(
-    name="CheckAccuracy",
-    conditions=[cond_gte],
+    name=CHECK.name,
+    conditions=conditions,
     if_steps=[step_register],
     else_steps=[]
 )
@@ -224,12 +328,8 @@ step_cond = ConditionStep(
 # Create Pipeline
 print("Creating pipeline...")
 pipeline = Pipeline(
-    name="MLOpsPipeline",
-    parameters=[
-        processing_instance_type,
-        training_instance_type,
-        accuracy_threshold
-    ],
+    name=PIPELINE_NAME,
+    parameters=list(parameters.values()),
     steps=[step_process, step_train, step_eval, step_cond],
     sagemaker_session=sagemaker_session
 )
@@ -0,0 +1,166 @@
+"""
+Local stand-in for multi-instance XGBoost training (Rabit-style)
+
+The built-in XGBoost container trains on N instances by giving each one its
+own train part files (ShardedByS3Key) and syncing histograms over Rabit. Here
+each "instance" is a local process joined through an XGBoost RabitTracker:
+same sharding, same hist tree method, one model. Used by local_pipeline.py
+when TrainingInstanceCount > 1, and as a scaling benchmark:
+
+    python3 distributed_train.py --rows 2000000 --workers 1 2 4
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+def shard_files(files, rank, world_size):
+    """
+    ShardedByS3Key: instance `rank` gets every world_size-th file (sorted by key)
+    """
+    return sorted(files)[rank::world_size]
+
+def _train_worker(rank, world_size, tracker_args, train_files, validation_files, params, num_round):
+    """
+    One training instance: read its train shard and the full validation
+    channel, then train inside the Rabit communicator. Returns timings, and
+    the model from rank 0 (every rank ends up with the same trees).
+    """
+    import xgboost as xgb
+    from xgboost import collective
+    from evaluate import load_test_data
+
+    start = time.perf_counter()
+    y, X = load_test_data(shard_files(train_files, rank, world_size))
+    dtrain = xgb.DMatrix(X, label=y)
+    evals = [(dtrain, 'train')]
+    if validation_files:
+        y_val, X_val = load_test_data(validation_files)
+        evals.append((xgb.DMatrix(X_val, label=y_val), 'validation'))
+    load_seconds = time.perf_counter() - start
+
+    history = {}
+    with collective.CommunicatorContext(**tracker_args, dmlc_task_id=f"algo-{rank + 1}"):
+        start = time.perf_counter()
+        booster = xgb.train(params, dtrain, num_round, evals=evals, evals_result=history,
+                            verbose_eval=False)
+        train_seconds = time.perf_counter() - start
+
+    return {
+        "rank": rank,
+        "rows": len(y),
+        "load_seconds": load_seconds,
+        "train_seconds": train_seconds,
+        "metrics": {name: values[-1] for name, values in history.get('validation', {}).items()},
+        "model": bytes(booster.save_raw(raw_format='ubj')) if rank == 0 else None
+    }
+
+def train_distributed(train_files, validation_files, hyperparameters, n_workers, nthread=None):
+    """
+    Train one model across n_workers local processes (one per simulated
+    instance) and return (model bytes, per-worker results)
+    """
+    from xgboost.tracker import RabitTracker
+
+    if len(train_files) < n_workers:
+        raise ValueError(f"{n_workers} training instances need at least {n_workers} train part files "
+                         f"(got {len(train_files)}); raise PreprocessShards")
+
+    params = dict(hyperparameters)
+    num_round = int(params.pop('num_round'))
+    params.setdefault('tree_method', 'hist')
+    # Simulated instances share this machine's cores
+    params['nthread'] = nthread or max(1, (os.cpu_count() or 1) // n_workers)
+
+    tracker = RabitTracker(n_workers=n_workers, host_ip='127.0.0.1')
+    tracker.start()
+    tasks = [(rank, n_workers, tracker.worker_args(), train_files, validation_files, params, num_round)
+             for rank in range(n_workers)]
+
+    # spawn: forking a process that already initialised OpenMP can deadlock
+    with multiprocessing.get_context('spawn').Pool(processes=n_workers) as pool:
+        results = pool.starmap(_train_worker, tasks)
+    tracker.wait_for()
+
+    return results[0]['model'], results
+
+def write_synthetic_shards(output_dir, n_rows, n_shards, seed=42):
+    """
+    Train/validation part files from preprocess.py's synthetic generator
+    """
+    from preprocess import SyntheticGenerator, ChannelWriter, hash_split_mask, shard_file_name
+
+    train_dir = os.path.join(output_dir, 'train')
+    val_dir = os.path.join(output_dir, 'validation')
+    os.makedirs(train_dir)
+    os.makedirs(val_dir)
+
+    rows_per_shard = -(-n_rows // n_shards)
+    generator = SyntheticGenerator(seed=seed, block_size=rows_per_shard)
+    for i, block in enumerate(generator.iter_blocks(n_rows)):
+        mask = hash_split_mask(block)
+        with ChannelWriter(os.path.join(train_dir, shard_file_name(i)), 'csv') as writer:
+            writer.write(block[mask])
+        with ChannelWriter(os.path.join(val_dir, shard_file_name(i)), 'csv') as writer:
+            writer.write(block[~mask])
+    return train_dir, val_dir
+
+def benchmark(n_rows, worker_counts, hyperparameters, nthread=None):
+    """
+    Train the same data with each worker count; speedup and scaling
+    efficiency are relative to one worker
+    """
+    from evaluate import list_test_files
+
+    workdir = tempfile.mkdtemp(prefix='distributed-bench-')
+    try:
+        train_dir, val_dir = write_synthetic_shards(workdir, n_rows, max(worker_counts))
+        train_files, val_files = list_test_files(train_dir), list_test_files(val_dir)
+
+        results = {}
+        for n_workers in worker_counts:
+            start = time.perf_counter()
+            _, workers = train_distributed(train_files, val_files, hyperparameters, n_workers, nthread)
+            results[n_workers] = {
+                "wall_seconds": time.perf_counter() - start,
+                "train_seconds": max(w['train_seconds'] for w in workers),
+                "metrics": workers[0]['metrics']
+            }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    baseline = results[worker_counts[0]]['train_seconds'] * worker_counts[0]
+    for n_workers, result in results.items():
+        result["speedup"] = baseline / result["train_seconds"]
+        result["efficiency"] = result["speedup"] / n_workers
+    return results
+
+if __name__ == '__main__':
+    from pipeline_dag import HYPERPARAMETERS
+
+    parser = argparse.ArgumentParser(description="Benchmark multi-instance XGBoost scaling locally")
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4],
+                        help='Simulated training instance counts to compare')
+    parser.add_argument('--nthread', type=int, default=None,
+                        help='Threads per worker (default: CPU cores / workers)')
+    parser.add_argument('--num-round', type=int, default=None)
+
+    args = parser.parse_args()
+
+    hyperparameters = dict(HYPERPARAMETERS)
+    if args.num_round:
+        hyperparameters['num_round'] = str(args.num_round)
+
+    print(f"Training on {args.rows:,} synthetic rows with {', '.join(map(str, args.workers))} workers "
+          f"({os.cpu_count()} cores)...")
+    results = benchmark(args.rows, sorted(args.workers), hyperparameters, args.nthread)
+
+    print(f"\n{'Workers':>8}{'Train (s)':>11}{'Wall (s)':>10}{'Speedup':>9}{'Efficiency':>12}  Validation")
+    print("-"*70)
+    for n_workers, result in results.items():
+        metrics = ', '.join(f"{k}={v:.4f}" for k, v in result['metrics'].items())
+        print(f"{n_workers:>8}{result['train_seconds']:>11.2f}{result['wall_seconds']:>10.2f}"
+              f"{result['speedup']:>8.2f}x{result['efficiency']:>12.0%}  {metrics}")
@@ -1,16 +1,830 @@
 """
 Model evaluation with debugging
 """
+import glob
 import json
 import pathlib
 import pickle
+import struct
 import tarfile
 import sys
 import os
+from functools import partial
 
-def evaluate_model(model_path, test_data_path, output_path):
+# File extensions written by preprocess.py --output-format
+TEST_FILE_FORMATS = {
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.pbr': 'recordio-protobuf',
+    '.libsvm': 'libsvm',
+}
+
+RECORDIO_MAGIC = 0xced7230a
+
+# Metric engine settings
+HISTOGRAM_BINS = 4096
+CALIBRATION_BINS = 10
+SWEEP_POINTS = 101
+
+# Categorical feature columns (index into X, i.e. after the label) to slice metrics by
+SLICE_FEATURES = {'Pclass': 0, 'Sex': 1}
+MAX_SLICE_VALUES = 64
+# Cap on (quantile block, slice codes, label) cells for in-memory slice curves
+MAX_SLICE_CELLS = 1 << 22
+
+# Names the XGBoost container uses for the model inside model.tar.gz
+MODEL_MEMBER_NAMES = ['xgboost-model', 'model', 'xgboost_model']
+
+# Multi-model leaderboard: metrics where a smaller value ranks higher
+LOWER_IS_BETTER = {'log_loss'}
+LEADERBOARD_FILE = 'leaderboard.json'
+
+def list_test_files(test_data_path):
+    """
+    Accept either a single data file or a channel directory of part files
+    """
+    if os.path.isdir(test_data_path):
+        return sorted(
+            f for f in glob.glob(os.path.join(test_data_path, '*'))
+            if os.path.splitext(f)[1] in TEST_FILE_FORMATS
+        )
+    return [test_data_path]
+
+def _read_varint(buf, pos):
+    result = 0
+    shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+def _length_delimited_fields(buf, start, end):
+    """
+    Yield (field_number, start, end) for the length-delimited fields of one
+    protobuf message, skipping everything else
+    """
+    pos = start
+    while pos < end:
+        key, pos = _read_varint(buf, pos)
+        field, wire_type = key >> 3, key & 0x7
+        if wire_type == 2:
+            length, pos = _read_varint(buf, pos)
+            yield field, pos, pos + length
+            pos += length
+        elif wire_type == 0:
+            _, pos = _read_varint(buf, pos)
+        elif wire_type == 5:
+            pos += 4
+        elif wire_type == 1:
+            pos += 8
+        else:
+            raise ValueError(f"Unsupported protobuf wire type {wire_type}")
+
+def _tensor_values_span(buf, start, end):
+    """
+    Locate the packed float32 values inside a Record features/label MapEntry
+    """
+    for field, value_start, value_end in _length_delimited_fields(buf, start, end):
+        if field != 2:  # MapEntry.value
+            continue
+        for tensor_field, t_start, t_end in _length_delimited_fields(buf, value_start, value_end):
+            if tensor_field != 2:  # Value.float32_tensor
+                continue
+            for values_field, v_start, v_end in _length_delimited_fields(buf, t_start, t_end):
+                if values_field == 1:  # Float32Tensor.values
+                    return v_start, v_end
+    raise ValueError("Record has no float32 tensor values")
+
+def _parse_recordio_record(buf, pos):
+    """
+    Return ({1: features_span, 2: label_span}, next_pos) for the record at pos
+    """
+    magic, length = struct.unpack_from('<II', buf, pos)
+    if magic != RECORDIO_MAGIC:
+        raise ValueError(f"Bad RecordIO magic at byte {pos}")
+    length &= (1 << 29) - 1
+    start = pos + 8
+    spans = {}
+    for field, f_start, f_end in _length_delimited_fields(buf, start, start + length):
+        if field in (1, 2):  # Record.features / Record.label
+            spans[field] = _tensor_values_span(buf, f_start, f_end)
+    return spans, start + length + (-length % 4)
+
+def _uniform_records(records, spans):
+    """
+    Slice (labels, features) out of an (n, record_size) byte matrix of
+    identically laid out records
+    """
+    import numpy as np
+    
+    if not (records[:, :8] == records[0, :8]).all():
+        raise ValueError("RecordIO records are not uniformly laid out")
+    n_features = (spans[1][1] - spans[1][0]) // 4
+    features = np.ascontiguousarray(records[:, spans[1][0]:spans[1][1]]).view('<f4')
+    labels = np.ascontiguousarray(records[:, spans[2][0]:spans[2][1]]).view('<f4')[:, 0]
+    return labels, features.reshape(-1, n_features)
+
+def read_recordio_protobuf(path):
+    """
+    Read dense SageMaker RecordIO-protobuf records into (labels, features).
+    
+    When every record has the same layout (what preprocess.py writes) the file
+    is decoded as one strided NumPy view; otherwise records are walked one by one.
+    """
+    import numpy as np
+    
+    with open(path, 'rb') as f:
+        buf = f.read()
+    if not buf:
+        return np.empty(0), np.empty((0, 0))
+    
+    spans, record_size = _parse_recordio_record(buf, 0)
+    
+    if len(buf) % record_size == 0:
+        records = np.frombuffer(buf, dtype=np.uint8).reshape(-1, record_size)
+        try:
+            return _uniform_records(records, spans)
+        except ValueError:
+            pass
+    
+    labels, features = [], []
+    pos = 0
+    while pos < len(buf):
+        spans, pos = _parse_recordio_record(buf, pos)
+        features.append(np.frombuffer(buf, dtype='<f4', count=(spans[1][1] - spans[1][0]) // 4,
+                                      offset=spans[1][0]))
+        labels.append(np.frombuffer(buf, dtype='<f4', count=1, offset=spans[2][0])[0])
+    return np.array(labels), np.vstack(features)
+
+def iter_recordio_batches(path, batch_size):
+    """
+    Memory-map a uniformly laid out RecordIO-protobuf file and yield
+    batch_size records at a time (falls back to a full read otherwise)
+    """
+    import numpy as np
+    
+    with open(path, 'rb') as f:
+        header = f.read(8)
+        _, length = struct.unpack('<II', header)
+        first = header + f.read((length & ((1 << 29) - 1)) + 3)
+    spans, record_size = _parse_recordio_record(first, 0)
+    
+    if os.path.getsize(path) % record_size:
+        labels, features = read_recordio_protobuf(path)
+        for start in range(0, len(labels), batch_size):
+            yield labels[start:start + batch_size], features[start:start + batch_size]
+        return
+    
+    records = np.memmap(path, dtype=np.uint8, mode='r').reshape(-1, record_size)
+    for start in range(0, len(records), batch_size):
+        yield _uniform_records(records[start:start + batch_size], spans)
+
+def parse_libsvm_lines(lines):
+    """
+    Parse 0-based libsvm lines into (labels, dense features); absent entries are NaN
+    """
+    import numpy as np
+    
+    labels, rows, cols, vals = [], [], [], []
+    for row, line in enumerate(lines):
+        parts = line.split()
+        labels.append(float(parts[0]))
+        for entry in parts[1:]:
+            index, value = entry.split(':')
+            rows.append(row)
+            cols.append(int(index))
+            vals.append(float(value))
+    
+    n_features = max(cols) + 1 if cols else 0
+    features = np.full((len(labels), n_features), np.nan)
+    features[rows, cols] = vals
+    return np.array(labels), features
+
+def read_libsvm(path):
+    with open(path) as f:
+        return parse_libsvm_lines(f)
+
+def read_test_file(path, has_pandas=True):
+    """
+    Read one label-first data file in any preprocess.py output format
+    """
+    import numpy as np
+    
+    file_format = TEST_FILE_FORMATS.get(os.path.splitext(path)[1], 'csv')
+    
+    if file_format == 'recordio-protobuf':
+        return read_recordio_protobuf(path)
+    if file_format == 'libsvm':
+        return read_libsvm(path)
+    if file_format == 'parquet':
+        import pandas as pd
+        values = pd.read_parquet(path).values
+    elif has_pandas:
+        import pandas as pd
+        values = pd.read_csv(path, header=None).values
+    else:
+        values = np.genfromtxt(path, delimiter=',', ndmin=2)
+    return values[:, 0], values[:, 1:]
+
+def load_test_data(test_files, has_pandas=True):
+    """
+    Read and stack every non-empty test file into (y_test, X_test)
+    """
+    import numpy as np
+    
+    parts = [read_test_file(f, has_pandas) for f in test_files if os.path.getsize(f) > 0]
+    parts = [(y, X) for y, X in parts if len(y)]
+    n_features = max(X.shape[1] for _, X in parts)
+    
+    # libsvm files can come back narrower when trailing features are all missing
+    X_test = np.vstack([
+        np.pad(X, ((0, 0), (0, n_features - X.shape[1])), constant_values=np.nan)
+        for _, X in parts
+    ])
+    y_test = np.concatenate([y for y, _ in parts]).astype(int)
+    return y_test, X_test
+
+def iter_test_batches(test_files, batch_size, has_pandas=True):
+    """
+    Yield (y, X) batches of at most batch_size rows from every test file, so
+    evaluation memory is bounded by the batch size rather than the dataset
+    """
+    import itertools
+    import numpy as np
+    
+    for path in test_files:
+        if os.path.getsize(path) == 0:
+            continue
+        file_format = TEST_FILE_FORMATS.get(os.path.splitext(path)[1], 'csv')
+        
+        if file_format == 'recordio-protobuf':
+            yield from iter_recordio_batches(path, batch_size)
+        elif file_format == 'libsvm':
+            with open(path) as f:
+                while True:
+                    lines = list(itertools.islice(f, batch_size))
+                    if not lines:
+                        break
+                    yield parse_libsvm_lines(lines)
+        elif file_format == 'parquet':
+            import pyarrow.parquet as pq
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+                values = batch.to_pandas().values
+                yield values[:, 0], values[:, 1:]
+        elif has_pandas:
+            import pandas as pd
+            for chunk in pd.read_csv(path, header=None, chunksize=batch_size):
+                values = chunk.values
+                yield values[:, 0], values[:, 1:]
+        else:
+            values = np.genfromtxt(path, delimiter=',', ndmin=2)
+            for start in range(0, len(values), batch_size):
+                yield values[start:start + batch_size, 0], values[start:start + batch_size, 1:]
+
+def slice_codes(X, slice_features=None):
+    """
+    {slice name: uint8 code per row} for the categorical columns of X: value
+    + 1 for integer values in [0, MAX_SLICE_VALUES), 0 for rows in no slice
+    """
+    import numpy as np
+    
+    slice_features = SLICE_FEATURES if slice_features is None else slice_features
+    codes = {}
+    for name, column in slice_features.items():
+        values = X[:, column]
+        with np.errstate(invalid='ignore'):
+            column_codes = values.astype(np.uint8)
+        # NaN, negative, fractional and large values don't survive the round trip
+        valid = (column_codes == values) & (column_codes < MAX_SLICE_VALUES)
+        column_codes += 1
+        if not valid.all():
+            column_codes[~valid] = 0
+        codes[name] = column_codes
+    return codes
+
+def _rows_above(inverted_bits, thresholds, inclusive=False):
+    """
+    Rows of the score-sorted keys scoring above each threshold (at or above
+    when inclusive), by binary search on the complemented float32 bits
+    """
+    import numpy as np
+    
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    nearest = thresholds.astype(np.float32)
+    # Scores are float32: step to the float32 that keeps the comparison exact
+    if inclusive:
+        nearest = np.where(nearest < thresholds, np.nextafter(nearest, np.float32(2)), nearest)
+    else:
+        nearest = np.where(nearest > thresholds, np.nextafter(nearest, np.float32(-1)), nearest)
+    return np.searchsorted(inverted_bits, ~nearest.view(np.uint32), side='right' if inclusive else 'left')
+
+def _tie_runs(inverted_bits):
+    """
+    First and last row of every run of two or more equal scores
+    """
+    import numpy as np
+    
+    tied = np.flatnonzero(inverted_bits[1:] == inverted_bits[:-1])
+    if not len(tied):
+        return tied, tied
+    breaks = np.flatnonzero(np.diff(tied) != 1)
+    return tied[np.concatenate([[0], breaks + 1])], tied[np.append(breaks, len(tied) - 1)] + 1
+
+def ranking_metrics(inverted_bits, is_positive, sweep_points=SWEEP_POINTS):
+    """
+    Exact curve_metrics() from score-sorted rows (complemented float32 bits,
+    negatives before positives among equal scores) and their labels, without
+    materialising a curve point per distinct score
+    """
+    import numpy as np
+    
+    pos_rows = np.flatnonzero(is_positive)
+    n_pos = len(pos_rows)
+    n_neg = len(inverted_bits) - n_pos
+    if n_pos == 0 or n_neg == 0:
+        return {"roc_auc": 0.0, "pr_auc": 0.0, "best_f1_threshold": 0.5, "best_f1": 0.0,
+                "threshold_sweep": {}}
+    
+    # Positives before / up to the end of each run of equal scores
+    first, last = _tie_runs(inverted_bits)
+    positives_through = np.cumsum(is_positive, dtype=np.int32)
+    run_start = positives_through[first] - is_positive[first]
+    run_end = positives_through[last]
+    run_pos = run_end - run_start
+    run_neg = last - first + 1 - run_pos
+    
+    # Rank sum: the k-th positive (from 0) at row i has i - k negatives scored
+    # above or equal to it; tied pairs count half
+    below = n_pos * n_neg - (int(pos_rows.sum()) - n_pos * (n_pos - 1) // 2)
+    roc_auc = (below + 0.5 * float(np.dot(run_pos, run_neg))) / (n_pos * n_neg)
+    
+    # Average precision: each positive counts the precision at the last row of its run
+    rank = np.arange(1, n_pos + 1, dtype=np.float64)
+    rows = pos_rows + 1.0
+    cumulative = np.zeros(n_pos + 1)
+    np.divide(rank, rows, out=cumulative[1:])
+    np.cumsum(cumulative[1:], out=cumulative[1:])
+    pr_sum = float(cumulative[-1])
+    mixed = np.flatnonzero(run_pos)
+    if len(mixed):
+        a, b = run_start[mixed], run_end[mixed]
+        pr_sum += float(np.sum((b - a) * (b / (last[mixed] + 1)) - (cumulative[b] - cumulative[a])))
+    
+    # F1 rises along consecutive positives, so the best is at a positive ending its run
+    rows += n_pos
+    f1 = np.divide(rank, rows, out=rows)
+    best = int(np.argmax(f1))
+    best_row = pos_rows[best]
+    
+    grid = np.linspace(0, 1, sweep_points)
+    predicted = _rows_above(inverted_bits, grid)
+    tp_at = np.searchsorted(pos_rows, predicted)
+    metrics = {
+        "roc_auc": roc_auc,
+        "pr_auc": pr_sum / n_pos,
+        "best_f1_threshold": float((~inverted_bits[best_row:best_row + 1]).view(np.float32)[0]),
+        "best_f1": 2 * float(f1[best]),
+    }
+    metrics["threshold_sweep"] = threshold_sweep(grid, tp_at, predicted - tp_at, n_pos, n_neg)
+    return metrics
+
+def sorted_metrics(y_true, y_proba, codes=None, threshold=0.5, slice_points=HISTOGRAM_BINS):
+    """
+    StreamingMetrics.result() for predictions held in memory, from a single
+    sort (codes as from slice_codes()).
+    
+    Scores in [0, 1] are non-negative floats, so their float32 bit patterns
+    sort like the values; one uint64 key per row packs the complemented bits
+    (highest score first), the label (negatives first among equal scores)
+    and the slice codes, so a plain integer sort replaces argsort + gather.
+    ROC/PR-AUC, best F1, the sweep, calibration and log loss are exact; each
+    slice value's curve is taken at up to slice_points score quantiles, from
+    one bincount over (quantile block, slice codes, label). Any other scores
+    (raw margins, NaN) go through argsort_metrics() instead.
+    """
+    import numpy as np
+    
+    codes = codes or {}
+    positive = np.asarray(y_true) == 1
+    # + 0 turns -0.0 (sign bit set) into 0.0, and copies so y_proba is never touched
+    scores = np.asarray(y_proba, dtype=np.float32) + np.float32(0)
+    n = len(scores)
+    # NaN fails both comparisons
+    if n and not (scores.min() >= 0 and scores.max() <= 1):
+        return argsort_metrics(y_true, y_proba, codes, threshold)
+    
+    # Key tail, low bits first: each column's codes in as few bits as they need, then the label
+    code_bits = [int(column_codes.max()).bit_length() if n else 0 for column_codes in codes.values()]
+    label_shift = sum(code_bits)
+    n_tail = 2 << label_shift
+    if n_tail > MAX_SLICE_CELLS:
+        raise ValueError(f"Slice codes need {label_shift} bits of the sort key")
+    key_tail = np.left_shift(positive, label_shift, dtype=np.uint32)
+    shift = 0
+    for column_codes, bits in zip(codes.values(), code_bits):
+        key_tail |= np.left_shift(column_codes, shift, dtype=np.uint32)
+        shift += bits
+    
+    score_shift = np.uint64(label_shift + 1)
+    keys = scores.view(np.uint32).astype(np.uint64)
+    keys ^= np.uint64(0xFFFFFFFF)
+    keys <<= score_shift
+    keys |= key_tail
+    keys.sort()
+    
+    # Unpack without 64-bit temporaries
+    inverted_bits = np.right_shift(keys, score_shift, out=np.empty(n, dtype=np.uint32), casting='unsafe')
+    tail = np.bitwise_and(keys, np.uint64(n_tail - 1), out=keys).view(np.int64)
+    is_positive = tail >= (1 << label_shift)
+    n_pos = int(np.count_nonzero(is_positive))
+    n_neg = n - n_pos
+    ranking = ranking_metrics(inverted_bits, is_positive)
+    
+    accumulator = StreamingMetrics(threshold, slice_features={name: None for name in codes}, histogram=False)
+    predicted = int(_rows_above(inverted_bits, [threshold])[0])
+    tp = int(np.count_nonzero(is_positive[:predicted]))
+    
+    # Calibration bucket b holds rows [edge_rows[b + 1], edge_rows[b]), top bucket first
+    bins = accumulator.calibration_bins
+    edge_rows = np.concatenate([[n], _rows_above(inverted_bits, np.arange(1, bins) / bins, inclusive=True), [0]])
+    start, stop = edge_rows[1:], edge_rows[:-1]
+    sorted_scores = np.invert(inverted_bits, out=key_tail).view(np.float32)
+    accumulator.calibration[0] = stop - start
+    accumulator.calibration[1] = [sorted_scores[a:b].sum(dtype=np.float64) for a, b in zip(start, stop)]
+    accumulator.calibration[2] = [np.count_nonzero(is_positive[a:b]) for a, b in zip(start, stop)]
+    
+    # log(p) for positives, log(1 - p) for negatives, in place of the sorted scores
+    log_likelihood = sorted_scores
+    log_likelihood -= ~is_positive
+    np.abs(log_likelihood, out=log_likelihood)
+    np.log(np.maximum(log_likelihood, 1e-15, out=log_likelihood), out=log_likelihood)
+    accumulator.totals.update(tp=tp, fp=predicted - tp, fn=n_pos - tp, tn=n_neg - (predicted - tp),
+                              log_loss_sum=-float(log_likelihood.sum(dtype=np.float64)))
+    if not codes or not n:
+        return accumulator.result(ranking)
+    
+    # Quantile blocks end where a run of equal scores ends, so every boundary is a
+    # real threshold; the decision threshold is one too, for exact slice confusion counts
+    points = max(1, min(slice_points, n, MAX_SLICE_CELLS // n_tail))
+    block_last = np.searchsorted(inverted_bits, inverted_bits[np.linspace(0, n - 1, points).astype(np.int64)],
+                                 side='right') - 1
+    block_last = np.unique(np.append(block_last, [predicted - 1] if predicted else []).astype(np.int64))
+    n_blocks = len(block_last)
+    
+    # Axes: block, label, then the last column's codes down to the first's
+    fields = [2] + [1 << bits for bits in reversed(code_bits)]
+    log_loss = -np.bincount(tail, weights=log_likelihood, minlength=n_tail).reshape(fields)
+    cells = tail
+    cells += np.repeat(np.arange(n_blocks, dtype=np.int64) * n_tail, np.diff(block_last, prepend=-1))
+    counts = np.bincount(cells, minlength=n_blocks * n_tail).reshape(n_blocks, *fields)
+    thresholds = (~inverted_bits[block_last]).view(np.float32).astype(np.float64)
+    decision = int(np.searchsorted(block_last, predicted - 1)) if predicted else None
+    
+    slice_curves = {}
+    for i, name in enumerate(codes):
+        axis = len(fields) - i
+        others = tuple(a for a in range(2, len(fields) + 1) if a != axis)
+        by_code = counts.sum(axis=others).cumsum(axis=0)
+        log_loss_by_code = log_loss.sum(axis=tuple(a - 1 for a in (1,) + others))
+        slice_curves[name] = {}
+        # Code 0 is rows in no slice, value v has code v + 1
+        for code in np.flatnonzero(by_code[-1, :, 1:].sum(axis=0)) + 1:
+            fps, tps = by_code[:, 0, code], by_code[:, 1, code]
+            keep = np.flatnonzero(np.diff(tps + fps, prepend=0))
+            slice_curves[name][int(code) - 1] = (tps[keep], fps[keep], thresholds[keep])
+            tp, fp = (int(tps[decision]), int(fps[decision])) if decision is not None else (0, 0)
+            accumulator.slices[name][int(code) - 1] = {
+                "tp": tp, "fp": fp, "fn": int(tps[-1]) - tp, "tn": int(fps[-1]) - fp,
+                "log_loss_sum": float(log_loss_by_code[code])
+            }
+    return accumulator.result(ranking, slice_curves)
+
+def descending_curve(sorted_scores, sorted_positive):
+    """
+    (tps, fps, thresholds) at every distinct score, from scores sorted high
+    to low and their labels
+    """
+    import numpy as np
+    
+    if not len(sorted_scores):
+        return np.zeros(0), np.zeros(0), np.zeros(0)
+    last = np.append(np.flatnonzero(sorted_scores[1:] != sorted_scores[:-1]), len(sorted_scores) - 1)
+    tps = np.cumsum(sorted_positive)[last]
+    return tps, last + 1 - tps, sorted_scores[last]
+
+def argsort_metrics(y_true, y_proba, codes=None, threshold=0.5):
+    """
+    sorted_metrics() for scores of any range (e.g. binary:logitraw margins)
+    with a plain argsort: every curve, slices included, has a point at every
+    distinct score. Log loss and calibration clip the scores into [0, 1].
+    """
+    import numpy as np
+    
+    codes = codes or {}
+    positive = (np.asarray(y_true) == 1).astype(np.int64)
+    scores = np.asarray(y_proba, dtype=np.float64)
+    order = np.argsort(-scores, kind='stable')
+    sorted_scores, sorted_positive = scores[order], positive[order]
+    
+    accumulator = StreamingMetrics(threshold, slice_features={name: None for name in codes}, histogram=False)
+    outcome = 2 * (scores > threshold) + positive  # 0=tn 1=fn 2=fp 3=tp
+    clipped = np.clip(np.nan_to_num(scores), 0, 1)
+    log_loss = -np.log(np.clip(np.where(positive == 1, clipped, 1 - clipped), 1e-15, 1))
+    bins = accumulator.calibration_bins
+    bucket = np.minimum((clipped * bins).astype(np.int64), bins - 1)
+    for row, weights in enumerate([None, clipped, positive]):
+        accumulator.calibration[row] = np.bincount(bucket, weights=weights, minlength=bins)
+    
+    tn, fn, fp, tp = (int(c) for c in np.bincount(outcome, minlength=4))
+    accumulator.totals.update(tp=tp, fp=fp, fn=fn, tn=tn, log_loss_sum=float(log_loss.sum()))
+    
+    slice_curves = {}
+    for name, column_codes in codes.items():
+        slice_curves[name] = {}
+        sorted_codes = column_codes[order]
+        # Code 0 is rows in no slice, value v has code v + 1
+        for code in np.flatnonzero(np.bincount(column_codes)[1:]) + 1:
+            in_slice = column_codes == code
+            tn, fn, fp, tp = (int(c) for c in np.bincount(outcome[in_slice], minlength=4))
+            accumulator.slices[name][int(code) - 1] = {
+                "tp": tp, "fp": fp, "fn": fn, "tn": tn, "log_loss_sum": float(log_loss[in_slice].sum())
+            }
+            in_sorted = sorted_codes == code
+            slice_curves[name][int(code) - 1] = descending_curve(sorted_scores[in_sorted],
+                                                                 sorted_positive[in_sorted])
+    return accumulator.result(curve_metrics(*descending_curve(sorted_scores, sorted_positive)), slice_curves)
+
+def histogram_curve(pos_hist, neg_hist):
+    """
+    Approximate (tps, fps, thresholds) from per-class score histograms; each
+    bucket's lower edge stands in for the scores inside it
+    """
+    import numpy as np
+    
+    bins = len(pos_hist)
+    tps = np.cumsum(pos_hist[::-1])
+    fps = np.cumsum(neg_hist[::-1])
+    thresholds = np.arange(bins - 1, -1, -1) / bins
+    
+    # Drop empty buckets so every point is a real threshold
+    keep = np.flatnonzero((pos_hist[::-1] + neg_hist[::-1]) > 0)
+    return tps[keep], fps[keep], thresholds[keep]
+
+def curve_metrics(tps, fps, thresholds, sweep_points=SWEEP_POINTS):
+    """
+    ROC-AUC, PR-AUC (average precision), best-F1 threshold and a threshold
+    sweep from cumulative counts at descending thresholds
+    """
+    import numpy as np
+    
+    n_pos = int(tps[-1]) if len(tps) else 0
+    n_neg = int(fps[-1]) if len(fps) else 0
+    if n_pos == 0 or n_neg == 0:
+        return {"roc_auc": 0.0, "pr_auc": 0.0, "best_f1_threshold": 0.5, "best_f1": 0.0,
+                "threshold_sweep": {}}
+    
+    tpr = np.concatenate([[0.0], tps / n_pos])
+    fpr = np.concatenate([[0.0], fps / n_neg])
+    roc_auc = float(np.sum((fpr[1:] - fpr[:-1]) * (tpr[1:] + tpr[:-1]) / 2))
+    
+    precision = tps / (tps + fps)
+    recall = tps / n_pos
+    pr_auc = float(np.sum(np.diff(np.concatenate([[0.0], recall])) * precision))
+    
+    f1 = 2 * tps / (tps + fps + n_pos)
+    best = int(np.argmax(f1))
+    
+    # Sweep: predicted positive when score > t, to match the 0.5 decision rule
+    grid = np.linspace(0, 1, sweep_points)
+    above = np.searchsorted(-thresholds, -grid, side='left')
+    tp_at = np.where(above > 0, tps[np.maximum(above - 1, 0)], 0)
+    fp_at = np.where(above > 0, fps[np.maximum(above - 1, 0)], 0)
+    
+    return {
+        "roc_auc": roc_auc,
+        "pr_auc": pr_auc,
+        "best_f1_threshold": float(thresholds[best]),
+        "best_f1": float(f1[best]),
+        "threshold_sweep": threshold_sweep(grid, tp_at, fp_at, n_pos, n_neg)
+    }
+
+def threshold_sweep(grid, tp_at, fp_at, n_pos, n_neg):
+    import numpy as np
+    
+    predicted = tp_at + fp_at
+    return {
+        "thresholds": grid.round(4).tolist(),
+        "precision": np.divide(tp_at, predicted, out=np.zeros(len(grid)), where=predicted > 0).tolist(),
+        "recall": (tp_at / n_pos).tolist(),
+        "f1": (2 * tp_at / (predicted + n_pos)).tolist(),
+        "fpr": (fp_at / n_neg).tolist()
+    }
+
+def confusion_metrics(tp, tn, fp, fn):
+    n = tp + tn + fp + fn
+    accuracy = (tp + tn) / n if n > 0 else 0
+    precision = tp / (tp + fp) if (tp + fp) > 0 else 0
+    recall = tp / (tp + fn) if (tp + fn) > 0 else 0
+    f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
+    return {
+        "accuracy": float(accuracy),
+        "precision": float(precision),
+        "recall": float(recall),
+        "f1_score": float(f1)
+    }
+
+class StreamingMetrics:
+    """
+    Accumulates evaluation metrics batch by batch in bounded memory.
+    
+    Confusion-matrix counts, the log-loss sum and calibration bins are exact,
+    so they match the in-memory computation (up to floating-point summation
+    order). ROC/PR curves come from per-class score histograms with `bins`
+    buckets. Per-slice metrics (e.g. per Pclass/Sex) are kept the same way
+    for every integer-coded value of each column in slice_features.
+    
+    sorted_metrics() fills one with histogram=False (no histograms kept) and
+    passes its own ranking metrics and slice curves to result().
+    """
+    
+    def __init__(self, threshold=0.5, bins=HISTOGRAM_BINS, slice_features=None,
+                 calibration_bins=CALIBRATION_BINS, histogram=True):
+        import numpy as np
+        
+        self.threshold = threshold
+        self.bins = bins
+        self.histogram = histogram
+        self.calibration_bins = calibration_bins
+        self.slice_features = SLICE_FEATURES if slice_features is None else slice_features
+        self.totals = self._empty_totals()
+        self.calibration = np.zeros((3, calibration_bins))  # count, sum(p), sum(y)
+        self.slices = {name: {} for name in self.slice_features}
+    
+    def _empty_totals(self):
+        import numpy as np
+        
+        totals = {"tp": 0, "tn": 0, "fp": 0, "fn": 0, "log_loss_sum": 0.0}
+        if self.histogram:
+            totals["pos_hist"] = np.zeros(self.bins, dtype=np.int64)
+            totals["neg_hist"] = np.zeros(self.bins, dtype=np.int64)
+        return totals
+    
+    def _add(self, totals, outcomes, log_loss_sum, hist):
+        """
+        Fold one batch into totals: outcomes = counts of (predicted, positive)
+        as [tn, fn, fp, tp], hist = (bins, 2) counts of (bucket, positive)
+        """
+        tn, fn, fp, tp = (int(c) for c in outcomes)
+        totals["tp"] += tp
+        totals["tn"] += tn
+        totals["fp"] += fp
+        totals["fn"] += fn
+        totals["log_loss_sum"] += float(log_loss_sum)
+        totals["neg_hist"] += hist[:, 0]
+        totals["pos_hist"] += hist[:, 1]
+    
+    def update(self, y_true, y_proba, X=None):
+        import numpy as np
+        
+        positive = (np.asarray(y_true) == 1).astype(np.int64)
+        y_proba = np.asarray(y_proba, dtype=np.float64)
+        outcome = 2 * (y_proba > self.threshold) + positive  # 0=tn 1=fn 2=fp 3=tp
+        
+        # One log per row: log(p) for positives, log(1 - p) for negatives
+        log_loss = -np.log(np.clip(np.where(positive == 1, y_proba, 1 - y_proba), 1e-15, 1))
+        cells = 2 * np.minimum((y_proba * self.bins).astype(np.int64), self.bins - 1) + positive
+        
+        self._add(self.totals, np.bincount(outcome, minlength=4), log_loss.sum(),
+                  np.bincount(cells, minlength=2 * self.bins).reshape(-1, 2))
+        
+        calibration_bucket = np.minimum((y_proba * self.calibration_bins).astype(np.int64),
+                                        self.calibration_bins - 1)
+        for row, weights in enumerate([None, y_proba, positive]):
+            self.calibration[row] += np.bincount(calibration_bucket, weights=weights,
+                                                 minlength=self.calibration_bins)
+        
+        if X is None:
+            return
+        for name, codes in slice_codes(X, self.slice_features).items():
+            self._accumulate_slices(self.slices[name], codes, outcome, log_loss, cells)
+    
+    def _accumulate_slices(self, slices, codes, outcome, log_loss, cells):
+        """
+        Per-value totals for one categorical column from bincounts over
+        (value, outcome) and (value, bucket, label) codes, without a boolean
+        mask per value
+        """
+        import numpy as np
+        
+        codes = codes.astype(np.int64)
+        n_codes = int(codes.max()) + 1 if len(codes) else 1
+        
+        outcomes = np.bincount(4 * codes + outcome, minlength=4 * n_codes).reshape(n_codes, 4)
+        log_loss_sums = np.bincount(codes, weights=log_loss, minlength=n_codes)
+        hists = np.bincount(codes * (2 * self.bins) + cells,
+                            minlength=n_codes * 2 * self.bins).reshape(n_codes, self.bins, 2)
+        
+        # Code 0 is rows in no slice, value v has code v + 1
+        for code in np.flatnonzero(outcomes[1:].sum(axis=1)) + 1:
+            totals = slices.setdefault(int(code) - 1, self._empty_totals())
+            self._add(totals, outcomes[code], log_loss_sums[code], hists[code])
+    
+    def _summary(self, totals, curve=None, ranking=None):
+        n = totals["tp"] + totals["tn"] + totals["fp"] + totals["fn"]
+        if ranking is None:
+            if curve is None:
+                curve = histogram_curve(totals["pos_hist"], totals["neg_hist"])
+            ranking = curve_metrics(*curve)
+        
+        summary = confusion_metrics(totals["tp"], totals["tn"], totals["fp"], totals["fn"])
+        summary.update(ranking)
+        summary["log_loss"] = totals["log_loss_sum"] / n if n > 0 else 0.0
+        summary["samples_evaluated"] = int(n)
+        return summary
+    
+    def calibration_report(self):
+        import numpy as np
+        
+        count, sum_p, sum_y = self.calibration
+        n = count.sum()
+        mean_p = np.divide(sum_p, count, out=np.zeros_like(sum_p), where=count > 0)
+        observed = np.divide(sum_y, count, out=np.zeros_like(sum_y), where=count > 0)
+        edges = np.linspace(0, 1, self.calibration_bins + 1)
+        return {
+            "bins": [
+                {"lower": float(edges[i]), "upper": float(edges[i + 1]), "count": int(count[i]),
+                 "mean_predicted": float(mean_p[i]), "observed_rate": float(observed[i])}
+                for i in range(self.calibration_bins)
+            ],
+            "expected_calibration_error": float(np.sum(count / n * np.abs(mean_p - observed))) if n else 0.0
+        }
+    
+    def result(self, ranking=None, slice_curves=None):
+        """
+        Flat headline metrics (what ConditionStep reads) plus threshold sweep,
+        calibration and per-slice breakdowns; ranking (curve_metrics() output)
+        and slice_curves ({name: {value: curve}}) replace the histograms
+        """
+        slice_curves = slice_curves or {}
+        metrics = self._summary(self.totals, ranking=ranking)
+        sweep = metrics.pop("threshold_sweep")
+        samples = metrics.pop("samples_evaluated")
+        
+        metrics["samples_evaluated"] = samples
+        metrics["threshold_sweep"] = sweep
+        metrics["calibration"] = self.calibration_report()
+        metrics["slices"] = {
+            name: {str(value): {k: v for k, v in self._summary(totals, slice_curves.get(name, {}).get(value)).items()
+                                if k != "threshold_sweep"}
+                   for value, totals in sorted(values.items())}
+            for name, values in self.slices.items()
+        }
+        return metrics
+
+def read_model_member(model_path):
+    """
+    Stream model.tar.gz and return (name, bytes) of the first model member,
+    without extracting anything to disk or reading the archive twice
+    """
+    with tarfile.open(model_path, mode='r|*') as tar:
+        for member in tar:
+            print(f"     - {member.name} ({member.size} bytes)")
+            if member.isfile() and os.path.basename(member.name) in MODEL_MEMBER_NAMES:
+                return member.name, tar.extractfile(member).read()
+    raise FileNotFoundError(f"No model file ({', '.join(MODEL_MEMBER_NAMES)}) in {model_path}")
+
+def detect_model_format(header):
+    """
+    Identify a serialized model from its first bytes: UBJSON/JSON (both start
+    with '{'), pickle (protocol opcode 0x80) or XGBoost's legacy binary format
+    """
+    if header[:1] == b'\x80':
+        return 'pickle'
+    if header[:1] == b'{':
+        return 'json' if header[1:2] in (b'"', b' ', b'\n', b'\r', b'\t') else 'ubjson'
+    return 'binary'
+
+def load_model_from_bytes(model_bytes, model_format):
+    """
+    Build the model straight from the in-memory buffer
+    """
+    if model_format == 'pickle':
+        return pickle.loads(model_bytes)
+    
+    import xgboost as xgb
+    model = xgb.Booster()
+    model.load_model(bytearray(model_bytes))
+    return model
+
+def evaluate_model(model_path, test_data_path, output_path, batch_size=None):
     """
     Evaluate XGBoost model with debugging
+    
+    With batch_size set, test data is read, predicted and scored batch by
+    batch (StreamingMetrics) instead of loaded in one piece.
     """
     print("="*70)
     print("STARTING MODEL EVALUATION")
@@ -35,8 +849,8 @@ def evaluate_model(model_path, test_data_path, output_path):
     print(f"\nModel path: {model_path}")
     print(f"Test data path: {test_data_path}")
     
-    # Extract and inspect model
-    print("\n1. Extracting model...")
+    # Inspect model archive
+    print("\n1. Reading model archive...")
     
     # Check if file exists
     if not os.path.exists(model_path):
@@ -51,59 +865,30 @@ def evaluate_model(model_path, test_data_path, output_path):
         print("❌ Model file is empty!")
         sys.exit(1)
     
-    # Extract
-    with tarfile.open(model_path) as tar:
-        print(f"   Files in archive:")
-        for member in tar.getmembers():
-            print(f"     - {member.name} ({member.size} bytes)")
-        tar.extractall(path=".")
-    
-    # List extracted files
-    print(f"\n   Extracted files in current directory:")
-    for f in os.listdir("."):
-        if os.path.isfile(f):
-            size = os.path.getsize(f)
-            print(f"     - {f} ({size} bytes)")
-    
-    # Try to find the model file
-    model_file = None
-    for filename in ['xgboost-model', 'model', 'xgboost_model']:
-        if os.path.exists(filename):
-            model_file = filename
-            print(f"\n   Found model file: {model_file}")
-            break
-    
-    if not model_file:
-        print("\n❌ No model file found after extraction!")
+    # Stream just the model member into memory (no extraction to disk)
+    print(f"   Files in archive:")
+    try:
+        member_name, model_bytes = read_model_member(model_path)
+    except FileNotFoundError as e:
+        print(f"\n❌ {e}")
         sys.exit(1)
     
-    # Check model file size
-    model_size = os.path.getsize(model_file)
-    print(f"   Model file size: {model_size} bytes")
+    print(f"   Found model file: {member_name}")
+    print(f"   Model file size: {len(model_bytes)} bytes")
     
-    if model_size == 0:
+    if not model_bytes:
         print("❌ Model file is empty!")
         sys.exit(1)
     
     # Load model
     print("\n2. Loading model...")
     try:
-        with open(model_file, "rb") as f:
-            # Read first few bytes to check
-            first_bytes = f.read(20)
-            print(f"   First 20 bytes: {first_bytes}")
-            f.seek(0)  # Reset to beginning
-            
-            # Try loading as XGBoost Booster directly
-            try:
-                model = xgb.Booster()
-                model.load_model(model_file)
-                print(f"   ✓ Loaded as XGBoost Booster")
-            except:
-                # Try pickle
-                f.seek(0)
-                model = pickle.load(f)
-                print(f"   ✓ Loaded with pickle: {type(model)}")
+        model_format = detect_model_format(model_bytes[:20])
+        print(f"   First 20 bytes: {model_bytes[:20]}")
+        print(f"   Detected format: {model_format}")
+        
+        model = load_model_from_bytes(model_bytes, model_format)
+        print(f"   ✓ Loaded from memory: {type(model)}")
     except Exception as e:
         print(f"❌ Failed to load model: {e}")
         import traceback
@@ -112,60 +897,75 @@ def evaluate_model(model_path, test_data_path, output_path):
     
     # Load test data
     print("\n3. Loading test data...")
-    if has_pandas:
-        test_data = pd.read_csv(test_data_path, header=None)
-        y_test = test_data.iloc[:, 0].values
-        X_test = test_data.iloc[:, 1:].values
-    else:
-        test_data = np.genfromtxt(test_data_path, delimiter=',')
-        y_test = test_data[:, 0].astype(int)
-        X_test = test_data[:, 1:]
-    
-    print(f"   Test shape: {X_test.shape}")
-    print(f"   Labels shape: {y_test.shape}")
+    test_files = list_test_files(test_data_path)
+    print(f"   Test files: {len(test_files)}")
     
-    # Make predictions
-    print("\n4. Making predictions...")
-    dtest = xgb.DMatrix(X_test)
-    
-    # Check if model is Booster or needs different method
-    if isinstance(model, xgb.Booster):
-        predictions_proba = model.predict(dtest)
-    else:
-        predictions_proba = model.predict(dtest)
-    
-    predictions = (predictions_proba > 0.5).astype(int)
-    print(f"   ✓ Predictions made: {predictions.shape}")
-    
-    # Calculate metrics
-    print("\n5. Calculating metrics...")
-    if has_sklearn:
-        accuracy = accuracy_score(y_test, predictions)
-        precision = precision_score(y_test, predictions, zero_division=0)
-        recall = recall_score(y_test, predictions, zero_division=0)
-        f1 = f1_score(y_test, predictions, zero_division=0)
+    if batch_size:
+        # Out-of-core: predict and accumulate metrics one batch at a time
+        print(f"\n4. Streaming predictions (batch size {batch_size})...")
+        accumulator = StreamingMetrics()
+        n_batches = 0
+        for y_batch, X_batch in iter_test_batches(test_files, batch_size, has_pandas):
+            accumulator.update(y_batch, model.predict(xgb.DMatrix(X_batch)), X_batch)
+            n_batches += 1
+        print(f"   ✓ Predicted {n_batches} batches")
+        
+        print("\n5. Calculating metrics...")
+        metrics = accumulator.result()
     else:
-        tp = np.sum((predictions == 1) & (y_test == 1))
-        tn = np.sum((predictions == 0) & (y_test == 0))
-        fp = np.sum((predictions == 1) & (y_test == 0))
-        fn = np.sum((predictions == 0) & (y_test == 1))
+        y_test, X_test = load_test_data(test_files, has_pandas)
         
-        accuracy = (tp + tn) / (tp + tn + fp + fn) if (tp + tn + fp + fn) > 0 else 0
-        precision = tp / (tp + fp) if (tp + fp) > 0 else 0
-        recall = tp / (tp + fn) if (tp + fn) > 0 else 0
-        f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
-    
-    metrics = {
-        "accuracy": float(accuracy),
-        "precision": float(precision),
-        "recall": float(recall),
-        "f1_score": float(f1),
-        "samples_evaluated": int(len(y_test))
-    }
+        print(f"   Test shape: {X_test.shape}")
+        print(f"   Labels shape: {y_test.shape}")
+        
+        # Make predictions
+        print("\n4. Making predictions...")
+        dtest = xgb.DMatrix(X_test)
+        
+        # Check if model is Booster or needs different method
+        if isinstance(model, xgb.Booster):
+            predictions_proba = model.predict(dtest)
+        else:
+            predictions_proba = model.predict(dtest)
+        
+        predictions = (predictions_proba > 0.5).astype(int)
+        print(f"   ✓ Predictions made: {predictions.shape}")
+        
+        # Calculate metrics
+        print("\n5. Calculating metrics...")
+        if has_sklearn:
+            accuracy = accuracy_score(y_test, predictions)
+            precision = precision_score(y_test, predictions, zero_division=0)
+            recall = recall_score(y_test, predictions, zero_division=0)
+            f1 = f1_score(y_test, predictions, zero_division=0)
+        else:
+            tp = np.sum((predictions == 1) & (y_test == 1))
+            tn = np.sum((predictions == 0) & (y_test == 0))
+            fp = np.sum((predictions == 1) & (y_test == 0))
+            fn = np.sum((predictions == 0) & (y_test == 1))
+            
+            accuracy = (tp + tn) / (tp + tn + fp + fn) if (tp + tn + fp + fn) > 0 else 0
+            precision = tp / (tp + fp) if (tp + fp) > 0 else 0
+            recall = tp / (tp + fn) if (tp + fn) > 0 else 0
+            f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
+        
+        # Curves, calibration and slices from a single sort of the predictions
+        metrics = sorted_metrics(y_test, predictions_proba, slice_codes(X_test))
+        metrics.update({
+            "accuracy": float(accuracy),
+            "precision": float(precision),
+            "recall": float(recall),
+            "f1_score": float(f1)
+        })
     
     print("\n6. Metrics:")
     for k, v in metrics.items():
-        print(f"   {k}: {v}")
+        if not isinstance(v, dict):
+            print(f"   {k}: {v}")
+    for name, values in metrics["slices"].items():
+        for value, m in values.items():
+            print(f"   {name}={value}: accuracy={m['accuracy']:.4f} roc_auc={m['roc_auc']:.4f} "
+                  f"n={m['samples_evaluated']}")
     
     # Save metrics
     print(f"\n7. Saving to {output_path}/evaluation.json")
@@ -179,18 +979,219 @@ def evaluate_model(model_path, test_data_path, output_path):
     
     return metrics
 
+def list_model_archives(model_paths):
+    """
+    Expand model paths (archives or directories of *.tar.gz) into a sorted list
+    """
+    archives = []
+    for path in model_paths:
+        if os.path.isdir(path):
+            archives.extend(sorted(glob.glob(os.path.join(path, '**', '*.tar.gz'), recursive=True)))
+        else:
+            archives.append(path)
+    return archives
+
+def model_display_name(model_path):
+    """
+    Leaderboard name for an archive: variant-a.tar.gz -> variant-a, and
+    <job>/output/model.tar.gz -> <job>
+    """
+    parts = pathlib.PurePath(model_path).parts
+    if parts[-1] == 'model.tar.gz':
+        parents = [p for p in parts[:-1] if p != 'output']
+        if parents:
+            return parents[-1]
+    return parts[-1][:-len('.tar.gz')] if parts[-1].endswith('.tar.gz') else parts[-1]
+
+def write_shared_test_matrix(test_files, workdir, has_pandas=True):
+    """
+    Parse the test data once and save it as .npy files that every worker
+    memory-maps read-only, so N models share one copy in the page cache
+    """
+    import numpy as np
+    
+    y_test, X_test = load_test_data(test_files, has_pandas)
+    y_path = os.path.join(workdir, 'y_test.npy')
+    X_path = os.path.join(workdir, 'X_test.npy')
+    np.save(y_path, y_test)
+    # XGBoost predicts on float32 internally, so this halves the file for free
+    np.save(X_path, np.ascontiguousarray(X_test, dtype=np.float32))
+    return y_path, X_path, len(y_test)
+
+# Per-worker state set by _init_model_worker (one process per model)
+_shared_test = {}
+
+def _init_model_worker(y_path, X_path, nthread):
+    import numpy as np
+    
+    _shared_test['y'] = np.load(y_path, mmap_mode='r')
+    _shared_test['X'] = np.load(X_path, mmap_mode='r')
+    _shared_test['nthread'] = nthread
+
+def evaluate_archive(model_path, batch_size=0):
+    """
+    Score one model archive against the worker's memory-mapped test matrix.
+    Failures are returned rather than raised so one bad archive doesn't
+    sink the whole leaderboard.
+    """
+    import time
+    import numpy as np
+    import xgboost as xgb
+    
+    y_test, X_test = _shared_test['y'], _shared_test['X']
+    entry = {"name": model_display_name(model_path), "model_path": model_path}
+    
+    try:
+        start = time.perf_counter()
+        member_name, model_bytes = read_model_member(model_path)
+        model = load_model_from_bytes(model_bytes, detect_model_format(model_bytes[:20]))
+        if isinstance(model, xgb.Booster):
+            model.set_param({'nthread': _shared_test['nthread']})
+        entry["load_seconds"] = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        step = batch_size or len(y_test)
+        predictions_proba = np.concatenate([
+            model.predict(xgb.DMatrix(X_test[i:i + step])) for i in range(0, len(y_test), step)
+        ])
+        entry["predict_seconds"] = time.perf_counter() - start
+        
+        y = np.asarray(y_test)
+        entry["metrics"] = sorted_metrics(y, predictions_proba, slice_codes(X_test))
+        entry["status"] = "ok"
+    except Exception as e:
+        entry["status"] = "failed"
+        entry["error"] = f"{type(e).__name__}: {e}"
+    return entry
+
+def rank_models(entries, rank_by='roc_auc'):
+    """
+    Sort successful entries best-first by rank_by and number them
+    """
+    lower = rank_by in LOWER_IS_BETTER
+    ranked = sorted((e for e in entries if e["status"] == "ok"),
+                    key=lambda e: e["metrics"][rank_by], reverse=not lower)
+    for rank, entry in enumerate(ranked, 1):
+        entry["rank"] = rank
+    return ranked + [e for e in entries if e["status"] != "ok"]
+
+def evaluate_models(model_paths, test_data_path, output_path, batch_size=None, workers=0,
+                    rank_by='roc_auc'):
+    """
+    Evaluate several model archives concurrently against one shared test set
+    and write a combined leaderboard.
+    
+    The test data is parsed once into a memory-mapped matrix; a process pool
+    then runs one model per worker, each with an equal share of XGBoost threads.
+    """
+    import shutil
+    import tempfile
+    import time
+    from multiprocessing import Pool, cpu_count
+    
+    try:
+        import pandas as pd
+        has_pandas = True
+    except:
+        has_pandas = False
+    
+    print("="*70)
+    print("STARTING MULTI-MODEL EVALUATION")
+    print("="*70)
+    
+    archives = list_model_archives(model_paths)
+    if not archives:
+        print(f"❌ No model archives found in: {', '.join(model_paths)}")
+        sys.exit(1)
+    
+    names = [model_display_name(a) for a in archives]
+    if len(set(names)) != len(names):
+        print(f"❌ Model names must be unique, got: {', '.join(names)}")
+        sys.exit(1)
+    
+    workers = min(workers or cpu_count(), len(archives))
+    nthread = max(1, cpu_count() // workers)
+    print(f"\nModels: {len(archives)}")
+    for archive in archives:
+        print(f"   - {archive}")
+    print(f"Workers: {workers} ({nthread} XGBoost threads each)")
+    
+    print("\n1. Loading test data once...")
+    test_files = list_test_files(test_data_path)
+    workdir = tempfile.mkdtemp(prefix='shared-test-')
+    try:
+        start = time.perf_counter()
+        y_path, X_path, n_rows = write_shared_test_matrix(test_files, workdir, has_pandas)
+        load_seconds = time.perf_counter() - start
+        print(f"   ✓ {n_rows:,} rows from {len(test_files)} files in {load_seconds:.2f}s")
+        
+        print(f"\n2. Evaluating {len(archives)} models...")
+        start = time.perf_counter()
+        with Pool(processes=workers, initializer=_init_model_worker,
+                  initargs=(y_path, X_path, nthread)) as pool:
+            entries = pool.map(partial(evaluate_archive, batch_size=batch_size or 0), archives,
+                               chunksize=1)
+        wall_seconds = time.perf_counter() - start
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    entries = rank_models(entries, rank_by)
+    
+    print(f"\n3. Leaderboard (ranked by {rank_by}):")
+    print(f"   {'#':>3}  {'Model':<30}{'ROC-AUC':>9}{'PR-AUC':>9}{'Accuracy':>10}{'Log-loss':>10}{'Predict (s)':>13}")
+    for entry in entries:
+        if entry["status"] != "ok":
+            print(f"   {'-':>3}  {entry['name']:<30}FAILED: {entry['error']}")
+            continue
+        m = entry["metrics"]
+        print(f"   {entry['rank']:>3}  {entry['name']:<30}{m['roc_auc']:>9.4f}{m['pr_auc']:>9.4f}"
+              f"{m['accuracy']:>10.4f}{m['log_loss']:>10.4f}{entry['predict_seconds']:>13.2f}")
+    
+    leaderboard = {
+        "ranked_by": rank_by,
+        "test_files": test_files,
+        "samples_evaluated": n_rows,
+        "workers": workers,
+        "test_data_load_seconds": load_seconds,
+        "wall_seconds": wall_seconds,
+        "models": entries
+    }
+    
+    print(f"\n4. Saving to {output_path}/{LEADERBOARD_FILE}")
+    pathlib.Path(output_path).mkdir(parents=True, exist_ok=True)
+    with open(os.path.join(output_path, LEADERBOARD_FILE), "w") as f:
+        json.dump(leaderboard, f, indent=2)
+    
+    print("\n" + "="*70)
+    print(f"✅ EVALUATED {sum(e['status'] == 'ok' for e in entries)}/{len(entries)} MODELS "
+          f"IN {wall_seconds:.1f}s")
+    print("="*70)
+    
+    return leaderboard
+
 if __name__ == '__main__':
     import argparse
     
     parser = argparse.ArgumentParser()
-    parser.add_argument('--model-path', type=str, default='/opt/ml/processing/model/model.tar.gz')
+    parser.add_argument('--model-path', type=str, nargs='+', default=['/opt/ml/processing/model/model.tar.gz'],
+                        help='One archive, or several archives/directories for a leaderboard')
     parser.add_argument('--test-data-path', type=str, default='/opt/ml/processing/test/validation.csv')
     parser.add_argument('--output-path', type=str, default='/opt/ml/processing/evaluation')
+    parser.add_argument('--batch-size', type=int, default=0,
+                        help='Evaluate in batches of this many rows (0 = load everything at once)')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Parallel models in leaderboard mode (0 = one per CPU)')
+    parser.add_argument('--rank-by', type=str, default='roc_auc',
+                        choices=['roc_auc', 'pr_auc', 'accuracy', 'f1_score', 'best_f1', 'log_loss'])
     
     args = parser.parse_args()
     
     try:
-        evaluate_model(args.model_path, args.test_data_path, args.output_path)
+        if len(args.model_path) == 1 and not os.path.isdir(args.model_path[0]):
+            evaluate_model(args.model_path[0], args.test_data_path, args.output_path, args.batch_size)
+        else:
+            evaluate_models(args.model_path, args.test_data_path, args.output_path,
+                            args.batch_size, args.workers, args.rank_by)
     except Exception as e:
         print(f"\n{'='*70}")
         print(f"❌ ERROR: {e}")
@@ -0,0 +1,428 @@
+"""
+Watch many pipeline executions from one process
+
+Shared by run_pipeline.py and monitor_pipeline.py. Instead of a fixed sleep
+plus describe + list-steps per execution per cycle, the watcher:
+
+- gets the status of every watched execution of a pipeline from one paged
+  list_pipeline_executions call per cycle
+- lists steps only for executions that changed or whose backoff is due
+- backs off adaptively: fast right after a change, slower with every quiet
+  poll
+- optionally consumes EventBridge-style state-change events from a local
+  queue, waking up immediately instead of waiting for the next poll
+- keeps going through failed describe/list calls, backing off the same way
+"""
+import asyncio
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+TERMINAL_STATUSES = {'Succeeded', 'Failed', 'Stopped'}
+
+# EventBridge detail-types SageMaker Pipelines emits
+EXECUTION_STATUS_EVENT = "SageMaker Model Building Pipeline Execution Status Change"
+STEP_STATUS_EVENT = "SageMaker Model Building Pipeline Execution Step Status Change"
+
+def execution_status_event(execution_arn, status, previous_status=None):
+    return {"detail-type": EXECUTION_STATUS_EVENT,
+            "detail": {"pipelineExecutionArn": execution_arn,
+                       "currentPipelineExecutionStatus": status,
+                       "previousPipelineExecutionStatus": previous_status}}
+
+def step_status_event(execution_arn, step_name, status, previous_status=None, start_time=None,
+                      end_time=None, failure_reason=None):
+    detail = {"pipelineExecutionArn": execution_arn, "stepName": step_name,
+              "currentStepStatus": status, "previousStepStatus": previous_status}
+    if start_time:
+        detail["stepStartTime"] = start_time
+    if end_time:
+        detail["stepEndTime"] = end_time
+    if failure_reason:
+        detail["failureReason"] = failure_reason
+    return {"detail-type": STEP_STATUS_EVENT, "detail": detail}
+
+def parse_time(value):
+    """
+    Step times arrive as datetimes from boto3 and as ISO strings in events
+    """
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+class AdaptiveBackoff:
+    """
+    Polling interval policy for one execution.
+
+    After a change, polling restarts at min_interval and grows by `factor` per
+    quiet poll up to max_interval.
+    """
+
+    def __init__(self, min_interval=2.0, max_interval=60.0, factor=1.5):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.factor = factor
+
+    def next_interval(self, execution, changed):
+        if changed or execution.interval is None:
+            return self.min_interval
+        return min(self.max_interval, execution.interval * self.factor)
+
+class WatchedExecution:
+    """
+    Latest known state of one execution
+    """
+
+    def __init__(self, execution_arn):
+        self.arn = execution_arn
+        self.pipeline_name = execution_arn.split('/')[-3]
+        self.name = execution_arn.split('/')[-1]
+        self.status = None
+        self.steps = {}        # step name -> step summary (list_pipeline_execution_steps shape)
+        self.interval = None   # current polling interval (seconds)
+        self.next_poll = 0.0   # monotonic time the steps are next listed
+        self.needs_final_listing = False
+
+    @property
+    def done(self):
+        return self.status in TERMINAL_STATUSES and not self.needs_final_listing
+
+    def ordered_steps(self):
+        """
+        Steps in start order (the API lists newest first)
+        """
+        return sorted(self.steps.values(),
+                      key=lambda s: parse_time(s.get('StartTime')) or datetime.max.replace(tzinfo=timezone.utc))
+
+    def apply_steps(self, steps):
+        """
+        Replace the step table, returning ('step', name, old, new) changes
+        """
+        changes = []
+        for step in steps:
+            old = self.steps.get(step['StepName'], {}).get('StepStatus')
+            if old != step.get('StepStatus'):
+                changes.append(('step', step['StepName'], old, step.get('StepStatus')))
+            self.steps[step['StepName']] = step
+        return changes
+
+    def apply_status(self, status):
+        if status == self.status:
+            return []
+        change = [('execution', None, self.status, status)]
+        self.status = status
+        if status in TERMINAL_STATUSES:
+            # One more step listing picks up FailureReason/Metadata
+            self.needs_final_listing = True
+        return change
+
+class ExecutionWatcher:
+    """
+    Track any number of pipeline executions with batched, adaptive polling
+    and/or pushed events.
+
+    on_change(execution, changes) is called with the WatchedExecution and a
+    list of ('execution' | 'step', step name, old status, new status).
+    """
+
+    def __init__(self, sm_client=None, backoff=None, event_queue=None, max_workers=8,
+                 event_poll_interval=120.0):
+        self.sm_client = sm_client
+        self.backoff = backoff or AdaptiveBackoff()
+        self.event_queue = event_queue
+        # With events as the primary source, polling is only a safety net
+        self.event_poll_interval = event_poll_interval
+        self.max_workers = max_workers
+        self.executions = {}
+        self.api_calls = 0
+
+    def watch(self, execution_arn):
+        if execution_arn not in self.executions:
+            self.executions[execution_arn] = WatchedExecution(execution_arn)
+        return self.executions[execution_arn]
+
+    @property
+    def active(self):
+        return [e for e in self.executions.values() if not e.done]
+
+    def _list_statuses(self, pipeline_name, wanted):
+        """
+        Status of every wanted execution of one pipeline, paging through
+        list_pipeline_executions (newest first) only until all are found
+        """
+        statuses = {}
+        paginator = self.sm_client.get_paginator('list_pipeline_executions')
+        pages = paginator.paginate(PipelineName=pipeline_name, SortBy='CreationTime',
+                                   SortOrder='Descending', PaginationConfig={'PageSize': 100})
+        for page in pages:
+            self.api_calls += 1
+            for summary in page['PipelineExecutionSummaries']:
+                if summary['PipelineExecutionArn'] in wanted:
+                    statuses[summary['PipelineExecutionArn']] = summary['PipelineExecutionStatus']
+            if len(statuses) == len(wanted):
+                break
+
+        # Anything not listed (e.g. another account's pipeline) falls back to describe
+        for arn in wanted - set(statuses):
+            self.api_calls += 1
+            statuses[arn] = self.sm_client.describe_pipeline_execution(
+                PipelineExecutionArn=arn)['PipelineExecutionStatus']
+        return statuses
+
+    def _list_steps(self, execution_arn):
+        steps = []
+        paginator = self.sm_client.get_paginator('list_pipeline_execution_steps')
+        for page in paginator.paginate(PipelineExecutionArn=execution_arn):
+            self.api_calls += 1
+            steps.extend(page['PipelineExecutionSteps'])
+        return steps
+
+    def _schedule(self, execution, changed):
+        execution.interval = self.backoff.next_interval(execution, changed)
+        if self.event_queue is not None and not changed:
+            execution.interval = max(execution.interval, self.event_poll_interval)
+        execution.next_poll = time.monotonic() + execution.interval
+
+    def _plan_cycle(self, force=False):
+        """
+        Pick the executions whose backoff is due and group every active
+        execution of their pipelines for the status listing
+        """
+        # Pull in executions due within half their interval, so staggered
+        # schedules coalesce into shared cycles instead of one cycle each
+        now = time.monotonic()
+        due = {e.arn for e in self.active
+               if force or e.next_poll <= now + 0.5 * (e.interval or 0)}
+
+        # The status listing covers every active execution of a pipeline for
+        # free, so executions that changed get their steps listed early too
+        pipelines = {self.executions[arn].pipeline_name for arn in due}
+        by_pipeline = {}
+        for execution in self.active:
+            if execution.pipeline_name in pipelines:
+                by_pipeline.setdefault(execution.pipeline_name, set()).add(execution.arn)
+        return due, by_pipeline
+
+    def _apply_statuses(self, status_maps, due):
+        """
+        Apply listed statuses; returns per-execution changes and the
+        executions whose steps need listing this cycle
+        """
+        changes = {}
+        for statuses in status_maps:
+            for arn, status in statuses.items():
+                changes[arn] = self.executions[arn].apply_status(status)
+        listed = [self.executions[arn] for arn, c in changes.items() if c or arn in due]
+        return changes, listed
+
+    def _apply_steps(self, listed, changes, listings, on_change):
+        for execution, steps in zip(listed, listings):
+            execution_changes = changes[execution.arn] + execution.apply_steps(steps)
+            if execution.status in TERMINAL_STATUSES:
+                execution.needs_final_listing = False
+            self._schedule(execution, bool(execution_changes))
+            if execution_changes and on_change:
+                on_change(execution, execution_changes)
+
+    def poll(self, on_change=None, force=False):
+        """
+        One polling cycle over every execution whose backoff is due
+        """
+        if self.sm_client is None:
+            return
+        due, by_pipeline = self._plan_cycle(force)
+        if not due:
+            return
+
+        changes, listed = self._apply_statuses(
+            [self._list_statuses(name, wanted) for name, wanted in by_pipeline.items()], due)
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                listings = list(pool.map(lambda e: self._list_steps(e.arn), listed))
+        except Exception:
+            self._revert_statuses(changes)
+            raise
+        self._apply_steps(listed, changes, listings, on_change)
+    
+    def _revert_statuses(self, changes):
+        """
+        Undo status changes whose step listing failed, so the next successful
+        poll reports them again
+        """
+        for arn, execution_changes in changes.items():
+            if execution_changes:
+                execution = self.executions[arn]
+                execution.status = execution_changes[0][2]
+                execution.needs_final_listing = False
+    
+    def _poll_failed(self, error):
+        """
+        A failed describe/list call costs one cycle, not the whole watch:
+        report it and back every execution off as after a quiet poll
+        """
+        print(f"❌ Polling failed (retrying with backoff): {error}")
+        for execution in self.active:
+            self._schedule(execution, False)
+
+    def handle_event(self, event, on_change=None):
+        """
+        Apply one EventBridge-style status-change event to a watched execution
+        """
+        detail = event.get('detail', {})
+        execution = self.executions.get(detail.get('pipelineExecutionArn'))
+        if execution is None:
+            return
+
+        if event.get('detail-type') == EXECUTION_STATUS_EVENT:
+            changes = execution.apply_status(detail['currentPipelineExecutionStatus'])
+            if self.sm_client is None:
+                execution.needs_final_listing = False
+        elif event.get('detail-type') == STEP_STATUS_EVENT:
+            step = dict(execution.steps.get(detail['stepName'], {}), StepName=detail['stepName'],
+                        StepStatus=detail['currentStepStatus'])
+            for key, field in (('stepStartTime', 'StartTime'), ('stepEndTime', 'EndTime'),
+                               ('failureReason', 'FailureReason')):
+                if key in detail:
+                    step[field] = parse_time(detail[key]) if key != 'failureReason' else detail[key]
+            changes = execution.apply_steps([step])
+        else:
+            return
+
+        if changes:
+            if execution.needs_final_listing:
+                execution.next_poll = 0.0
+            if on_change:
+                on_change(execution, changes)
+
+    def _wait(self, timeout, on_change):
+        """
+        Sleep until the next poll is due, handling any events that arrive meanwhile
+        """
+        deadline = time.monotonic() + max(0.0, timeout)
+        while True:
+            remaining = deadline - time.monotonic()
+            if self.event_queue is None:
+                time.sleep(max(0.0, remaining))
+                return
+            try:
+                event = self.event_queue.get(timeout=max(0.0, remaining))
+            except queue.Empty:
+                return
+            self.handle_event(event, on_change)
+            if not self.active:
+                return
+            # An event can make a poll due sooner (e.g. the final listing after a terminal status)
+            deadline = min(deadline, time.monotonic() + self._seconds_to_next_poll())
+
+    def _seconds_to_next_poll(self):
+        if self.sm_client is None:
+            return self.event_poll_interval
+        return min(e.next_poll for e in self.active) - time.monotonic()
+
+    def run(self, on_change=None, timeout=None):
+        """
+        Watch until every execution reaches a terminal status (or timeout seconds pass)
+        """
+        start = time.monotonic()
+        force = True
+        while True:
+            try:
+                self.poll(on_change, force=force)
+            except Exception as e:
+                self._poll_failed(e)
+            force = False
+            if not self.active or (timeout is not None and time.monotonic() - start > timeout):
+                break
+            self._wait(self._seconds_to_next_poll(), on_change)
+        return self.executions
+
+class AsyncExecutionWatcher(ExecutionWatcher):
+    """
+    asyncio flavour of ExecutionWatcher for dashboards that track many
+    executions without blocking.
+
+    boto3 calls run in worker threads, at most max_concurrent_calls at a
+    time, and concurrent requests for the same listing (same pipeline's
+    statuses, same execution's steps) share one in-flight call.
+    """
+
+    def __init__(self, sm_client=None, backoff=None, event_queue=None, max_concurrent_calls=8,
+                 event_poll_interval=120.0):
+        super().__init__(sm_client, backoff, event_queue, max_concurrent_calls, event_poll_interval)
+        self._semaphore = None
+        self._inflight = {}
+
+    async def _call(self, key, fn, *args):
+        if key in self._inflight:
+            return await self._inflight[key]
+
+        async def bounded():
+            async with self._semaphore:
+                return await asyncio.to_thread(fn, *args)
+
+        task = asyncio.ensure_future(bounded())
+        self._inflight[key] = task
+        try:
+            return await task
+        finally:
+            self._inflight.pop(key, None)
+
+    async def poll_async(self, on_change=None, force=False):
+        if self.sm_client is None:
+            return
+        due, by_pipeline = self._plan_cycle(force)
+        if not due:
+            return
+
+        status_maps = await asyncio.gather(*[
+            self._call(('statuses', name), self._list_statuses, name, wanted)
+            for name, wanted in by_pipeline.items()
+        ])
+        changes, listed = self._apply_statuses(status_maps, due)
+        try:
+            listings = await asyncio.gather(*[
+                self._call(('steps', e.arn), self._list_steps, e.arn) for e in listed
+            ])
+        except Exception:
+            self._revert_statuses(changes)
+            raise
+        self._apply_steps(listed, changes, listings, on_change)
+
+    async def _wait_async(self, timeout, on_change):
+        deadline = time.monotonic() + max(0.0, timeout)
+        while True:
+            remaining = deadline - time.monotonic()
+            if self.event_queue is None:
+                await asyncio.sleep(max(0.0, remaining))
+                return
+            try:
+                event = await asyncio.to_thread(self.event_queue.get, True, max(0.0, remaining))
+            except queue.Empty:
+                return
+            self.handle_event(event, on_change)
+            if not self.active:
+                return
+            # An event can make a poll due sooner (e.g. the final listing after a terminal status)
+            deadline = min(deadline, time.monotonic() + self._seconds_to_next_poll())
+
+    async def run_async(self, on_change=None, on_cycle=None, timeout=None):
+        """
+        Watch until every execution is terminal; on_cycle(watcher) runs after
+        every poll (e.g. to redraw a status table)
+        """
+        self._semaphore = asyncio.Semaphore(self.max_workers)
+        start = time.monotonic()
+        force = True
+        while True:
+            try:
+                await self.poll_async(on_change, force=force)
+            except Exception as e:
+                self._poll_failed(e)
+            force = False
+            if on_cycle:
+                on_cycle(self)
+            if not self.active or (timeout is not None and time.monotonic() - start > timeout):
+                break
+            await self._wait_async(self._seconds_to_next_poll(), on_change)
+        return self.executions
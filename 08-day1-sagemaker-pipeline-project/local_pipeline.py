@@ -0,0 +1,541 @@
+"""
+Run the pipeline DAG locally - seconds per iteration instead of 15-20 minutes
+
+Executes the same steps as create_pipeline.py (from pipeline_dag.py) against a
+local directory that stands in for S3: processing steps run their scripts in
+subprocesses, training uses local XGBoost, and independent steps run in
+parallel. Outputs of steps marked cache=True are cached by a hash of the
+step's code, arguments and upstream outputs, so unchanged steps are skipped on
+reruns until the entry is older than the cache expiry (like CacheConfig).
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tarfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timezone
+
+from execution_watcher import execution_status_event, step_status_event
+from pipeline_dag import (PIPELINE_NAME, PARAMETERS, CACHE_EXPIRE_AFTER, ConditionSpec, ProcessingSpec,
+                          RegisterSpec, TrainingSpec, TuningSpec, all_steps, branch_owners, cache_expiry,
+                          dag_dependencies, processing_arguments, resolve_argument)
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STORE = os.path.join(PROJECT_DIR, 'local-s3')
+
+# Bump to invalidate every cached step (e.g. when the executor itself changes)
+EXECUTOR_VERSION = 1
+STEP_META_FILE = 'step.json'
+
+# Where a finished step's outputs live: cache key + output name -> directory
+StepResult = namedtuple('StepResult', ['key', 'outputs'])
+
+PARAMETER_CASTS = {"String": str, "Float": float, "Integer": int}
+
+def resolve_parameters(overrides=None):
+    """
+    Pipeline parameter values: defaults from pipeline_dag.PARAMETERS, then
+    Name=Value overrides (like PipelineParameters in start_pipeline_execution)
+    """
+    parameters = {name: default for name, (_, default) in PARAMETERS.items()}
+    for name, value in (overrides or {}).items():
+        if name not in PARAMETERS:
+            raise ValueError(f"Unknown pipeline parameter: {name} (expected one of {', '.join(PARAMETERS)})")
+        parameters[name] = PARAMETER_CASTS[PARAMETERS[name][0]](value)
+    return parameters
+
+def file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def step_code_digest(spec):
+    """
+    Hash of the code a step runs: its script, or for training the local
+    trainers plus the readers they borrow from evaluate.py and the XGBoost version
+    """
+    if isinstance(spec, ProcessingSpec):
+        return file_digest(os.path.join(PROJECT_DIR, spec.code))
+    import xgboost as xgb
+    return hashlib.sha256(''.join([
+        file_digest(os.path.abspath(__file__)),
+        file_digest(os.path.join(PROJECT_DIR, 'distributed_train.py')),
+        file_digest(os.path.join(PROJECT_DIR, 'local_tuning.py')),
+        file_digest(os.path.join(PROJECT_DIR, 'evaluate.py')),
+        xgb.__version__
+    ]).encode()).hexdigest()
+
+def step_cache_key(spec, parameters, upstream):
+    """
+    Content address of a step's outputs: code + resolved arguments/hyperparameters
+    + the cache keys of the upstream outputs it reads. Upstream keys already
+    cover everything that produced those outputs, so no data is re-hashed.
+    """
+    if isinstance(spec, ProcessingSpec):
+        settings = [str(resolve_argument(a, parameters)) for a in spec.arguments]
+        settings.append(f"instance_count={resolve_argument(spec.instance_count, parameters)}")
+        sources = [c.source for c in spec.inputs if c.source]
+    else:
+        settings = dict(spec.hyperparameters,
+                        instance_count=resolve_argument(spec.instance_count, parameters))
+        if isinstance(spec, TuningSpec):
+            settings.update(ranges={name: list(r) for name, r in spec.ranges.items()},
+                            objective=[spec.objective_metric, spec.objective_type], strategy=spec.strategy,
+                            max_jobs=resolve_argument(spec.max_jobs, parameters),
+                            max_parallel_jobs=resolve_argument(spec.max_parallel_jobs, parameters))
+        sources = list(spec.channels.values())
+    payload = {
+        "executor_version": EXECUTOR_VERSION,
+        "step": spec.name,
+        "code": step_code_digest(spec),
+        "settings": settings,
+        "inputs": [[s.step, s.output, upstream[s.step].key] for s in sources],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:16]
+
+def output_names(spec):
+    if isinstance(spec, ProcessingSpec):
+        return [c.name for c in spec.outputs]
+    return ['model']
+
+class LocalStepStore:
+    """
+    Local stand-in for the pipeline's S3 prefix, keyed like a cache:
+    <root>/<pipeline>/<step>/<cache key>/<output>/... plus step.json, which is
+    written last and marks the entry complete
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def step_dir(self, step_name, key):
+        return os.path.join(self.root, PIPELINE_NAME, step_name, key)
+
+    def get_meta(self, step_name, key):
+        path = os.path.join(self.step_dir(step_name, key), STEP_META_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def begin(self, step_name, key, outputs):
+        """
+        Fresh scratch directory (one per run and thread) with an empty dir per output
+        """
+        tmp = f"{self.step_dir(step_name, key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        for name in outputs:
+            os.makedirs(os.path.join(tmp, name))
+        return tmp
+
+    def commit(self, step_name, key, tmp, meta):
+        with open(os.path.join(tmp, STEP_META_FILE), 'w') as f:
+            json.dump(meta, f, indent=2)
+        final = self.step_dir(step_name, key)
+        if os.path.exists(final):
+            # An identical step finished first (concurrent runs); keep that one
+            shutil.rmtree(tmp)
+        else:
+            os.rename(tmp, final)
+        return final
+
+    def output_dirs(self, step_name, key, outputs):
+        return {name: os.path.join(self.step_dir(step_name, key), name) for name in outputs}
+
+    def save_execution(self, execution):
+        path = os.path.join(self.root, 'executions', f"{execution['PipelineExecutionId']}.json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(execution, f, indent=2)
+        return path
+
+    def get_tuning_best(self, step_name):
+        """
+        Best hyperparameters of the last local search for this step (warm start)
+        """
+        path = os.path.join(self.root, 'tuning', step_name, 'best.json')
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def save_tuning_best(self, step_name, best):
+        path = os.path.join(self.root, 'tuning', step_name, 'best.json')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(best, f, indent=2)
+
+    def register_model(self, group, package):
+        """
+        Local model registry: <root>/model-registry/<group>/<version>.json
+        """
+        group_dir = os.path.join(self.root, 'model-registry', group)
+        os.makedirs(group_dir, exist_ok=True)
+        version = len([f for f in os.listdir(group_dir) if f.endswith('.json')]) + 1
+        package = dict(package, ModelPackageVersion=version)
+        with open(os.path.join(group_dir, f"{version}.json"), 'w') as f:
+            json.dump(package, f, indent=2)
+        return package
+
+def run_processing(spec, tmp, upstream, parameters):
+    """
+    Run a processing script in a subprocess with every channel flag pointed at
+    local directories instead of /opt/ml/processing/...
+    
+    With instance_count > 1 one subprocess per host runs at once, each with
+    its own resourceconfig.json (as on a multi-instance processing job),
+    writing into the same output directories.
+    """
+    def channel_path(channel):
+        if channel.source:
+            return upstream[channel.source.step].outputs[channel.source.output]
+        return os.path.join(tmp, channel.name)
+
+    arguments = processing_arguments(spec, {k: str(v) for k, v in parameters.items()}, channel_path)
+    hosts = [f"algo-{i + 1}" for i in range(int(resolve_argument(spec.instance_count, parameters)))]
+
+    jobs = []
+    for host in hosts:
+        env = dict(os.environ)
+        log_path = os.path.join(tmp, 'logs.txt' if len(hosts) == 1 else f"logs-{host}.txt")
+        if len(hosts) > 1:
+            config_path = os.path.join(tmp, 'hosts', host, 'resourceconfig.json')
+            os.makedirs(os.path.dirname(config_path))
+            with open(config_path, 'w') as f:
+                json.dump({"current_host": host, "hosts": hosts}, f)
+            env['PROCESSING_RESOURCE_CONFIG'] = config_path
+        with open(log_path, 'w') as log:
+            process = subprocess.Popen([sys.executable, os.path.join(PROJECT_DIR, spec.code)] + arguments,
+                                       cwd=tmp, env=env, stdout=log, stderr=subprocess.STDOUT)
+        jobs.append((host, process, log_path))
+
+    for host, process, log_path in jobs:
+        if process.wait() != 0:
+            for _, other, _ in jobs:
+                other.kill()
+            with open(log_path) as f:
+                tail = ''.join(f.readlines()[-20:])
+            where = f" on {host}" if len(hosts) > 1 else ""
+            raise RuntimeError(f"{spec.code} exited with {process.returncode}{where}:\n{tail}")
+
+def train_model(spec, tmp, upstream, parameters):
+    """
+    Local stand-in for the built-in XGBoost container: read the train and
+    validation channels (any preprocess.py format), train with the step's
+    hyperparameters and write model.tar.gz with an `xgboost-model` member.
+    
+    With instance_count > 1 training runs in that many local processes, each
+    on its own train part files (see distributed_train.py).
+    """
+    import xgboost as xgb
+    from evaluate import list_test_files, load_test_data
+
+    channel_files = {
+        name: list_test_files(upstream[source.step].outputs[source.output])
+        for name, source in spec.channels.items()
+    }
+    instance_count = int(resolve_argument(spec.instance_count, parameters))
+
+    if instance_count > 1:
+        from distributed_train import train_distributed
+        model_bytes, _ = train_distributed(channel_files['train'], channel_files.get('validation'),
+                                           spec.hyperparameters, instance_count)
+    else:
+        dmatrices = {}
+        for name, files in channel_files.items():
+            y, X = load_test_data(files)
+            dmatrices[name] = xgb.DMatrix(X, label=y)
+
+        params = dict(spec.hyperparameters)
+        num_round = int(params.pop('num_round'))
+        evals = [(dmatrix, name) for name, dmatrix in dmatrices.items()]
+        booster = xgb.train(params, dmatrices['train'], num_round, evals=evals, verbose_eval=False)
+        model_bytes = bytes(booster.save_raw(raw_format='ubj'))
+
+    write_model_archive(os.path.join(tmp, 'model', 'model.tar.gz'), model_bytes)
+
+def write_model_archive(path, model_bytes):
+    with tarfile.open(path, 'w:gz') as tar:
+        member = tarfile.TarInfo('xgboost-model')
+        member.size = len(model_bytes)
+        tar.addfile(member, io.BytesIO(model_bytes))
+
+def tune_model(spec, tmp, upstream, parameters, store):
+    """
+    Local stand-in for a tuning job (see local_tuning.py): parallel trials on
+    the train/validation channels, warm-started from the store's previous
+    best; the best trial's model is the step's model.tar.gz and every trial
+    is listed in tuning.json
+    """
+    import xgboost as xgb
+    from evaluate import list_test_files, load_test_data
+    from local_tuning import LocalTuner
+
+    dmatrices = {}
+    for name in ['train'] + [n for n in spec.channels if n != 'train']:
+        source = spec.channels[name]
+        y, X = load_test_data(list_test_files(upstream[source.step].outputs[source.output]))
+        # Binned once, shared read-only by every trial
+        dmatrices[name] = xgb.QuantileDMatrix(X, label=y, ref=dmatrices.get('train'))
+
+    previous = store.get_tuning_best(spec.name)
+    tuner = LocalTuner(dmatrices['train'], [(d, name) for name, d in dmatrices.items()],
+                       spec.hyperparameters, spec.ranges, spec.objective_metric, spec.objective_type,
+                       spec.strategy, int(resolve_argument(spec.max_jobs, parameters)),
+                       int(resolve_argument(spec.max_parallel_jobs, parameters)),
+                       warm_start=previous and previous['hyperparameters'])
+    best = tuner.run()
+
+    write_model_archive(os.path.join(tmp, 'model', 'model.tar.gz'),
+                        bytes(best['booster'].save_raw(raw_format='ubj')))
+    report = tuner.report()
+    with open(os.path.join(tmp, 'tuning.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+    store.save_tuning_best(spec.name, {"hyperparameters": best['hyperparameters'],
+                                       "objective": best['objective'],
+                                       "created": datetime.now(timezone.utc).isoformat()})
+    print(f"   {spec.name}: best {spec.objective_metric}={best['objective']:.4f} from trial {best['trial']} "
+          f"({len(report['trials'])} trials, {report['stopped_early']} stopped early)")
+
+def cache_entry_valid(meta, expire_after=CACHE_EXPIRE_AFTER):
+    """
+    A committed entry is reusable until it is older than expire_after
+    """
+    if meta is None:
+        return False
+    age = datetime.now(timezone.utc) - datetime.fromisoformat(meta["created"])
+    return age <= cache_expiry(expire_after)
+
+def run_cached_step(spec, store, upstream, parameters, use_cache=True, expire_after=CACHE_EXPIRE_AFTER):
+    """
+    Processing/training/tuning step: reuse the cached outputs for this cache key
+    (steps with cache=True, entries younger than expire_after), or run the
+    step into a scratch directory and commit it to the store
+    """
+    key = step_cache_key(spec, parameters, upstream)
+    outputs = output_names(spec)
+    use_cache = use_cache and spec.cache
+
+    if use_cache and cache_entry_valid(store.get_meta(spec.name, key), expire_after):
+        return StepResult(key, store.output_dirs(spec.name, key, outputs)), True
+
+    tmp = store.begin(spec.name, key, outputs)
+    try:
+        if isinstance(spec, ProcessingSpec):
+            run_processing(spec, tmp, upstream, parameters)
+        elif isinstance(spec, TuningSpec):
+            tune_model(spec, tmp, upstream, parameters, store)
+        else:
+            train_model(spec, tmp, upstream, parameters)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    # Replace a bypassed or expired entry
+    shutil.rmtree(store.step_dir(spec.name, key), ignore_errors=True)
+    store.commit(spec.name, key, tmp, {"step": spec.name, "key": key,
+                                       "created": datetime.now(timezone.utc).isoformat()})
+    return StepResult(key, store.output_dirs(spec.name, key, outputs)), False
+
+def property_file_path(spec_by_name, step_name, upstream):
+    spec = spec_by_name[step_name]
+    output_dir = upstream[step_name].outputs[spec.property_file.output]
+    return os.path.join(output_dir, spec.property_file.path)
+
+def evaluate_conditions(spec, spec_by_name, upstream, parameters):
+    """
+    JsonGet + ConditionGreaterThanOrEqualTo against the upstream property files
+    """
+    outcome = True
+    for condition in spec.conditions:
+        with open(property_file_path(spec_by_name, condition.step, upstream)) as f:
+            value = json.load(f)[condition.json_path]
+        threshold = resolve_argument(condition.threshold, parameters)
+        passed = value >= threshold
+        print(f"   {spec.name}: {condition.json_path}={value:.4f} >= {threshold} -> {passed}")
+        outcome = outcome and passed
+    return outcome
+
+def register_model(spec, store, upstream):
+    model_dir = upstream[spec.model.step].outputs[spec.model.output]
+    metrics_dir = upstream[spec.metrics.step].outputs[spec.metrics.output]
+    return store.register_model(spec.model_package_group, {
+        "ModelPackageGroupName": spec.model_package_group,
+        "ModelDataUrl": os.path.join(model_dir, 'model.tar.gz'),
+        "ModelMetrics": os.path.join(metrics_dir, 'evaluation.json'),
+        "ModelApprovalStatus": "PendingManualApproval",
+        "CreationTime": datetime.now(timezone.utc).isoformat()
+    })
+
+def local_execution_arn(execution_id):
+    return f"arn:aws:sagemaker:local:000000000000:pipeline/{PIPELINE_NAME.lower()}/execution/{execution_id}"
+
+def run_local_pipeline(store_root=DEFAULT_STORE, parameter_overrides=None, workers=None, use_cache=True,
+                       event_queue=None, execution_id=None, cache_expire_after=CACHE_EXPIRE_AFTER):
+    """
+    Execute the DAG: every step whose upstream steps succeeded is submitted
+    to a thread pool at once, so independent steps overlap.
+    
+    With event_queue set, step and execution status changes are also put on
+    it as EventBridge-style events (see execution_watcher.py).
+    """
+    parameters = resolve_parameters(parameter_overrides)
+    store = LocalStepStore(store_root)
+    spec_by_name = {spec.name: spec for spec in all_steps()}
+
+    # Branch steps also wait on (and are gated by) their condition step
+    branch_of = branch_owners()
+    dependencies = dag_dependencies()
+
+    execution_id = execution_id or datetime.now().strftime('local-%Y%m%d-%H%M%S-%f')
+    execution_arn = local_execution_arn(execution_id)
+
+    def publish(event):
+        if event_queue is not None:
+            event_queue.put(event)
+    print("="*70)
+    print(f"LOCAL PIPELINE EXECUTION: {PIPELINE_NAME}")
+    print("="*70)
+    print(f"Execution: {execution_id}")
+    print(f"Store: {store_root}")
+    print(f"Parameters: {parameters}")
+    print(f"Step cache: {f'on (expires after {cache_expire_after})' if use_cache else 'off'}\n")
+
+    records = {}
+    results = {}
+    outcomes = {}
+    start_times = {}
+
+    def execute(spec):
+        record = {"StepName": spec.name, "StartTime": start_times[spec.name]}
+        publish(step_status_event(execution_arn, spec.name, "Executing", start_time=record["StartTime"]))
+        start = time.perf_counter()
+        if isinstance(spec, (ProcessingSpec, TrainingSpec, TuningSpec)):
+            result, cache_hit = run_cached_step(spec, store, results, parameters, use_cache,
+                                                cache_expire_after)
+            results[spec.name] = result
+            record["CacheHit"] = cache_hit
+            record["Metadata"] = {"CacheKey": result.key, "Outputs": result.outputs}
+        elif isinstance(spec, ConditionSpec):
+            outcomes[spec.name] = evaluate_conditions(spec, spec_by_name, results, parameters)
+            record["Metadata"] = {"Condition": {"Outcome": str(outcomes[spec.name]).lower()}}
+        else:
+            record["Metadata"] = {"RegisterModel": register_model(spec, store, results)}
+        record["EndTime"] = datetime.now(timezone.utc).isoformat()
+        record["DurationSeconds"] = time.perf_counter() - start
+        return record
+
+    pipeline_start = time.perf_counter()
+    publish(execution_status_event(execution_arn, "Executing"))
+    pending = dict(spec_by_name)
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        running = {}
+        while pending or running:
+            for name in list(pending):
+                statuses = [records.get(d, {}).get("StepStatus") for d in dependencies[name]]
+                if any(s in ("Failed", "NotExecuted") for s in statuses):
+                    records[name] = {"StepName": name, "StepStatus": "NotExecuted",
+                                     "FailureReason": "Upstream step did not succeed"}
+                elif not all(s == "Succeeded" for s in statuses):
+                    continue
+                elif name in branch_of and outcomes[branch_of[name][0]] != branch_of[name][1]:
+                    # Condition took the other branch
+                    records[name] = {"StepName": name, "StepStatus": "NotExecuted"}
+                else:
+                    start_times[name] = datetime.now(timezone.utc).isoformat()
+                    running[pool.submit(execute, pending[name])] = name
+                    print(f"⏳ {name}: started")
+                if name in records:
+                    publish(step_status_event(execution_arn, name, "NotExecuted"))
+                del pending[name]
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    record = future.result()
+                    record["StepStatus"] = "Succeeded"
+                    cached = " (cached)" if record.get("CacheHit") else ""
+                    print(f"✅ {name}: {record['DurationSeconds']:.1f}s{cached}")
+                except Exception as e:
+                    record = {"StepName": name, "StepStatus": "Failed", "FailureReason": str(e),
+                              "StartTime": start_times[name],
+                              "EndTime": datetime.now(timezone.utc).isoformat()}
+                    print(f"❌ {name}: {e}")
+                records[name] = record
+                publish(step_status_event(execution_arn, name, record["StepStatus"], "Executing",
+                                          record["StartTime"], record["EndTime"],
+                                          record.get("FailureReason")))
+
+    failed = any(r["StepStatus"] == "Failed" for r in records.values())
+    execution = {
+        "PipelineName": PIPELINE_NAME,
+        "PipelineExecutionId": execution_id,
+        "PipelineExecutionArn": execution_arn,
+        "PipelineExecutionStatus": "Failed" if failed else "Succeeded",
+        "PipelineParameters": [{"Name": k, "Value": str(v)} for k, v in parameters.items()],
+        "WallSeconds": time.perf_counter() - pipeline_start,
+        "PipelineExecutionSteps": [records[name] for name in spec_by_name]
+    }
+    execution_path = store.save_execution(execution)
+    publish(execution_status_event(execution_arn, execution["PipelineExecutionStatus"], "Executing"))
+
+    print("\n" + "="*70)
+    print(f"Pipeline {execution['PipelineExecutionStatus']} in {execution['WallSeconds']:.1f}s")
+    print("="*70)
+    for record in execution["PipelineExecutionSteps"]:
+        duration = f"{record['DurationSeconds']:.1f}s" if "DurationSeconds" in record else "-"
+        cached = "cached" if record.get("CacheHit") else ""
+        print(f"  {record['StepName']:<16}{record['StepStatus']:<14}{duration:>8}  {cached}")
+
+    evaluation = results.get("EvaluateModel")
+    if evaluation:
+        with open(property_file_path(spec_by_name, "EvaluateModel", results)) as f:
+            metrics = json.load(f)
+        print("\n📊 Model Metrics:")
+        for k, v in metrics.items():
+            if isinstance(v, float):
+                print(f"  {k}: {v:.4f}")
+            elif not isinstance(v, (dict, list)):
+                print(f"  {k}: {v}")
+    print(f"\nExecution record: {execution_path}")
+
+    return execution
+
+def parse_parameter(text):
+    name, sep, value = text.partition('=')
+    if not sep:
+        raise argparse.ArgumentTypeError(f"Expected Name=Value, got {text!r}")
+    return name, value
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--store', type=str, default=DEFAULT_STORE,
+                        help='Local directory standing in for the pipeline S3 bucket')
+    parser.add_argument('--parameter', type=parse_parameter, action='append', default=[],
+                        metavar='NAME=VALUE', help='Override a pipeline parameter (repeatable)')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Steps run concurrently (0 = one per CPU)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Rerun every step even if its outputs are cached')
+    parser.add_argument('--cache-expire-after', type=str, default=CACHE_EXPIRE_AFTER,
+                        help='ISO 8601 duration after which cached steps rerun (e.g. PT12H, P30D)')
+
+    args = parser.parse_args()
+    try:
+        cache_expiry(args.cache_expire_after)
+    except ValueError as e:
+        parser.error(str(e))
+
+    execution = run_local_pipeline(args.store, dict(args.parameter), args.workers or None,
+                                   use_cache=not args.no_cache, cache_expire_after=args.cache_expire_after)
+    sys.exit(0 if execution["PipelineExecutionStatus"] == "Succeeded" else 1)
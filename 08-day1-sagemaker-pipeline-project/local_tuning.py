@@ -0,0 +1,251 @@
+"""
+Local stand-in for the TuneModel step (SageMaker automatic model tuning)
+
+Trials run in parallel slots (threads - XGBoost releases the GIL) that share
+one QuantileDMatrix per channel, so data is read and binned once per search:
+- Bayesian: random warm-up, then half of the trials perturb the best one so
+  far (a cheap stand-in for the Bayesian surrogate), with median early stopping
+- Random: independent samples, with median early stopping
+- Hyperband: successive halving over num_round - every trial starts with a
+  few rounds and only the best third continue (from where they stopped)
+
+A warm start seeds the first trial with the previous search's best hyperparameters.
+
+    python3 local_tuning.py --rows 500000 --max-jobs 16 --parallel 1 2 4
+"""
+import argparse
+import math
+import os
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import xgboost as xgb
+
+# Median stopping only judges a trial after this many rounds
+MIN_ROUNDS_BEFORE_STOPPING = 10
+# Hyperband keeps the best 1/HALVING_RATE of trials at each rung
+HALVING_RATE = 3
+
+def clip_value(spec_range, value):
+    value = min(max(value, spec_range.min_value), spec_range.max_value)
+    return int(round(value)) if spec_range.kind == 'Integer' else value
+
+def sample_hyperparameters(ranges, rng):
+    """
+    One configuration drawn from the search space (log-uniform for Logarithmic ranges)
+    """
+    sample = {}
+    for name, spec_range in ranges.items():
+        if spec_range.scaling == 'Logarithmic':
+            value = math.exp(rng.uniform(math.log(spec_range.min_value), math.log(spec_range.max_value)))
+        else:
+            value = rng.uniform(spec_range.min_value, spec_range.max_value)
+        sample[name] = clip_value(spec_range, value)
+    return sample
+
+def perturb_hyperparameters(hyperparameters, ranges, rng, scale=0.15):
+    """
+    A neighbour of `hyperparameters`: each value moves by a normal step of
+    `scale` times its range width (in log space for Logarithmic ranges)
+    """
+    sample = {}
+    for name, spec_range in ranges.items():
+        value = float(hyperparameters[name])
+        if spec_range.scaling == 'Logarithmic':
+            width = math.log(spec_range.max_value) - math.log(spec_range.min_value)
+            value = math.exp(math.log(value) + rng.gauss(0, scale * width))
+        else:
+            value += rng.gauss(0, scale * (spec_range.max_value - spec_range.min_value))
+        sample[name] = clip_value(spec_range, value)
+    return sample
+
+class MedianStoppingRule(xgb.callback.TrainingCallback):
+    """
+    SageMaker's 'Auto' early stopping: stop a trial once its objective at a
+    round is worse than the median of earlier trials at the same round
+    """
+
+    def __init__(self, tuner):
+        super().__init__()
+        self.tuner = tuner
+        self.stopped = False
+
+    def after_iteration(self, model, epoch, evals_log):
+        value = evals_log[self.tuner.channel][self.tuner.metric][-1]
+        if epoch + 1 < MIN_ROUNDS_BEFORE_STOPPING:
+            return False
+        with self.tuner.lock:
+            others = [curve[epoch] for curve in self.tuner.curves if len(curve) > epoch]
+        if len(others) < 3:
+            return False
+        median = statistics.median(others)
+        self.stopped = value < median if self.tuner.maximize else value > median
+        return self.stopped
+
+class LocalTuner:
+    """
+    Search `ranges` around the static `hyperparameters` (which carry
+    num_round and eval_metric); trials train on dtrain and are scored on the
+    objective channel in `evals`
+    """
+
+    def __init__(self, dtrain, evals, hyperparameters, ranges, objective_metric, objective_type='Maximize',
+                 strategy='Bayesian', max_jobs=20, max_parallel_jobs=4, warm_start=None, seed=0):
+        if strategy not in ('Bayesian', 'Random', 'Hyperband'):
+            raise ValueError(f"Unknown tuning strategy: {strategy} (expected Bayesian, Random or Hyperband)")
+        self.dtrain = dtrain
+        self.evals = evals
+        self.params = dict(hyperparameters)
+        self.num_round = int(self.params.pop('num_round'))
+        self.ranges = ranges
+        self.channel, self.metric = objective_metric.split(':')
+        self.maximize = objective_type == 'Maximize'
+        self.strategy = strategy
+        self.max_jobs = max_jobs
+        self.max_parallel_jobs = max_parallel_jobs
+        self.warm_start = warm_start
+        self.rng = random.Random(seed)
+        self.nthread = max(1, (os.cpu_count() or 1) // max_parallel_jobs)
+
+        self.lock = threading.Lock()
+        self.curves = []
+        self.trials = []
+
+    def candidate(self, number):
+        if number == 0 and self.warm_start:
+            return {name: clip_value(r, float(self.warm_start[name])) for name, r in self.ranges.items()}
+        finished = [t for t in self.trials if t['status'] == 'Completed']
+        if self.strategy == 'Bayesian' and len(finished) >= self.max_parallel_jobs and self.rng.random() < 0.5:
+            return perturb_hyperparameters(self.best(finished)['hyperparameters'], self.ranges, self.rng)
+        return sample_hyperparameters(self.ranges, self.rng)
+
+    def best(self, trials=None):
+        trials = trials if trials is not None else self.trials
+        return (max if self.maximize else min)(trials, key=lambda t: t['objective'])
+
+    def train(self, number, hyperparameters, rounds, booster=None, early_stopping=False):
+        """
+        Train (or continue `booster`) up to `rounds` boosting rounds
+        """
+        params = dict(self.params, **hyperparameters, nthread=self.nthread)
+        done = booster.num_boosted_rounds() if booster is not None else 0
+        history = {}
+        rule = MedianStoppingRule(self) if early_stopping else None
+        start = time.perf_counter()
+        booster = xgb.train(params, self.dtrain, rounds - done, evals=self.evals, evals_result=history,
+                            xgb_model=booster, callbacks=[rule] if rule else None, verbose_eval=False)
+        curve = history[self.channel][self.metric]
+        if not done:
+            with self.lock:
+                self.curves.append(curve)
+        return {
+            "trial": number,
+            "hyperparameters": hyperparameters,
+            "rounds": booster.num_boosted_rounds(),
+            "objective": curve[-1],
+            "status": "Stopped" if rule and rule.stopped else "Completed",
+            "seconds": time.perf_counter() - start,
+            "booster": booster
+        }
+
+    def run(self):
+        """
+        Run the search; returns the best trial that trained to the end (with its booster)
+        """
+        if self.strategy == 'Hyperband':
+            self._successive_halving()
+        else:
+            self._sample_search()
+        return self.best([t for t in self.trials if t['booster'] is not None])
+
+    def _sample_search(self):
+        with ThreadPoolExecutor(max_workers=self.max_parallel_jobs) as pool:
+            running = set()
+            submitted = 0
+            while submitted < self.max_jobs or running:
+                while submitted < self.max_jobs and len(running) < self.max_parallel_jobs:
+                    running.add(pool.submit(self.train, submitted, self.candidate(submitted),
+                                            self.num_round, early_stopping=True))
+                    submitted += 1
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    trial = future.result()
+                    if trial['status'] == 'Stopped':
+                        trial['booster'] = None
+                    self.trials.append(trial)
+
+    def _successive_halving(self):
+        rungs = max(1, math.floor(math.log(self.max_jobs, HALVING_RATE)))
+        rounds = max(1, self.num_round // HALVING_RATE ** rungs)
+        survivors = [{"trial": i, "hyperparameters": self.candidate(i), "booster": None}
+                     for i in range(self.max_jobs)]
+        with ThreadPoolExecutor(max_workers=self.max_parallel_jobs) as pool:
+            while True:
+                results = list(pool.map(lambda t: self.train(t['trial'], t['hyperparameters'], rounds,
+                                                             t['booster']), survivors))
+                if rounds >= self.num_round:
+                    self.trials.extend(results)
+                    return
+                results.sort(key=lambda t: t['objective'], reverse=self.maximize)
+                keep = max(1, len(results) // HALVING_RATE)
+                for trial in results[keep:]:
+                    self.trials.append(dict(trial, status="Stopped", booster=None))
+                survivors = results[:keep]
+                rounds = min(self.num_round, rounds * HALVING_RATE)
+
+    def report(self):
+        """
+        JSON-friendly trial table, best first
+        """
+        trials = sorted(self.trials, key=lambda t: t['objective'], reverse=self.maximize)
+        return {
+            "strategy": self.strategy,
+            "objective_metric": f"{self.channel}:{self.metric}",
+            "max_jobs": self.max_jobs,
+            "max_parallel_jobs": self.max_parallel_jobs,
+            "warm_start": self.warm_start,
+            "stopped_early": sum(t['status'] == 'Stopped' for t in trials),
+            "trials": [{k: v for k, v in t.items() if k != 'booster'} for t in trials]
+        }
+
+def synthetic_dmatrices(n_rows, seed=42):
+    """
+    Train/validation QuantileDMatrix from preprocess.py's synthetic generator
+    """
+    from preprocess import SyntheticGenerator, hash_split_mask
+
+    data = SyntheticGenerator(seed=seed, block_size=n_rows).block(0, n_rows)
+    mask = hash_split_mask(data)
+    y, X = data.iloc[:, 0].to_numpy(), data.iloc[:, 1:].to_numpy(dtype='float32')
+    dtrain = xgb.QuantileDMatrix(X[mask], label=y[mask])
+    dval = xgb.QuantileDMatrix(X[~mask], label=y[~mask], ref=dtrain)
+    return dtrain, [(dval, 'validation')]
+
+if __name__ == '__main__':
+    from pipeline_dag import TUNE
+
+    parser = argparse.ArgumentParser(description="Benchmark local tuning wall time against parallel trial slots")
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--max-jobs', type=int, default=16)
+    parser.add_argument('--parallel', type=int, nargs='+', default=[1, 2, 4],
+                        help='Parallel trial slots to compare')
+    parser.add_argument('--strategy', type=str, default=TUNE.strategy,
+                        choices=['Bayesian', 'Random', 'Hyperband'])
+
+    args = parser.parse_args()
+
+    dtrain, evals = synthetic_dmatrices(args.rows)
+    print(f"Tuning on {args.rows:,} synthetic rows: {args.strategy}, {args.max_jobs} trials "
+          f"({os.cpu_count()} cores)")
+    print(f"\n{'Slots':>6}{'Wall (s)':>10}{'Stopped':>9}  Best {TUNE.objective_metric}")
+    print("-"*50)
+    for slots in args.parallel:
+        tuner = LocalTuner(dtrain, evals, TUNE.hyperparameters, TUNE.ranges, TUNE.objective_metric,
+                           TUNE.objective_type, args.strategy, args.max_jobs, slots)
+        start = time.perf_counter()
+        best = tuner.run()
+        elapsed = time.perf_counter() - start
+        print(f"{slots:>6}{elapsed:>10.2f}{tuner.report()['stopped_early']:>9}  {best['objective']:.4f}")
@@ -1,104 +1,306 @@
 """
 Monitor pipeline execution
 """
+import argparse
+import asyncio
 import boto3
-import time
+import json
+import math
+import queue
 import sys
-from datetime import datetime
+import threading
+from botocore.config import Config
+from datetime import datetime, timezone
 
-def monitor_execution(execution_arn):
+from execution_watcher import AsyncExecutionWatcher, ExecutionWatcher, TERMINAL_STATUSES, parse_time
+
+# Step-duration histogram bucket upper bounds (seconds); a final bucket catches the rest
+HISTOGRAM_EDGES = [30, 60, 120, 300, 600, 900, 1200, 1800, 3600]
+
+def step_emoji(step_status):
+    # Status emoji
+    if step_status == 'Executing':
+        return "⏳"
+    elif step_status == 'Succeeded':
+        return "✅"
+    elif step_status == 'Failed':
+        return "❌"
+    elif step_status == 'Stopping':
+        return "⏸️"
+    return "⚪"
+
+def print_steps(execution):
+    for step in execution.ordered_steps():
+        step_status = step['StepStatus']
+        print(f"{step_emoji(step_status)} {step['StepName']}: {step_status}")
+
+        # Show duration if completed
+        if step.get('StartTime') and step.get('EndTime'):
+            duration = (step['EndTime'] - step['StartTime']).total_seconds()
+            print(f"     Duration: {duration:.0f}s")
+
+        # Show failure reason
+        if step_status == 'Failed' and 'FailureReason' in step:
+            print(f"     ❌ {step['FailureReason']}")
+
+def print_change(execution, changes):
     """
-    Monitor pipeline execution with real-time updates
+    Execution status changes print the full step table; step changes print one line
     """
-    
-    sm_client = boto3.client('sagemaker')
-    
-    pipeline_name = execution_arn.split('/')[-3]
-    exec_name = execution_arn.split('/')[-1]
-    
-    print(f"📊 Monitoring Pipeline Execution")
+    now = datetime.now().strftime('%H:%M:%S')
+    for kind, step_name, old, new in changes:
+        if kind == 'execution':
+            print(f"\n⏰ {now} - {execution.name} - Status: {new}")
+            print("-"*70)
+            print_steps(execution)
+        else:
+            print(f"   {now} {execution.name} {step_emoji(new)} {step_name}: {old or '-'} → {new}")
+
+def print_summary(watcher):
+    executions = list(watcher.executions.values())
+    print("\n" + "="*70)
+    for status in sorted(TERMINAL_STATUSES):
+        count = sum(e.status == status for e in executions)
+        if count:
+            print(f"{step_emoji(status)} {status}: {count}")
+    still_running = [e for e in executions if e.status not in TERMINAL_STATUSES]
+    if still_running:
+        print(f"⏳ Still running: {len(still_running)}")
+    print(f"API calls: {watcher.api_calls}")
+    print("="*70)
+
+def monitor_executions(execution_arns, sm_client=None, event_queue=None):
+    """
+    Monitor any number of pipeline executions with one shared watcher
+    """
+    if sm_client is None and event_queue is None:
+        sm_client = boto3.client('sagemaker', config=Config(retries={'mode': 'adaptive', 'max_attempts': 10}))
+
+    watcher = ExecutionWatcher(sm_client, event_queue=event_queue)
+    for arn in execution_arns:
+        watcher.watch(arn)
+
+    print(f"📊 Monitoring {len(execution_arns)} Pipeline Execution(s)")
     print("="*70)
-    print(f"Pipeline: {pipeline_name}")
-    print(f"Execution: {exec_name}")
+    for arn in execution_arns[:10]:
+        print(f"Pipeline: {arn.split('/')[-3]}  Execution: {arn.split('/')[-1]}")
+    if len(execution_arns) > 10:
+        print(f"... and {len(execution_arns) - 10} more")
     print("="*70)
-    
-    last_status = None
-    
-    while True:
-        try:
-            # Get execution details
-            desc = sm_client.describe_pipeline_execution(
-                PipelineExecutionArn=execution_arn
-            )
-            
-            status = desc['PipelineExecutionStatus']
-            
-            # List steps
-            steps_response = sm_client.list_pipeline_execution_steps(
-                PipelineExecutionArn=execution_arn
-            )
-            
-            # Only print if status changed
-            if status != last_status:
-                print(f"\n⏰ {datetime.now().strftime('%H:%M:%S')} - Status: {status}")
-                print("-"*70)
-                
-                for step in steps_response['PipelineExecutionSteps']:
-                    step_name = step['StepName']
-                    step_status = step['StepStatus']
-                    
-                    # Status emoji
-                    if step_status == 'Executing':
-                        emoji = "⏳"
-                    elif step_status == 'Succeeded':
-                        emoji = "✅"
-                    elif step_status == 'Failed':
-                        emoji = "❌"
-                    elif step_status == 'Stopping':
-                        emoji = "⏸️"
-                    else:
-                        emoji = "⚪"
-                    
-                    print(f"{emoji} {step_name}: {step_status}")
-                    
-                    # Show duration if completed
-                    if 'StartTime' in step and 'EndTime' in step:
-                        duration = (step['EndTime'] - step['StartTime']).total_seconds()
-                        print(f"     Duration: {duration:.0f}s")
-                    
-                    # Show failure reason
-                    if step_status == 'Failed' and 'FailureReason' in step:
-                        print(f"     ❌ {step['FailureReason']}")
-                
-                last_status = status
-            
-            # Break if completed
-            if status in ['Succeeded', 'Failed', 'Stopped']:
-                print("\n" + "="*70)
-                if status == 'Succeeded':
-                    print("✅ Pipeline execution SUCCEEDED!")
-                elif status == 'Failed':
-                    print("❌ Pipeline execution FAILED!")
-                else:
-                    print("⏸️  Pipeline execution STOPPED!")
-                print("="*70)
-                break
-            
-            # Wait before next check
-            time.sleep(30)
-            
-        except KeyboardInterrupt:
-            print("\n\n⏸️  Monitoring stopped (pipeline still running)")
-            print(f"Resume with: python3 monitor_pipeline.py {execution_arn}")
+
+    try:
+        watcher.run(on_change=print_change)
+    except KeyboardInterrupt:
+        print("\n\n⏸️  Monitoring stopped (pipelines still running)")
+        print(f"Resume with: python3 monitor_pipeline.py {' '.join(execution_arns)}")
+
+    print_summary(watcher)
+    return watcher
+
+def monitor_execution(execution_arn):
+    """
+    Monitor pipeline execution with real-time updates
+    """
+    return monitor_executions([execution_arn])
+
+def step_duration(step, now=None):
+    """
+    Seconds from StartTime to EndTime (or to now while the step is running)
+    """
+    start = parse_time(step.get('StartTime'))
+    if start is None:
+        return None
+    end = parse_time(step.get('EndTime')) or now
+    return (end - start).total_seconds() if end else None
+
+def step_order(executions):
+    """
+    Step names in the order they first started across all executions
+    """
+    first_start = {}
+    for execution in executions:
+        for index, step in enumerate(execution.ordered_steps()):
+            first_start[step['StepName']] = min(first_start.get(step['StepName'], index), index)
+    return sorted(first_start, key=first_start.get)
+
+def render_dashboard(watcher):
+    """
+    One row per execution, one column per step: status emoji + duration
+    """
+    now = datetime.now(timezone.utc)
+    executions = sorted(watcher.executions.values(), key=lambda e: e.name)
+    steps = step_order(executions)
+    lines = [f"⏰ {datetime.now().strftime('%H:%M:%S')} - {len(executions)} executions, "
+             f"{len(watcher.active)} active, {watcher.api_calls} API calls",
+             f"{'Execution':<24}{'Status':<12}" + ''.join(f"{name[:16]:>18}" for name in steps)]
+    lines.append("-"*len(lines[1]))
+    for execution in executions:
+        cells = []
+        for name in steps:
+            step = execution.steps.get(name)
+            duration = step_duration(step, now) if step else None
+            cell = f"{step_emoji(step['StepStatus'])} {duration:.0f}s" if duration is not None else \
+                (step_emoji(step['StepStatus']) if step else "-")
+            cells.append(f"{cell:>18}")
+        lines.append(f"{execution.name[:23]:<24}{(execution.status or '?'):<12}" + ''.join(cells))
+    return "\n".join(lines)
+
+def percentile(sorted_values, q):
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+    index = max(0, math.ceil(q / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+def step_timing_histograms(executions, edges=HISTOGRAM_EDGES):
+    """
+    Per-step duration stats and histograms over completed steps, plus each
+    step's share of total step time (which step dominates pipeline latency)
+    """
+    durations = {}
+    for execution in executions:
+        for step in execution.steps.values():
+            if step.get('EndTime') is not None:
+                duration = step_duration(step)
+                if duration is not None:
+                    durations.setdefault(step['StepName'], []).append(duration)
+
+    total = sum(sum(values) for values in durations.values())
+    report = {}
+    for name, values in durations.items():
+        values = sorted(values)
+        counts = [0] * (len(edges) + 1)
+        for value in values:
+            counts[next((i for i, edge in enumerate(edges) if value <= edge), len(edges))] += 1
+        report[name] = {
+            "count": len(values),
+            "mean_seconds": sum(values) / len(values),
+            "p50_seconds": percentile(values, 50),
+            "p95_seconds": percentile(values, 95),
+            "max_seconds": values[-1],
+            "share_of_step_time": sum(values) / total if total else 0.0,
+            "histogram": [{"le_seconds": edge, "count": count} for edge, count in zip(edges, counts)]
+                         + [{"le_seconds": None, "count": counts[-1]}]
+        }
+    return dict(sorted(report.items(), key=lambda item: -item[1]["share_of_step_time"]))
+
+def print_step_timings(report):
+    print(f"\n{'Step':<20}{'Runs':>6}{'p50 (s)':>10}{'p95 (s)':>10}{'Max (s)':>10}{'Share':>8}")
+    print("-"*64)
+    for name, stats in report.items():
+        print(f"{name:<20}{stats['count']:>6}{stats['p50_seconds']:>10.0f}{stats['p95_seconds']:>10.0f}"
+              f"{stats['max_seconds']:>10.0f}{stats['share_of_step_time']:>8.0%}")
+    if report:
+        print(f"\nDominant step: {next(iter(report))}")
+
+def monitor_dashboard(execution_arns, sm_client=None, event_queue=None, max_concurrent_calls=8,
+                      timings_path=None):
+    """
+    asyncio monitor for many executions: one aggregated status table,
+    redrawn after each polling cycle, then per-step timing histograms
+    """
+    if sm_client is None and event_queue is None:
+        sm_client = boto3.client('sagemaker', config=Config(retries={'mode': 'adaptive', 'max_attempts': 10}))
+
+    watcher = AsyncExecutionWatcher(sm_client, event_queue=event_queue,
+                                    max_concurrent_calls=max_concurrent_calls)
+    for arn in execution_arns:
+        watcher.watch(arn)
+
+    interactive = sys.stdout.isatty()
+    changed = [True]
+
+    def redraw(watcher):
+        # Redraw in place on a terminal; in logs only print when something changed
+        if interactive:
+            print("\033[H\033[J" + render_dashboard(watcher), flush=True)
+        elif changed[0]:
+            print("\n" + render_dashboard(watcher), flush=True)
+        changed[0] = False
+
+    def mark_changed(execution, changes):
+        changed[0] = True
+
+    try:
+        asyncio.run(watcher.run_async(on_change=mark_changed, on_cycle=redraw))
+    except KeyboardInterrupt:
+        print("\n\n⏸️  Monitoring stopped (pipelines still running)")
+
+    report = step_timing_histograms(watcher.executions.values())
+    print_step_timings(report)
+    if timings_path:
+        with open(timings_path, 'w') as f:
+            json.dump({"executions": len(watcher.executions), "histogram_edges_seconds": HISTOGRAM_EDGES,
+                       "steps": report}, f, indent=2)
+        print(f"Step timings written to {timings_path}")
+    print_summary(watcher)
+    return watcher, report
+
+def latest_execution_arns(pipeline_name, count, sm_client=None):
+    """
+    ARNs of a pipeline's `count` most recent executions (e.g. a nightly backfill)
+    """
+    sm_client = sm_client or boto3.client('sagemaker')
+    arns = []
+    paginator = sm_client.get_paginator('list_pipeline_executions')
+    for page in paginator.paginate(PipelineName=pipeline_name, SortBy='CreationTime', SortOrder='Descending'):
+        arns.extend(s['PipelineExecutionArn'] for s in page['PipelineExecutionSummaries'])
+        if len(arns) >= count:
             break
-        except Exception as e:
-            print(f"\n❌ Error: {e}")
-            time.sleep(30)
+    return arns[:count]
+
+def monitor_local_execution(parameter_overrides=None):
+    """
+    Run local_pipeline.py in the background and watch it through its event
+    queue - the same watcher code path, no AWS calls
+    """
+    from local_pipeline import local_execution_arn, run_local_pipeline
+
+    events = queue.Queue()
+    execution_id = datetime.now().strftime('local-%Y%m%d-%H%M%S-%f')
+    runner = threading.Thread(target=run_local_pipeline,
+                              kwargs={'parameter_overrides': parameter_overrides,
+                                      'event_queue': events, 'execution_id': execution_id})
+    runner.start()
+    watcher = monitor_executions([local_execution_arn(execution_id)], event_queue=events)
+    runner.join()
+    return watcher
 
 if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        print("Usage: python3 monitor_pipeline.py <execution_arn>")
+    parser = argparse.ArgumentParser(description="Monitor one or many pipeline executions")
+    parser.add_argument('execution_arns', nargs='*', metavar='execution_arn')
+    parser.add_argument('--arns-file', type=str, help='File with one execution ARN per line')
+    parser.add_argument('--pipeline-name', type=str, default='MLOpsPipeline')
+    parser.add_argument('--latest', type=int, default=0,
+                        help='Also watch the N most recent executions of --pipeline-name')
+    parser.add_argument('--dashboard', action='store_true',
+                        help='asyncio monitor with one aggregated status table')
+    parser.add_argument('--max-concurrent-calls', type=int, default=8)
+    parser.add_argument('--timings-out', type=str, default=None,
+                        help='Write per-step timing histograms to this JSON file (dashboard mode)')
+    parser.add_argument('--local', action='store_true',
+                        help='Run local_pipeline.py and watch it through its event queue')
+
+    args = parser.parse_args()
+
+    if args.local:
+        monitor_local_execution()
+        sys.exit(0)
+
+    execution_arns = list(args.execution_arns)
+    if args.arns_file:
+        with open(args.arns_file) as f:
+            execution_arns += [line.strip() for line in f if line.strip()]
+    if args.latest:
+        execution_arns += latest_execution_arns(args.pipeline_name, args.latest)
+    execution_arns = list(dict.fromkeys(execution_arns))
+
+    if not execution_arns:
+        parser.print_usage()
         sys.exit(1)
-    
-    execution_arn = sys.argv[1]
-    monitor_execution(execution_arn)
\ No newline at end of file
+
+    if args.dashboard:
+        monitor_dashboard(execution_arns, max_concurrent_calls=args.max_concurrent_calls,
+                          timings_path=args.timings_out)
+    else:
+        monitor_executions(execution_arns)
@@ -0,0 +1,265 @@
+"""
+Pipeline DAG shared by create_pipeline.py (SageMaker) and local_pipeline.py (local executor)
+
+Steps are plain data: each one names its script, arguments, outputs and which
+upstream output feeds each input, so both runners build the same graph.
+"""
+import os
+import re
+from collections import namedtuple
+from datetime import timedelta
+
+from preprocess import CONTENT_TYPES
+
+PIPELINE_NAME = "MLOpsPipeline"
+MODEL_PACKAGE_GROUP = "mlops-pipeline-models"
+PROCESSING_ROOT = "/opt/ml/processing"
+
+# Channel format written by preprocess.py (csv, parquet, recordio-protobuf, libsvm)
+OUTPUT_FORMAT = os.environ.get('PIPELINE_OUTPUT_FORMAT', 'csv')
+CONTENT_TYPE = CONTENT_TYPES[OUTPUT_FORMAT]
+
+# How long a cached step result stays reusable (ISO 8601 duration, e.g. PT12H, P30D)
+CACHE_EXPIRE_AFTER = os.environ.get('PIPELINE_CACHE_EXPIRE_AFTER', 'P30D')
+
+# PIPELINE_TUNING=1 replaces TrainModel with a TuneModel hyperparameter search
+TUNING = os.environ.get('PIPELINE_TUNING', '0') == '1'
+# Bayesian (with early stopping), Random or Hyperband
+TUNING_STRATEGY = os.environ.get('PIPELINE_TUNING_STRATEGY', 'Bayesian')
+
+# Pipeline parameters: name -> (type, default)
+PARAMETERS = {
+    "ProcessingInstanceType": ("String", "ml.m5.xlarge"),
+    "TrainingInstanceType": ("String", "ml.m5.xlarge"),
+    # Distributed XGBoost: each instance trains on its own train part files
+    "TrainingInstanceCount": ("Integer", 1),
+    # Preprocessing hosts; synthetic blocks are dealt across them
+    "ProcessingInstanceCount": ("Integer", 1),
+    # Part files per preprocess output channel (0 = one per processing core)
+    "PreprocessShards": ("String", "0"),
+    "AccuracyThreshold": ("Float", 0.75),
+    "AucThreshold": ("Float", 0.5),
+}
+
+if TUNING:
+    PARAMETERS.update({
+        "TuningMaxJobs": ("Integer", 20),
+        # Trials running at once: tuning wall time ~ max jobs / parallel jobs
+        "TuningMaxParallelJobs": ("Integer", 4),
+    })
+
+HYPERPARAMETERS = {
+    "objective": "binary:logistic",
+    "num_round": "100",
+    "max_depth": "5",
+    "eta": "0.2",
+    "subsample": "0.8",
+    # Histogram-based trees: the method that scales across instances
+    "tree_method": "hist"
+}
+
+# Hyperparameter search space: kind is Continuous or Integer, scaling as in
+# SageMaker (Auto, Linear, Logarithmic)
+Range = namedtuple('Range', ['kind', 'min_value', 'max_value', 'scaling'], defaults=['Auto'])
+
+HYPERPARAMETER_RANGES = {
+    "eta": Range("Continuous", 0.01, 0.5, "Logarithmic"),
+    "max_depth": Range("Integer", 3, 10),
+    "min_child_weight": Range("Continuous", 1, 10),
+    "subsample": Range("Continuous", 0.5, 1.0),
+    "lambda": Range("Continuous", 0.1, 10, "Logarithmic"),
+}
+
+# A pipeline parameter used in step arguments or conditions
+Parameter = namedtuple('Parameter', ['name'])
+
+# Output `output` of upstream step `step` (a training step's only output is "model")
+StepOutput = namedtuple('StepOutput', ['step', 'output'])
+
+# A processing input or output: container path, the script flag that points at
+# it, the upstream output feeding it (inputs only) and a file inside the directory
+Channel = namedtuple('Channel', ['name', 'path', 'flag', 'source', 'file'], defaults=[None, None])
+
+# JSON file written to a processing output that conditions can read
+PropertyFileSpec = namedtuple('PropertyFileSpec', ['name', 'output', 'path'])
+
+# json_path in step's property file must be >= threshold
+Condition = namedtuple('Condition', ['step', 'json_path', 'threshold'])
+
+# cache=True reuses a previous run's outputs when code, arguments and inputs match
+ProcessingSpec = namedtuple('ProcessingSpec', ['name', 'code', 'inputs', 'outputs', 'arguments', 'property_file',
+                                               'instance_count', 'cache'], defaults=[1, False])
+TrainingSpec = namedtuple('TrainingSpec', ['name', 'channels', 'hyperparameters', 'instance_count', 'cache'],
+                          defaults=[1, False])
+# objective_metric is <channel>:<eval_metric> as emitted by the XGBoost container
+TuningSpec = namedtuple('TuningSpec', ['name', 'channels', 'hyperparameters', 'ranges', 'objective_metric',
+                                       'objective_type', 'strategy', 'max_jobs', 'max_parallel_jobs',
+                                       'instance_count', 'cache'], defaults=[1, False])
+ConditionSpec = namedtuple('ConditionSpec', ['name', 'conditions', 'if_steps', 'else_steps'])
+RegisterSpec = namedtuple('RegisterSpec', ['name', 'model', 'metrics', 'model_package_group'])
+
+PREPROCESS = ProcessingSpec(
+    name="PreprocessData",
+    code="preprocess.py",
+    inputs=[],
+    outputs=[
+        Channel("train", f"{PROCESSING_ROOT}/train", "--train-data"),
+        Channel("validation", f"{PROCESSING_ROOT}/validation", "--val-data"),
+        Channel("manifest", f"{PROCESSING_ROOT}/manifest", "--manifest-data")
+    ],
+    arguments=["--shards", Parameter("PreprocessShards"), "--output-format", OUTPUT_FORMAT],
+    property_file=None,
+    instance_count=Parameter("ProcessingInstanceCount"),
+    cache=True
+)
+
+TRAIN = TrainingSpec(
+    name="TrainModel",
+    channels={
+        "train": StepOutput("PreprocessData", "train"),
+        "validation": StepOutput("PreprocessData", "validation")
+    },
+    hyperparameters=HYPERPARAMETERS,
+    instance_count=Parameter("TrainingInstanceCount"),
+    cache=True
+)
+
+TUNE = TuningSpec(
+    name="TuneModel",
+    channels=TRAIN.channels,
+    hyperparameters={
+        **{k: v for k, v in HYPERPARAMETERS.items() if k not in HYPERPARAMETER_RANGES},
+        "eval_metric": "auc"
+    },
+    ranges=HYPERPARAMETER_RANGES,
+    objective_metric="validation:auc",
+    objective_type="Maximize",
+    strategy=TUNING_STRATEGY,
+    max_jobs=Parameter("TuningMaxJobs"),
+    max_parallel_jobs=Parameter("TuningMaxParallelJobs"),
+    instance_count=Parameter("TrainingInstanceCount"),
+    cache=True
+)
+
+# The step whose model is evaluated and registered
+MODEL_STEP = TUNE if TUNING else TRAIN
+
+EVALUATE = ProcessingSpec(
+    name="EvaluateModel",
+    code="evaluate.py",
+    inputs=[
+        Channel("model", f"{PROCESSING_ROOT}/model", "--model-path",
+                StepOutput(MODEL_STEP.name, "model"), "model.tar.gz"),
+        Channel("test", f"{PROCESSING_ROOT}/test", "--test-data-path",
+                StepOutput("PreprocessData", "validation"))
+    ],
+    outputs=[
+        Channel("evaluation", f"{PROCESSING_ROOT}/evaluation", "--output-path")
+    ],
+    # In memory, so the AUC the approval condition reads is exact (--batch-size
+    # scores from histograms, within ~1e-4)
+    arguments=[],
+    property_file=PropertyFileSpec("EvaluationReport", "evaluation", "evaluation.json"),
+    cache=True
+)
+
+REGISTER = RegisterSpec(
+    name="RegisterModel",
+    model=StepOutput(MODEL_STEP.name, "model"),
+    metrics=StepOutput("EvaluateModel", "evaluation"),
+    model_package_group=MODEL_PACKAGE_GROUP
+)
+
+# Only register if accuracy and ROC-AUC meet thresholds
+CHECK = ConditionSpec(
+    name="CheckAccuracy",
+    conditions=[
+        Condition("EvaluateModel", "accuracy", Parameter("AccuracyThreshold")),
+        Condition("EvaluateModel", "roc_auc", Parameter("AucThreshold"))
+    ],
+    if_steps=[REGISTER],
+    else_steps=[]
+)
+
+# Top-level steps in definition order (branch steps live inside CHECK)
+STEPS = [PREPROCESS, MODEL_STEP, EVALUATE, CHECK]
+
+def all_steps(steps=STEPS):
+    """
+    Every step, including those nested in condition branches
+    """
+    for spec in steps:
+        yield spec
+        if isinstance(spec, ConditionSpec):
+            yield from all_steps(spec.if_steps + spec.else_steps)
+
+def step_dependencies(spec):
+    """
+    Names of the steps whose outputs `spec` reads
+    """
+    if isinstance(spec, ProcessingSpec):
+        sources = [c.source for c in spec.inputs if c.source]
+    elif isinstance(spec, (TrainingSpec, TuningSpec)):
+        sources = list(spec.channels.values())
+    elif isinstance(spec, RegisterSpec):
+        sources = [spec.model, spec.metrics]
+    else:
+        sources = spec.conditions
+    return sorted({s.step for s in sources})
+
+def branch_owners(steps=STEPS):
+    """
+    Branch step name -> (condition step name, True for if_steps / False for else_steps)
+    """
+    owners = {}
+    for spec in all_steps(steps):
+        if isinstance(spec, ConditionSpec):
+            for step in spec.if_steps:
+                owners[step.name] = (spec.name, True)
+            for step in spec.else_steps:
+                owners[step.name] = (spec.name, False)
+    return owners
+
+def dag_dependencies(steps=STEPS):
+    """
+    Step name -> names of the steps it waits on (data dependencies plus the
+    condition step gating a branch step)
+    """
+    owners = branch_owners(steps)
+    return {
+        spec.name: set(step_dependencies(spec)) | ({owners[spec.name][0]} if spec.name in owners else set())
+        for spec in all_steps(steps)
+    }
+
+def resolve_argument(value, parameters):
+    """
+    Substitute a Parameter with its value from `parameters` (a dict of
+    name -> value or SageMaker parameter objects)
+    """
+    return parameters[value.name] if isinstance(value, Parameter) else value
+
+def processing_arguments(spec, parameters, channel_path):
+    """
+    Script arguments for a processing step: its own arguments, then a flag for
+    every input/output channel pointing at channel_path(channel) - the
+    container path on SageMaker or a local directory
+    """
+    arguments = [resolve_argument(a, parameters) for a in spec.arguments]
+    for channel in spec.inputs + spec.outputs:
+        if channel.flag:
+            path = channel_path(channel)
+            arguments += [channel.flag, f"{path}/{channel.file}" if channel.file else path]
+    return arguments
+
+def cache_expiry(expire_after=CACHE_EXPIRE_AFTER):
+    """
+    timedelta for an ISO 8601 duration as accepted by SageMaker CacheConfig
+    (PnYnMnWnDTnHnMnS; a month counts as 30 days, a year as 365)
+    """
+    match = re.fullmatch(r'P(?:(\d+)Y)?(?:(\d+)M)?(?:(\d+)W)?(?:(\d+)D)?'
+                         r'(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?', expire_after or '')
+    if not match or expire_after in ('P', 'PT') or expire_after.endswith('T'):
+        raise ValueError(f"Not an ISO 8601 duration: {expire_after!r} (e.g. PT12H, P30D)")
+    years, months, weeks, days, hours, minutes, seconds = (int(g or 0) for g in match.groups())
+    return timedelta(days=365 * years + 30 * months + 7 * weeks + days,
+                     hours=hours, minutes=minutes, seconds=seconds)
@@ -4,40 +4,346 @@ Data preprocessing script for SageMaker Processing
 import pandas as pd
 import numpy as np
 import argparse
+import glob
+import hashlib
+import json
 import os
+import shutil
+import struct
+import time
+from functools import partial
+from multiprocessing import Pool
 
-def preprocess_data(input_path, train_output_path, val_output_path):
+# XGBoost expects the label in the first column
+COLUMNS = ['Survived', 'Pclass', 'Sex', 'Age', 'SibSp', 'Parch', 'Fare', 'Embarked']
+
+# Titanic-style raw records carry these as strings
+CATEGORY_CODES = {
+    'Sex': {'male': 0, 'female': 1},
+    'Embarked': {'S': 0, 'C': 1, 'Q': 2},
+}
+
+TRAIN_FRACTION = 0.8
+HASH_BUCKETS = 10000
+DEFAULT_CHUNKSIZE = 100000
+
+MANIFEST_FILE = 'manifest.json'
+
+# Multi-instance processing jobs describe their cluster here (instance_count > 1)
+RESOURCE_CONFIG = os.environ.get('PROCESSING_RESOURCE_CONFIG', '/opt/ml/config/resourceconfig.json')
+
+def processing_host(config_path=RESOURCE_CONFIG):
     """
-    Preprocess Titanic dataset
+    (index of this host, number of hosts) in the processing job; (0, 1) when
+    run outside SageMaker
     """
-    print("Loading data...")
+    if not os.path.exists(config_path):
+        return 0, 1
+    with open(config_path) as f:
+        config = json.load(f)
+    hosts = sorted(config['hosts'])
+    return hosts.index(config['current_host']), len(hosts)
+
+HOST_INDEX, HOST_COUNT = processing_host()
+
+# Synthetic Titanic-like data used for demos and pipeline load tests
+SYNTHETIC_SCHEMA = {
+    'features': {
+        'Pclass': {'kind': 'choice', 'values': [1, 2, 3]},
+        'Sex': {'kind': 'choice', 'values': [0, 1]},
+        'Age': {'kind': 'randint', 'low': 1, 'high': 80},
+        'SibSp': {'kind': 'randint', 'low': 0, 'high': 5},
+        'Parch': {'kind': 'randint', 'low': 0, 'high': 3},
+        'Fare': {'kind': 'uniform', 'low': 0, 'high': 100},
+        'Embarked': {'kind': 'choice', 'values': [0, 1, 2]},
+    },
+    # Survived = 1 if ANY condition holds (simple rule-based for demo)
+    'label_rule': [['Pclass', '==', 1], ['Sex', '==', 1], ['Age', '<', 18]],
+    # Add some randomness
+    'flip_fraction': 0.3,
+}
+DEFAULT_SYNTHETIC_ROWS = 1000
+DEFAULT_BLOCK_SIZE = 1000000
+
+RULE_OPS = {
+    '==': np.equal,
+    '!=': np.not_equal,
+    '<': np.less,
+    '<=': np.less_equal,
+    '>': np.greater,
+    '>=': np.greater_equal,
+}
+
+# Output formats the XGBoost container can read, all keeping the label first
+FILE_EXTENSIONS = {
+    'csv': 'csv',
+    'parquet': 'parquet',
+    'recordio-protobuf': 'pbr',
+    'libsvm': 'libsvm',
+}
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'parquet': 'application/x-parquet',
+    'recordio-protobuf': 'application/x-recordio-protobuf',
+    'libsvm': 'text/libsvm',
+}
+
+RECORDIO_MAGIC = 0xced7230a
+
+def _varint(value):
+    out = bytearray()
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+def _tensor_header(field, n_values):
+    """
+    Protobuf bytes of Record.<field> = {key: "values", value: Float32Tensor}
+    up to the packed float payload, which is n_values float32s long
+    """
+    tensor_len = 1 + len(_varint(4 * n_values)) + 4 * n_values
+    value_len = 1 + len(_varint(tensor_len)) + tensor_len
+    entry_len = 8 + 1 + len(_varint(value_len)) + value_len
+    return (bytes([(field << 3) | 2]) + _varint(entry_len)
+            + b'\x0a\x06values'
+            + b'\x12' + _varint(value_len)
+            + b'\x12' + _varint(tensor_len)
+            + b'\x0a' + _varint(4 * n_values))
+
+def encode_recordio_protobuf(data):
+    """
+    Encode a label-first frame as SageMaker RecordIO-protobuf, one record per row.
     
-    np.random.seed(42)
-    n_samples = 1000
-    
-    # Generate synthetic features
-    data = pd.DataFrame({
-        'Pclass': np.random.choice([1, 2, 3], n_samples),
-        'Sex': np.random.choice([0, 1], n_samples),
-        'Age': np.random.randint(1, 80, n_samples),
-        'SibSp': np.random.randint(0, 5, n_samples),
-        'Parch': np.random.randint(0, 3, n_samples),
-        'Fare': np.random.uniform(0, 100, n_samples),
-        'Embarked': np.random.choice([0, 1, 2], n_samples)
-    })
-    
-    # Generate target (simple rule-based for demo)
-    # Make sure it's ONLY 0 or 1
-    data['Survived'] = ((data['Pclass'] == 1) | 
-                        (data['Sex'] == 1) | 
-                        (data['Age'] < 18)).astype(int)
+    Every dense row has the same byte layout, so the whole frame is filled in
+    as one NumPy byte matrix instead of serialising records one at a time.
+    """
+    n_rows, n_features = len(data), data.shape[1] - 1
+    features_header = _tensor_header(1, n_features)
+    label_header = _tensor_header(2, 1)
+    payload_len = len(features_header) + 4 * n_features + len(label_header) + 4
     
-    # Add some randomness
-    flip_indices = np.random.choice(n_samples, size=int(0.3 * n_samples), replace=False)
-    data.loc[flip_indices, 'Survived'] = 1 - data.loc[flip_indices, 'Survived']
+    template = (struct.pack('<II', RECORDIO_MAGIC, payload_len)
+                + features_header + bytes(4 * n_features)
+                + label_header + bytes(4)
+                + bytes(-payload_len % 4))
+    features_at = 8 + len(features_header)
+    label_at = features_at + 4 * n_features + len(label_header)
+    
+    values = data.to_numpy(dtype='<f4')
+    records = np.tile(np.frombuffer(template, dtype=np.uint8), (n_rows, 1))
+    records[:, features_at:features_at + 4 * n_features] = (
+        np.ascontiguousarray(values[:, 1:]).view(np.uint8).reshape(n_rows, -1))
+    records[:, label_at:label_at + 4] = (
+        np.ascontiguousarray(values[:, :1]).view(np.uint8).reshape(n_rows, -1))
+    return records.tobytes()
+
+def encode_libsvm(data):
+    """
+    Encode a label-first frame as libsvm lines with 0-based feature indices.
+    
+    Only missing (NaN) values are dropped; zeros stay explicit so a model
+    trained from libsvm sees the same features as CSV inference requests.
+    """
+    label = data.iloc[:, 0]
+    lines = label.astype(int).astype(str)
+    for i, column in enumerate(data.columns[1:]):
+        values = data[column]
+        entries = (f' {i}:' + values.astype(str)).where(values.notna(), '')
+        lines = lines + entries
+    return '\n'.join(lines) + '\n' if len(lines) else ''
+
+class ChannelWriter:
+    """
+    Append-only writer for one output file (no header, label first) in any
+    of the supported formats
+    """
+    
+    def __init__(self, path, output_format='csv'):
+        if output_format not in FILE_EXTENSIONS:
+            raise ValueError(f"Unsupported output format: {output_format}")
+        self.path = path
+        self.output_format = output_format
+        self.rows = 0
+        self._parquet_writer = None
+        self._file = None
+        if output_format == 'recordio-protobuf':
+            self._file = open(path, 'wb')
+        elif output_format != 'parquet':
+            self._file = open(path, 'w', newline='')
+    
+    def write(self, data):
+        if self.output_format == 'csv':
+            data.to_csv(self._file, index=False, header=False)  # NO HEADER
+        elif self.output_format == 'libsvm':
+            self._file.write(encode_libsvm(data))
+        elif self.output_format == 'recordio-protobuf':
+            self._file.write(encode_recordio_protobuf(data))
+        else:
+            self._write_parquet(data)
+        self.rows += len(data)
+    
+    def _write_parquet(self, data):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet output requires pyarrow (pip install pyarrow)")
+        
+        # float32 keeps the schema identical across chunks whatever dtypes they inferred
+        table = pa.Table.from_pandas(data.astype(np.float32), preserve_index=False)
+        if self._parquet_writer is None:
+            self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+        self._parquet_writer.write_table(table)
+    
+    def close(self):
+        if self.output_format == 'parquet':
+            if self._parquet_writer is None:
+                self._write_parquet(pd.DataFrame(columns=COLUMNS))
+            self._parquet_writer.close()
+        else:
+            self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+class SyntheticGenerator:
+    """
+    Vectorized synthetic data generator with a configurable schema.
+    
+    Column buffers are preallocated once at block_size and every block is
+    written straight into them, so streaming 100M+ rows allocates nothing per
+    block. Block i is seeded from (seed, i): output depends only on seed and
+    block_size, not on which process generates which block. Yielded frames
+    share the buffers and are only valid until the next block is generated.
+    """
+    
+    def __init__(self, schema=None, seed=42, block_size=DEFAULT_BLOCK_SIZE):
+        self.schema = schema or SYNTHETIC_SCHEMA
+        self.seed = seed
+        self.block_size = block_size
+        self.label = COLUMNS[0]
+        
+        features = self.schema['features']
+        self._scratch = np.empty(block_size, dtype=np.float64)
+        self._index = np.empty(block_size, dtype=np.int64)
+        self._mask = np.empty(block_size, dtype=bool)
+        self._label = np.empty(block_size, dtype=np.int64)
+        self._columns = {
+            name: np.empty(block_size, dtype=np.float64 if spec['kind'] == 'uniform' else np.int64)
+            for name, spec in features.items()
+        }
+        self._choices = {
+            name: np.asarray(spec['values'], dtype=np.int64)
+            for name, spec in features.items() if spec['kind'] == 'choice'
+        }
+    
+    def block(self, block_index, n_rows):
+        """
+        Generate n_rows (<= block_size) rows for block_index, label first
+        """
+        rng = np.random.default_rng([self.seed, block_index])
+        scratch = self._scratch[:n_rows]
+        index = self._index[:n_rows]
+        mask = self._mask[:n_rows]
+        label = self._label[:n_rows]
+        
+        for name, spec in self.schema['features'].items():
+            column = self._columns[name][:n_rows]
+            rng.random(out=scratch)
+            
+            if spec['kind'] == 'uniform':
+                np.multiply(scratch, spec['high'] - spec['low'], out=scratch)
+                np.add(scratch, spec['low'], out=column)
+            elif spec['kind'] == 'randint':
+                np.multiply(scratch, spec['high'] - spec['low'], out=scratch)
+                np.floor(scratch, out=scratch)
+                np.add(scratch, spec['low'], out=column, casting='unsafe')
+            elif spec['kind'] == 'choice':
+                choices = self._choices[name]
+                np.multiply(scratch, len(choices), out=scratch)
+                np.floor(scratch, out=scratch)
+                index[:] = scratch
+                np.take(choices, index, out=column)
+            else:
+                raise ValueError(f"Unknown feature kind for {name}: {spec['kind']}")
+        
+        # Generate target: ONLY 0 or 1
+        label.fill(0)
+        for name, op, value in self.schema['label_rule']:
+            RULE_OPS[op](self._columns[name][:n_rows], value, out=mask)
+            np.bitwise_or(label, mask, out=label)
+        
+        # Flip a random fraction of labels in place (no fancy indexing)
+        rng.random(out=scratch)
+        np.less(scratch, self.schema['flip_fraction'], out=mask)
+        np.bitwise_xor(label, mask, out=label)
+        
+        data = {self.label: label}
+        data.update((name, column[:n_rows]) for name, column in self._columns.items())
+        return pd.DataFrame(data, copy=False)
+    
+    def iter_blocks(self, n_rows, block_indices=None):
+        """
+        Yield the blocks that make up an n_rows dataset (optionally only some of them)
+        """
+        if block_indices is None:
+            block_indices = synthetic_block_indices(n_rows, self.block_size)
+        for block_index in block_indices:
+            start = block_index * self.block_size
+            yield self.block(block_index, min(self.block_size, n_rows - start))
+
+def synthetic_block_indices(n_rows, block_size):
+    return list(range((n_rows + block_size - 1) // block_size))
+
+def load_schema(schema_path):
+    """
+    Read a synthetic schema JSON file (same shape as SYNTHETIC_SCHEMA)
+    """
+    if not schema_path:
+        return SYNTHETIC_SCHEMA
+    with open(schema_path) as f:
+        return json.load(f)
+
+def measure_generation(n_rows, seed=42, block_size=DEFAULT_BLOCK_SIZE, schema=None):
+    """
+    Generate n_rows without writing them and report throughput in rows/s
+    """
+    generator = SyntheticGenerator(schema, seed, block_size)
+    print(f"Generating {n_rows:,} rows in blocks of {block_size:,}...")
+    
+    start = time.perf_counter()
+    generated = 0
+    for block in generator.iter_blocks(n_rows):
+        generated += len(block)
+    elapsed = time.perf_counter() - start
+    
+    rows_per_second = generated / elapsed if elapsed > 0 else float('inf')
+    print(f"Generated {generated:,} rows in {elapsed:.2f}s ({rows_per_second:,.0f} rows/s)")
+    return rows_per_second
+
+def preprocess_data(input_path, train_output_path, val_output_path, shards=1,
+                    manifest_path=None, output_format='csv', n_samples=DEFAULT_SYNTHETIC_ROWS,
+                    seed=42, schema=None, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Preprocess Titanic dataset
+    """
+    if n_samples > block_size or HOST_COUNT > 1:
+        # Too big to hold at once (or split across hosts): stream it out block by block
+        preprocess_synthetic_streaming(n_samples, train_output_path, val_output_path,
+                                       block_size=block_size, shards=shards,
+                                       manifest_path=manifest_path, output_format=output_format,
+                                       seed=seed, schema=schema)
+        return
+    
+    print("Loading data...")
     
-    # CRITICAL: Reorder so Survived is FIRST
-    data = data[['Survived', 'Pclass', 'Sex', 'Age', 'SibSp', 'Parch', 'Fare', 'Embarked']]
+    # Generate synthetic features and target (Survived is FIRST)
+    data = SyntheticGenerator(schema, seed, block_size=max(n_samples, 1)).block(0, n_samples)
     
     print(f"Data shape: {data.shape}")
     print(f"Columns: {list(data.columns)}")
@@ -54,31 +360,501 @@ def preprocess_data(input_path, train_output_path, val_output_path):
     print(f"Train samples: {len(train_data)}")
     print(f"Validation samples: {len(val_data)}")
     
+    if shards > 1:
+        write_sharded_outputs(train_data, val_data, train_output_path, val_output_path,
+                              shards, manifest_path, output_format)
+        return
+    
     # Save in XGBoost format (no header, label first)
     os.makedirs(train_output_path, exist_ok=True)
     os.makedirs(val_output_path, exist_ok=True)
     
-    train_data.to_csv(
-        os.path.join(train_output_path, 'train.csv'),
-        index=False,
-        header=False  # NO HEADER
-    )
+    train_file = os.path.join(train_output_path, channel_file_name('train', output_format))
+    val_file = os.path.join(val_output_path, channel_file_name('validation', output_format))
+    
+    with ChannelWriter(train_file, output_format) as writer:
+        writer.write(train_data)
+    
+    with ChannelWriter(val_file, output_format) as writer:
+        writer.write(val_data)
+    
+    print("✅ Preprocessing complete!")
+    print(f"Saved to {train_file} and {val_file}")
+
+def resolve_shards(shards):
+    """
+    0 means one shard per CPU core of the processing instance
+    """
+    return shards if shards > 0 else (os.cpu_count() or 1)
+
+def channel_file_name(channel, output_format='csv'):
+    return f"{channel}.{FILE_EXTENSIONS[output_format]}"
+
+def shard_file_name(shard_index, output_format='csv'):
+    # Every host uploads to the same S3 prefix, so part files carry the host index
+    host = f"h{HOST_INDEX:03d}-" if HOST_COUNT > 1 else ""
+    return f"part-{host}{shard_index:05d}.{FILE_EXTENSIONS[output_format]}"
+
+def manifest_file_name():
+    return f"manifest-h{HOST_INDEX:03d}.json" if HOST_COUNT > 1 else MANIFEST_FILE
+
+def write_shard(data, output_path, shard_index, output_format='csv'):
+    """
+    Write one part file (no header, label first) and return its manifest entry
+    """
+    file_name = shard_file_name(shard_index, output_format)
+    with ChannelWriter(os.path.join(output_path, file_name), output_format) as writer:
+        writer.write(data)
+    return {"file": file_name, "rows": len(data)}
+
+def write_manifest(manifest_path, channels, output_format='csv'):
+    """
+    Record every shard and its row count, outside the training channels so
+    XGBoost never tries to parse it as data
+    """
+    manifest = {
+        "format": output_format,
+        "content_type": CONTENT_TYPES[output_format],
+        "host": {"index": HOST_INDEX, "count": HOST_COUNT},
+        "channels": {
+            channel: {"shards": entries, "rows": sum(e['rows'] for e in entries)}
+            for channel, entries in channels.items()
+        }
+    }
+    
+    os.makedirs(manifest_path, exist_ok=True)
+    with open(os.path.join(manifest_path, manifest_file_name()), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    
+    print(f"Manifest saved to {manifest_path}/{manifest_file_name()}")
+    return manifest
+
+def write_sharded_outputs(train_data, val_data, train_output_path, val_output_path,
+                          shards, manifest_path, output_format='csv'):
+    """
+    Split each channel into part files and write them in parallel, one
+    process per core
+    """
+    os.makedirs(train_output_path, exist_ok=True)
+    os.makedirs(val_output_path, exist_ok=True)
+    
+    tasks = []
+    for channel_data, output_path in [(train_data, train_output_path),
+                                      (val_data, val_output_path)]:
+        bounds = np.linspace(0, len(channel_data), shards + 1).astype(int)
+        for i in range(shards):
+            tasks.append((channel_data.iloc[bounds[i]:bounds[i + 1]], output_path, i, output_format))
+    
+    workers = min(len(tasks), os.cpu_count() or 1)
+    print(f"Writing {shards} shards per channel with {workers} processes...")
+    
+    with Pool(processes=workers) as pool:
+        entries = pool.starmap(write_shard, tasks)
+    
+    write_manifest(manifest_path, {
+        'train': entries[:shards],
+        'validation': entries[shards:]
+    }, output_format)
+    
+    print("✅ Preprocessing complete!")
+    print(f"Saved {shards} shards to {train_output_path}/ and {val_output_path}/")
+
+def list_input_files(input_path):
+    """
+    Return the CSV files under input_path (or input_path itself if it is a file)
+    """
+    if os.path.isfile(input_path):
+        return [input_path]
+    return sorted(glob.glob(os.path.join(input_path, '**', '*.csv'), recursive=True))
+
+def prepare_chunk(chunk):
+    """
+    Apply Survived-first column ordering and label checks to one chunk
+    """
+    chunk = chunk[COLUMNS].copy()
+    
+    for column, codes in CATEGORY_CODES.items():
+        if not pd.api.types.is_numeric_dtype(chunk[column]):
+            chunk[column] = chunk[column].map(codes)
+    
+    # Verify label is 0/1
+    assert chunk['Survived'].isin([0, 1]).all(), "Label must be 0 or 1!"
+    chunk['Survived'] = chunk['Survived'].astype(int)
+    
+    return chunk
+
+def hash_split_mask(chunk):
+    """
+    Deterministic train/validation routing: True means the row goes to train.
+    
+    Rows are bucketed by a hash of their content, so the 80/20 split is
+    reproducible without ever seeing the whole dataset. Values are hashed as
+    float64 so a row lands in the same split whatever dtypes its chunk inferred.
+    """
+    row_hashes = pd.util.hash_pandas_object(chunk.astype('float64'), index=False).values
+    return (row_hashes % HASH_BUCKETS) < int(TRAIN_FRACTION * HASH_BUCKETS)
+
+def iter_chunks(input_files, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Yield prepared chunks from every input file, never more than chunksize rows at a time
+    """
+    for input_file in input_files:
+        print(f"   Reading {input_file}")
+        for chunk in pd.read_csv(input_file, usecols=COLUMNS, chunksize=chunksize):
+            yield prepare_chunk(chunk)
+
+def stream_chunks(chunks, train_file, val_file, output_format='csv'):
+    """
+    Split a stream of prepared chunks into one train and one validation file.
+    
+    Returns (train_rows, val_rows, survived_rows).
+    """
+    n_survived = 0
+    
+    with ChannelWriter(train_file, output_format) as train_out, \
+         ChannelWriter(val_file, output_format) as val_out:
+        for chunk in chunks:
+            is_train = hash_split_mask(chunk)
+            
+            # Save in XGBoost format (no header, label first)
+            train_out.write(chunk[is_train])
+            val_out.write(chunk[~is_train])
+            
+            n_survived += int(chunk['Survived'].sum())
+    
+    return train_out.rows, val_out.rows, n_survived
+
+def stream_files(input_files, train_file, val_file, chunksize=DEFAULT_CHUNKSIZE,
+                 output_format='csv'):
+    return stream_chunks(iter_chunks(input_files, chunksize), train_file, val_file, output_format)
+
+def stream_synthetic(block_indices, train_file, val_file, n_rows, block_size=DEFAULT_BLOCK_SIZE,
+                     output_format='csv', seed=42, schema=None):
+    generator = SyntheticGenerator(schema, seed, block_size)
+    return stream_chunks(generator.iter_blocks(n_rows, block_indices), train_file, val_file,
+                         output_format)
+
+def run_streaming(stream_fn, groups, train_output_path, val_output_path, manifest_path,
+                  output_format='csv'):
+    """
+    Call stream_fn(group, train_file, val_file) for every group of work.
+    
+    One group on a single host writes a single train/validation file;
+    otherwise each group writes its own part file from a process pool and
+    gets a manifest.
+    
+    Returns (train_rows, val_rows, survived_rows).
+    """
+    os.makedirs(train_output_path, exist_ok=True)
+    os.makedirs(val_output_path, exist_ok=True)
+    
+    if len(groups) == 1 and HOST_COUNT == 1:
+        train_file = os.path.join(train_output_path, channel_file_name('train', output_format))
+        val_file = os.path.join(val_output_path, channel_file_name('validation', output_format))
+        counts = stream_fn(groups[0], train_file, val_file)
+        print(f"Saved to {train_file} and {val_file}")
+        return counts
+    
+    tasks = [
+        (group,
+         os.path.join(train_output_path, shard_file_name(i, output_format)),
+         os.path.join(val_output_path, shard_file_name(i, output_format)))
+        for i, group in enumerate(groups)
+    ]
+    workers = min(len(groups), os.cpu_count() or 1)
+    print(f"Writing {len(groups)} shards per channel with {workers} processes...")
+    
+    with Pool(processes=workers) as pool:
+        counts = pool.starmap(stream_fn, tasks)
+    
+    write_manifest(manifest_path, {
+        'train': [{"file": shard_file_name(i, output_format), "rows": c[0]}
+                  for i, c in enumerate(counts)],
+        'validation': [{"file": shard_file_name(i, output_format), "rows": c[1]}
+                       for i, c in enumerate(counts)]
+    }, output_format)
+    print(f"Saved to {train_output_path}/ and {val_output_path}/")
+    
+    return tuple(sum(c[k] for c in counts) for k in range(3))
+
+def print_split_summary(n_train, n_val, n_survived):
+    n_total = n_train + n_val
+    print(f"Rows processed: {n_total}")
+    if n_total:
+        print(f"Survival rate: {n_survived / n_total:.2%}")
+    print(f"Train samples: {n_train}")
+    print(f"Validation samples: {n_val}")
+
+def preprocess_data_streaming(input_path, train_output_path, val_output_path,
+                              chunksize=DEFAULT_CHUNKSIZE, shards=1, manifest_path=None,
+                              output_format='csv'):
+    """
+    Preprocess Titanic-style CSVs chunk by chunk so peak memory stays flat
+    regardless of input size.
+    
+    With shards > 1 the input files are dealt round-robin to a process pool;
+    each worker streams its files into its own train/validation part file.
+    On a multi-instance job each host only sees the files delivered to it
+    (use ShardedByS3Key for the input).
+    """
+    print(f"Streaming data from {input_path} (chunksize={chunksize})...")
+    
+    input_files = list_input_files(input_path)
+    if not input_files:
+        raise FileNotFoundError(f"No CSV files found under {input_path}")
+    
+    # A shard needs at least one input file to read
+    n_groups = max(1, min(shards, len(input_files)))
+    groups = [input_files[i::n_groups] for i in range(n_groups)]
+    
+    stream_fn = partial(stream_files, chunksize=chunksize, output_format=output_format)
+    counts = run_streaming(stream_fn, groups, train_output_path, val_output_path,
+                           manifest_path, output_format)
+    
+    print_split_summary(*counts)
+    print("✅ Preprocessing complete!")
+
+def preprocess_synthetic_streaming(n_rows, train_output_path, val_output_path,
+                                   block_size=DEFAULT_BLOCK_SIZE, shards=1, manifest_path=None,
+                                   output_format='csv', seed=42, schema=None):
+    """
+    Generate and write n_rows of synthetic data block by block (pipeline load
+    testing); blocks are dealt round-robin to hosts, then to shards, and rows
+    are split with the same content hash as real data
+    """
+    if HOST_COUNT > 1:
+        # Small enough blocks that every host gets at least one
+        block_size = max(1, min(block_size, -(-n_rows // HOST_COUNT)))
+    block_indices = synthetic_block_indices(n_rows, block_size)[HOST_INDEX::HOST_COUNT]
+    print(f"Streaming {n_rows:,} synthetic rows in {len(block_indices)} blocks of {block_size:,}"
+          + (f" (host {HOST_INDEX + 1} of {HOST_COUNT})..." if HOST_COUNT > 1 else "..."))
+    if not block_indices:
+        print("No blocks for this host")
+        return
+    
+    n_groups = max(1, min(shards, len(block_indices)))
+    groups = [block_indices[i::n_groups] for i in range(n_groups)]
+    
+    stream_fn = partial(stream_synthetic, n_rows=n_rows, block_size=block_size,
+                        output_format=output_format, seed=seed, schema=schema)
+    start = time.perf_counter()
+    counts = run_streaming(stream_fn, groups, train_output_path, val_output_path,
+                           manifest_path, output_format)
+    elapsed = time.perf_counter() - start
+    
+    print_split_summary(*counts)
+    # Rows this host wrote, not n_rows: the other hosts' blocks aren't in elapsed
+    host_rows = counts[0] + counts[1]
+    print(f"Throughput: {host_rows / elapsed:,.0f} rows/s (generate + split + write"
+          + (", this host)" if HOST_COUNT > 1 else ")"))
+    print("✅ Preprocessing complete!")
+
+def code_version():
+    """
+    Fingerprint of this script plus the settings that shape its output, so
+    any change to the preprocessing logic invalidates cached partitions
+    """
+    digest = hashlib.sha256()
+    with open(os.path.abspath(__file__), 'rb') as f:
+        digest.update(f.read())
+    digest.update(json.dumps([COLUMNS, CATEGORY_CODES, TRAIN_FRACTION, HASH_BUCKETS]).encode())
+    return digest.hexdigest()
+
+def partition_fingerprint(input_file, version, output_format='csv'):
+    """
+    Content hash of one input partition, salted with the code version and output format
+    """
+    digest = hashlib.sha256()
+    digest.update(version.encode())
+    digest.update(output_format.encode())
+    with open(input_file, 'rb') as f:
+        for block in iter(lambda: f.read(8 * 1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class LocalPartitionCache:
+    """
+    Content-addressed cache of processed partitions on the local filesystem:
+    <root>/<fingerprint>/{train,validation}.<ext> plus meta.json, which is
+    written last and marks the entry complete
+    """
+    
+    def __init__(self, root):
+        self.root = root
+    
+    def _path(self, fingerprint, name):
+        return os.path.join(self.root, fingerprint, name)
+    
+    def get_meta(self, fingerprint):
+        path = self._path(fingerprint, 'meta.json')
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+    
+    def fetch(self, fingerprint, name, dest):
+        shutil.copyfile(self._path(fingerprint, name), dest)
+    
+    def store(self, fingerprint, files, meta):
+        os.makedirs(os.path.join(self.root, fingerprint), exist_ok=True)
+        # Copy then rename, so identical partitions stored concurrently never interleave
+        for name, src in files.items():
+            tmp = f"{self._path(fingerprint, name)}.{os.getpid()}.tmp"
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, self._path(fingerprint, name))
+        tmp = f"{self._path(fingerprint, 'meta.json')}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._path(fingerprint, 'meta.json'))
+
+class S3PartitionCache(LocalPartitionCache):
+    """
+    Same layout as LocalPartitionCache under an s3://bucket/prefix, so the
+    cache survives across processing jobs
+    """
+    
+    def __init__(self, uri):
+        import boto3
+        bucket, _, prefix = uri[len('s3://'):].partition('/')
+        self.bucket = bucket
+        self.prefix = prefix.rstrip('/')
+        self.s3 = boto3.client('s3')
+    
+    def _key(self, fingerprint, name):
+        return f"{self.prefix}/{fingerprint}/{name}" if self.prefix else f"{fingerprint}/{name}"
+    
+    def get_meta(self, fingerprint):
+        try:
+            obj = self.s3.get_object(Bucket=self.bucket, Key=self._key(fingerprint, 'meta.json'))
+        except self.s3.exceptions.NoSuchKey:
+            return None
+        return json.loads(obj['Body'].read())
+    
+    def fetch(self, fingerprint, name, dest):
+        self.s3.download_file(self.bucket, self._key(fingerprint, name), dest)
+    
+    def store(self, fingerprint, files, meta):
+        for name, src in files.items():
+            self.s3.upload_file(src, self.bucket, self._key(fingerprint, name))
+        self.s3.put_object(Bucket=self.bucket, Key=self._key(fingerprint, 'meta.json'),
+                           Body=json.dumps(meta).encode())
+
+def open_partition_cache(cache_uri):
+    if cache_uri.startswith('s3://'):
+        return S3PartitionCache(cache_uri)
+    return LocalPartitionCache(cache_uri)
+
+def process_partition(input_file, shard_index, version, cache_uri, train_output_path,
+                      val_output_path, chunksize=DEFAULT_CHUNKSIZE, output_format='csv'):
+    """
+    Produce part-<shard_index> for one input file, from the cache when its
+    fingerprint has been processed before, otherwise by streaming it and
+    storing the result under that fingerprint
+    """
+    cache = open_partition_cache(cache_uri)
+    fingerprint = partition_fingerprint(input_file, version, output_format)
+    train_file = os.path.join(train_output_path, shard_file_name(shard_index, output_format))
+    val_file = os.path.join(val_output_path, shard_file_name(shard_index, output_format))
+    train_name = channel_file_name('train', output_format)
+    val_name = channel_file_name('validation', output_format)
+    
+    meta = cache.get_meta(fingerprint)
+    if meta is not None:
+        cache.fetch(fingerprint, train_name, train_file)
+        cache.fetch(fingerprint, val_name, val_file)
+        cached = True
+    else:
+        n_train, n_val, n_survived = stream_files([input_file], train_file, val_file, chunksize,
+                                                  output_format)
+        meta = {"train_rows": n_train, "val_rows": n_val, "survived_rows": n_survived}
+        cache.store(fingerprint, {train_name: train_file, val_name: val_file}, meta)
+        cached = False
+    
+    return dict(meta, source=os.path.basename(input_file), fingerprint=fingerprint, cached=cached)
+
+def preprocess_data_cached(input_path, train_output_path, val_output_path, cache_uri,
+                           chunksize=DEFAULT_CHUNKSIZE, manifest_path=None, output_format='csv'):
+    """
+    Incremental streaming preprocessing: every input file is one partition,
+    and only partitions whose content (or this code) changed are reprocessed.
+    Outputs are reassembled as one part file per partition from cached and
+    fresh results.
+    """
+    print(f"Incremental preprocessing of {input_path} (cache: {cache_uri})...")
+    
+    input_files = list_input_files(input_path)
+    if not input_files:
+        raise FileNotFoundError(f"No CSV files found under {input_path}")
+    
+    os.makedirs(train_output_path, exist_ok=True)
+    os.makedirs(val_output_path, exist_ok=True)
+    
+    version = code_version()
+    tasks = [
+        (input_file, i, version, cache_uri, train_output_path, val_output_path,
+         chunksize, output_format)
+        for i, input_file in enumerate(input_files)
+    ]
+    
+    with Pool(processes=min(len(tasks), os.cpu_count() or 1)) as pool:
+        partitions = pool.starmap(process_partition, tasks)
+    
+    n_cached = sum(p['cached'] for p in partitions)
+    print(f"Partitions: {len(partitions)} ({n_cached} cached, {len(partitions) - n_cached} processed)")
     
-    val_data.to_csv(
-        os.path.join(val_output_path, 'validation.csv'),
-        index=False,
-        header=False  # NO HEADER
-    )
+    write_manifest(manifest_path, {
+        'train': [{"file": shard_file_name(i, output_format), "rows": p['train_rows'],
+                   "source": p['source'], "fingerprint": p['fingerprint'], "cached": p['cached']}
+                  for i, p in enumerate(partitions)],
+        'validation': [{"file": shard_file_name(i, output_format), "rows": p['val_rows'],
+                        "source": p['source'], "fingerprint": p['fingerprint'], "cached": p['cached']}
+                       for i, p in enumerate(partitions)]
+    }, output_format)
     
+    print_split_summary(sum(p['train_rows'] for p in partitions),
+                        sum(p['val_rows'] for p in partitions),
+                        sum(p['survived_rows'] for p in partitions))
     print("✅ Preprocessing complete!")
-    print(f"Saved to {train_output_path}/train.csv and {val_output_path}/validation.csv")
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('--input-data', type=str, default='/opt/ml/processing/input')
     parser.add_argument('--train-data', type=str, default='/opt/ml/processing/train')
     parser.add_argument('--val-data', type=str, default='/opt/ml/processing/validation')
+    parser.add_argument('--streaming', action='store_true',
+                        help='Read --input-data in bounded chunks instead of loading it all at once')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--shards', type=int, default=1,
+                        help='Part files per channel (1 = single train.csv/validation.csv, 0 = one per CPU core)')
+    parser.add_argument('--manifest-data', type=str, default='/opt/ml/processing/manifest')
+    parser.add_argument('--output-format', type=str, default='csv', choices=sorted(FILE_EXTENSIONS))
+    parser.add_argument('--synthetic-rows', type=int, default=DEFAULT_SYNTHETIC_ROWS,
+                        help='Rows of synthetic data (streamed in blocks above --block-size)')
+    parser.add_argument('--block-size', type=int, default=DEFAULT_BLOCK_SIZE)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--schema', type=str, default=None,
+                        help='JSON file with a synthetic feature schema (see SYNTHETIC_SCHEMA)')
+    parser.add_argument('--generate-only', action='store_true',
+                        help='Only measure synthetic generation throughput (rows/s)')
+    parser.add_argument('--cache-uri', type=str, default=None,
+                        help='Local dir or s3:// prefix caching processed partitions (streaming mode)')
     
     args = parser.parse_args()
+    shards = resolve_shards(args.shards)
     
-    preprocess_data(args.input_data, args.train_data, args.val_data)
\ No newline at end of file
+    if args.generate_only:
+        measure_generation(args.synthetic_rows, args.seed, args.block_size, load_schema(args.schema))
+    elif args.streaming and args.cache_uri:
+        preprocess_data_cached(args.input_data, args.train_data, args.val_data, args.cache_uri,
+                               args.chunksize, manifest_path=args.manifest_data,
+                               output_format=args.output_format)
+    elif args.streaming:
+        preprocess_data_streaming(args.input_data, args.train_data, args.val_data, args.chunksize,
+                                  shards=shards, manifest_path=args.manifest_data,
+                                  output_format=args.output_format)
+    else:
+        preprocess_data(args.input_data, args.train_data, args.val_data,
+                        shards=shards, manifest_path=args.manifest_data,
+                        output_format=args.output_format, n_samples=args.synthetic_rows,
+                        seed=args.seed, schema=load_schema(args.schema),
+                        block_size=args.block_size)
\ No newline at end of file
@@ -0,0 +1,375 @@
+"""
+Profile MLOpsPipeline step timings across its execution history
+
+Walks past executions (paginated list_pipeline_executions + step listings,
+cached locally so reruns only fetch new executions) and reports:
+
+- per-step p50/p95 durations and cache-hit rates
+- where step time goes: waiting to be scheduled, queueing for instances
+  (step start -> job start), running the job, and wrap-up after the job
+- the critical path through the DAG in pipeline_dag.py
+- per-step regressions between pipeline versions
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+from collections import Counter
+
+import boto3
+from botocore.config import Config
+
+from execution_watcher import TERMINAL_STATUSES, parse_time
+from monitor_pipeline import percentile
+from pipeline_dag import PIPELINE_NAME, dag_dependencies
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'mlops-pipeline-profile')
+
+# Describe call and (start, end) fields giving a step's job running time
+JOB_TIMES = {
+    'TrainingJob': ('describe_training_job', 'TrainingJobName', 'TrainingStartTime', 'TrainingEndTime'),
+    'ProcessingJob': ('describe_processing_job', 'ProcessingJobName', 'ProcessingStartTime', 'ProcessingEndTime'),
+    'TuningJob': ('describe_hyper_parameter_tuning_job', 'HyperParameterTuningJobName', 'CreationTime',
+                  'HyperParameterTuningEndTime'),
+}
+
+def to_json(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+class ProfileCache:
+    """
+    One JSON file per finished execution under <root>/<pipeline>/ - finished
+    executions never change, so they are fetched once
+    """
+
+    def __init__(self, root, pipeline_name):
+        self.dir = os.path.join(root, pipeline_name)
+        os.makedirs(self.dir, exist_ok=True)
+
+    def _path(self, execution_arn):
+        return os.path.join(self.dir, f"{execution_arn.split('/')[-1]}.json")
+
+    def get(self, execution_arn):
+        path = self._path(execution_arn)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def put(self, execution):
+        tmp = f"{self._path(execution['PipelineExecutionArn'])}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(execution, f, default=to_json)
+        os.replace(tmp, self._path(execution['PipelineExecutionArn']))
+
+def job_times(sm_client, step):
+    """
+    (start, end) of the training/processing job behind a step, if any
+    """
+    for kind, (method, name_field, start_field, end_field) in JOB_TIMES.items():
+        job = step.get('Metadata', {}).get(kind)
+        if job:
+            desc = getattr(sm_client, method)(**{name_field: job['Arn'].split('/')[-1]})
+            return desc.get(start_field), desc.get(end_field)
+    return None, None
+
+def fetch_execution(sm_client, summary):
+    """
+    Everything the profiler needs about one execution, in a cacheable shape
+    """
+    arn = summary['PipelineExecutionArn']
+    desc = sm_client.describe_pipeline_execution(PipelineExecutionArn=arn)
+    steps = []
+    for page in sm_client.get_paginator('list_pipeline_execution_steps').paginate(PipelineExecutionArn=arn):
+        for step in page['PipelineExecutionSteps']:
+            job_start, job_end = job_times(sm_client, step) if not step.get('CacheHitResult') else (None, None)
+            steps.append({
+                'StepName': step['StepName'],
+                'StepStatus': step['StepStatus'],
+                'StartTime': step.get('StartTime'),
+                'EndTime': step.get('EndTime'),
+                'CacheHit': bool(step.get('CacheHitResult')),
+                'JobStartTime': job_start,
+                'JobEndTime': job_end,
+            })
+    return {
+        'PipelineExecutionArn': arn,
+        'PipelineExecutionStatus': summary['PipelineExecutionStatus'],
+        'PipelineVersionId': desc.get('PipelineVersionId', 'unknown'),
+        'StartTime': summary.get('StartTime'),
+        'Steps': steps,
+    }
+
+def fetch_history(pipeline_name, cache, sm_client=None, max_executions=None):
+    """
+    Finished executions, newest first; only executions missing from the
+    cache cost API calls
+    """
+    sm_client = sm_client or boto3.client('sagemaker', config=Config(retries={'mode': 'adaptive',
+                                                                               'max_attempts': 10}))
+    executions = []
+    fetched = 0
+    paginator = sm_client.get_paginator('list_pipeline_executions')
+    for page in paginator.paginate(PipelineName=pipeline_name, SortBy='CreationTime', SortOrder='Descending'):
+        for summary in page['PipelineExecutionSummaries']:
+            if summary['PipelineExecutionStatus'] not in TERMINAL_STATUSES:
+                continue
+            execution = cache.get(summary['PipelineExecutionArn'])
+            if execution is None:
+                execution = json.loads(json.dumps(fetch_execution(sm_client, summary), default=to_json))
+                cache.put(execution)
+                fetched += 1
+            executions.append(execution)
+            if max_executions and len(executions) >= max_executions:
+                print(f"Executions: {len(executions)} ({fetched} fetched, {len(executions) - fetched} cached)")
+                return executions
+    print(f"Executions: {len(executions)} ({fetched} fetched, {len(executions) - fetched} cached)")
+    return executions
+
+def load_local_history(store):
+    """
+    Execution records written by local_pipeline.py, in the same shape
+    """
+    executions = []
+    for path in sorted(glob.glob(os.path.join(store, 'executions', '*.json')), reverse=True):
+        with open(path) as f:
+            record = json.load(f)
+        executions.append({
+            'PipelineExecutionArn': record.get('PipelineExecutionArn', record['PipelineExecutionId']),
+            'PipelineExecutionStatus': record['PipelineExecutionStatus'],
+            'PipelineVersionId': record.get('PipelineVersionId', 'local'),
+            'StartTime': min((s['StartTime'] for s in record['PipelineExecutionSteps'] if s.get('StartTime')),
+                             default=None),
+            'Steps': [dict(s, CacheHit=s.get('CacheHit', False)) for s in record['PipelineExecutionSteps']],
+        })
+    print(f"Executions: {len(executions)} (local store {store})")
+    return executions
+
+def seconds(start, end):
+    start, end = parse_time(start), parse_time(end)
+    return (end - start).total_seconds() if start and end else None
+
+def step_phases(execution, dependencies):
+    """
+    Per finished step: wait (dependencies done -> step start), queue (step
+    start -> job start), run (job), wrap-up (job end -> step end) and total
+    """
+    steps = {s['StepName']: s for s in execution['Steps'] if s.get('StartTime') and s.get('EndTime')}
+    phases = {}
+    for name, step in steps.items():
+        upstream_ends = [parse_time(steps[d]['EndTime']) for d in dependencies.get(name, ()) if d in steps]
+        ready = max(upstream_ends) if upstream_ends else parse_time(execution['StartTime'] or step['StartTime'])
+        total = seconds(step['StartTime'], step['EndTime'])
+        if step.get('JobStartTime') and step.get('JobEndTime'):
+            queue = seconds(step['StartTime'], step['JobStartTime'])
+            run = seconds(step['JobStartTime'], step['JobEndTime'])
+            wrap_up = seconds(step['JobEndTime'], step['EndTime'])
+        else:
+            queue, run, wrap_up = 0.0, total, 0.0
+        phases[name] = {
+            'wait': max(0.0, (parse_time(step['StartTime']) - ready).total_seconds()),
+            'queue': queue,
+            'run': run,
+            'wrap_up': wrap_up,
+            'total': total,
+            'cache_hit': step.get('CacheHit', False),
+            'status': step['StepStatus'],
+        }
+    return phases
+
+def critical_path(execution, dependencies):
+    """
+    Chain of steps that determined the execution's end time: start from the
+    last step to finish and repeatedly step back to the dependency that
+    finished last
+    """
+    steps = {s['StepName']: s for s in execution['Steps'] if s.get('EndTime')}
+    if not steps:
+        return []
+    name = max(steps, key=lambda n: parse_time(steps[n]['EndTime']))
+    path = [name]
+    while True:
+        upstream = [d for d in dependencies.get(name, ()) if d in steps]
+        if not upstream:
+            return path[::-1]
+        name = max(upstream, key=lambda n: parse_time(steps[n]['EndTime']))
+        path.append(name)
+
+def longest_path(durations, dependencies):
+    """
+    Critical path through the DAG with the given per-step durations
+    (longest path by dynamic programming over a topological order)
+    """
+    finish, previous = {}, {}
+
+    def visit(name):
+        if name not in finish:
+            upstream = [d for d in dependencies.get(name, ()) if d in durations]
+            best = max(upstream, key=visit, default=None)
+            previous[name] = best
+            finish[name] = (finish[best] if best else 0.0) + durations[name]
+        return finish[name]
+
+    for name in durations:
+        visit(name)
+    if not finish:
+        return [], 0.0
+    name = max(finish, key=finish.get)
+    length = finish[name]
+    path = []
+    while name:
+        path.append(name)
+        name = previous[name]
+    return path[::-1], length
+
+def summarize(values):
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    return {'count': len(values), 'p50': percentile(values, 50), 'p95': percentile(values, 95),
+            'mean': sum(values) / len(values), 'max': values[-1]}
+
+def step_statistics(all_phases):
+    """
+    Per-step duration percentiles over executed (non-cached) runs
+    """
+    by_step = {}
+    for phases in all_phases:
+        for name, phase in phases.items():
+            by_step.setdefault(name, []).append(phase)
+
+    stats = {}
+    for name, phases in by_step.items():
+        executed = [p for p in phases if not p['cache_hit']]
+        stats[name] = {
+            'runs': len(phases),
+            'cache_hit_rate': 1 - len(executed) / len(phases),
+            **{phase: summarize(p[phase] for p in executed) for phase in ('total', 'wait', 'queue', 'run', 'wrap_up')}
+        }
+    return stats
+
+def version_regressions(executions, all_phases, threshold=0.2, min_seconds=30.0):
+    """
+    Compare each pipeline version's per-step p50 with the previous version
+    (ordered by first execution); flag steps slower by more than `threshold`
+    and at least `min_seconds`
+    """
+    versions = {}
+    for execution, phases in sorted(zip(executions, all_phases), key=lambda item: item[0]['StartTime'] or ''):
+        versions.setdefault(str(execution['PipelineVersionId']), []).append(phases)
+
+    regressions = []
+    previous = None
+    for version, phases in versions.items():
+        stats = step_statistics(phases)
+        if previous:
+            prev_version, prev_stats = previous
+            for name, step in stats.items():
+                before = (prev_stats.get(name) or {}).get('total')
+                after = step['total']
+                if before and after and after['p50'] - before['p50'] >= min_seconds \
+                        and after['p50'] > before['p50'] * (1 + threshold):
+                    regressions.append({
+                        'step': name, 'from_version': prev_version, 'to_version': version,
+                        'p50_before': before['p50'], 'p50_after': after['p50'],
+                        'change': after['p50'] / before['p50'] - 1,
+                        'runs_before': before['count'], 'runs_after': after['count'],
+                    })
+        previous = (version, stats)
+    return list(versions), regressions
+
+def profile_executions(executions, regression_threshold=0.2, regression_min_seconds=30.0):
+    dependencies = dag_dependencies()
+    executions = [e for e in executions if e['Steps']]
+    all_phases = [step_phases(e, dependencies) for e in executions]
+
+    stats = step_statistics(all_phases)
+    # DAG order, then any steps the current DAG no longer has
+    stats = {name: stats[name] for name in list(dependencies) + sorted(set(stats) - set(dependencies))
+             if name in stats}
+    paths = Counter(tuple(critical_path(e, dependencies)) for e in executions)
+    end_to_end = summarize(seconds(e['StartTime'], max((s['EndTime'] for s in e['Steps'] if s.get('EndTime')),
+                                                        default=None))
+                           for e in executions)
+
+    # Expected critical path if every step took its p50 (executed runs only)
+    p50 = {name: s['total']['p50'] for name, s in stats.items() if s['total']}
+    path, length = longest_path(p50, dependencies)
+    versions, regressions = version_regressions(executions, all_phases, regression_threshold,
+                                                regression_min_seconds)
+    return {
+        'executions': len(executions),
+        'end_to_end_seconds': end_to_end,
+        'steps': stats,
+        'critical_path_p50': {'steps': path, 'seconds': length},
+        'observed_critical_paths': [{'steps': list(p), 'executions': n} for p, n in paths.most_common()],
+        'versions': versions,
+        'regressions': regressions,
+    }
+
+def fmt(stat, key='p50'):
+    return f"{stat[key]:.0f}" if stat else "-"
+
+def print_report(report):
+    print("\n" + "="*70)
+    print(f"STEP PROFILE ({report['executions']} executions)")
+    print("="*70)
+    if report['end_to_end_seconds']:
+        e2e = report['end_to_end_seconds']
+        print(f"End to end: p50 {e2e['p50']:.0f}s  p95 {e2e['p95']:.0f}s")
+
+    print(f"\n{'Step':<18}{'Runs':>6}{'Cached':>8}{'p50 (s)':>9}{'p95 (s)':>9}"
+          f"{'Wait':>7}{'Queue':>7}{'Run':>7}{'Wrap':>7}")
+    print("-"*78)
+    for name, s in report['steps'].items():
+        print(f"{name:<18}{s['runs']:>6}{s['cache_hit_rate']:>8.0%}{fmt(s['total']):>9}{fmt(s['total'], 'p95'):>9}"
+              f"{fmt(s['wait']):>7}{fmt(s['queue']):>7}{fmt(s['run']):>7}{fmt(s['wrap_up']):>7}")
+    print("(Wait/Queue/Run/Wrap are p50 seconds: scheduling, instance start-up, job, and post-job)")
+
+    critical = report['critical_path_p50']
+    print(f"\nCritical path at p50: {' → '.join(critical['steps'])} ({critical['seconds']:.0f}s)")
+    for observed in report['observed_critical_paths'][:3]:
+        print(f"   observed in {observed['executions']} executions: {' → '.join(observed['steps'])}")
+
+    print(f"\nPipeline versions: {len(report['versions'])}")
+    if report['regressions']:
+        print("⚠️  Regressions:")
+        for r in report['regressions']:
+            print(f"   {r['step']}: {r['p50_before']:.0f}s → {r['p50_after']:.0f}s ({r['change']:+.0%}) "
+                  f"between versions {r['from_version']} and {r['to_version']}")
+    else:
+        print("✅ No step regressions between versions")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Profile pipeline step timings across executions")
+    parser.add_argument('--pipeline-name', type=str, default=PIPELINE_NAME)
+    parser.add_argument('--max-executions', type=int, default=0, help='Most recent N executions (0 = all)')
+    parser.add_argument('--cache-dir', type=str, default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--local-store', type=str, default=None,
+                        help='Profile local_pipeline.py runs from this store instead of SageMaker')
+    parser.add_argument('--regression-threshold', type=float, default=0.2,
+                        help='Flag steps whose p50 grew by more than this fraction between versions')
+    parser.add_argument('--regression-min-seconds', type=float, default=30.0)
+    parser.add_argument('--json-out', type=str, default=None)
+
+    args = parser.parse_args()
+
+    if args.local_store:
+        executions = load_local_history(args.local_store)
+    else:
+        executions = fetch_history(args.pipeline_name, ProfileCache(args.cache_dir, args.pipeline_name),
+                                   max_executions=args.max_executions or None)
+    if not executions:
+        print("No finished executions to profile")
+        sys.exit(1)
+
+    report = profile_executions(executions, args.regression_threshold, args.regression_min_seconds)
+    print_report(report)
+
+    if args.json_out:
+        with open(args.json_out, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.json_out}")
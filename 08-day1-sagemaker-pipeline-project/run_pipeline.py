@@ -5,10 +5,15 @@ import boto3
 import sagemaker
 import time
 import json
+from botocore.config import Config
+
+from execution_watcher import ExecutionWatcher
 
 # Get pipeline
 region = boto3.Session().region_name
-sm_client = boto3.client('sagemaker', region_name=region)
+# Adaptive client-side retries absorb throttling when many watchers share the account quota
+sm_client = boto3.client('sagemaker', region_name=region,
+                         config=Config(retries={'mode': 'adaptive', 'max_attempts': 10}))
 
 pipeline_name = "MLOpsPipeline"
 
@@ -41,84 +46,77 @@ try:
     
     # Monitor execution
     print(f"\n⏳ Pipeline is running (will take ~15-20 minutes)")
-    print("Monitoring status every 60 seconds...")
+    print("Watching status with adaptive polling (2-60s)...")
     print("(Press Ctrl+C to stop monitoring, pipeline will continue running)\n")
     
+    def show_progress(execution, changes):
+        # Print status
+        print(f"\r[{time.strftime('%H:%M:%S')}] Pipeline: {execution.status}  ", end='')
+        
+        # Show step progress
+        step_summary = []
+        for step in execution.ordered_steps():
+            step_status = step['StepStatus']
+            if step_status == 'Executing':
+                emoji = "⏳"
+            elif step_status == 'Succeeded':
+                emoji = "✅"
+            elif step_status == 'Failed':
+                emoji = "❌"
+            else:
+                emoji = "⏸️"
+            step_summary.append(f"{emoji} {step['StepName']}")
+        
+        print(f" | {' '.join(step_summary)}", end='', flush=True)
+    
     try:
-        while True:
-            # Get status
-            desc = sm_client.describe_pipeline_execution(
-                PipelineExecutionArn=execution_arn
-            )
-            
-            status = desc['PipelineExecutionStatus']
-            
-            # Get step details
-            steps = sm_client.list_pipeline_execution_steps(
-                PipelineExecutionArn=execution_arn
-            )
-            
-            # Print status
-            print(f"\r[{time.strftime('%H:%M:%S')}] Pipeline: {status}  ", end='')
-            
-            # Show step progress
-            step_summary = []
-            for step in steps['PipelineExecutionSteps']:
-                step_status = step['StepStatus']
-                if step_status == 'Executing':
-                    emoji = "⏳"
-                elif step_status == 'Succeeded':
-                    emoji = "✅"
-                elif step_status == 'Failed':
-                    emoji = "❌"
-                else:
-                    emoji = "⏸️"
-                step_summary.append(f"{emoji} {step['StepName']}")
-            
-            print(f" | {' '.join(step_summary[:3])}", end='', flush=True)
+        watcher = ExecutionWatcher(sm_client)
+        execution = watcher.watch(execution_arn)
+        watcher.run(on_change=show_progress)
+        
+        status = execution.status
+        steps = execution.ordered_steps()
+        
+        print(f"\n\n{'='*70}")
+        print(f"Pipeline {status}!")
+        print(f"{'='*70}")
+        
+        # Show detailed results
+        print("\nStep Results:")
+        for step in steps:
+            print(f"  {step['StepName']}: {step['StepStatus']}")
             
-            # Check if complete
-            if status in ['Succeeded', 'Failed', 'Stopped']:
-                print(f"\n\n{'='*70}")
-                print(f"Pipeline {status}!")
-                print(f"{'='*70}")
-                
-                # Show detailed results
-                print("\nStep Results:")
-                for step in steps['PipelineExecutionSteps']:
-                    print(f"  {step['StepName']}: {step['StepStatus']}")
+            if step['StepStatus'] == 'Failed' and 'FailureReason' in step:
+                print(f"    Error: {step['FailureReason']}")
+        
+        # Try to get metrics
+        print("\nFetching model metrics...")
+        for step in steps:
+            if step['StepName'] == 'EvaluateModel' and step['StepStatus'] == 'Succeeded':
+                if 'Metadata' in step and 'ProcessingJob' in step['Metadata']:
+                    job_name = step['Metadata']['ProcessingJob']['Arn'].split('/')[-1]
                     
-                    if step['StepStatus'] == 'Failed' and 'FailureReason' in step:
-                        print(f"    Error: {step['FailureReason']}")
-                
-                # Try to get metrics
-                print("\nFetching model metrics...")
-                for step in steps['PipelineExecutionSteps']:
-                    if step['StepName'] == 'EvaluateModel' and step['StepStatus'] == 'Succeeded':
-                        if 'Metadata' in step and 'ProcessingJob' in step['Metadata']:
-                            job_name = step['Metadata']['ProcessingJob']['Arn'].split('/')[-1]
-                            
-                            try:
-                                job_desc = sm_client.describe_processing_job(ProcessingJobName=job_name)
-                                s3_uri = job_desc['ProcessingOutputConfig']['Outputs'][0]['S3Output']['S3Uri']
-                                
-                                # Download metrics
-                                s3 = boto3.client('s3')
-                                bucket = s3_uri.split('/')[2]
-                                key = '/'.join(s3_uri.split('/')[3:]) + '/evaluation.json'
-                                
-                                obj = s3.get_object(Bucket=bucket, Key=key)
-                                metrics = json.loads(obj['Body'].read().decode('utf-8'))
-                                
-                                print("\n📊 Model Metrics:")
-                                for k, v in metrics.items():
-                                    print(f"  {k}: {v:.4f}")
-                            except Exception as e:
-                                print(f"  Could not fetch metrics: {e}")
-                
-                break
-            
-            time.sleep(60)
+                    try:
+                        job_desc = sm_client.describe_processing_job(ProcessingJobName=job_name)
+                        s3_uri = job_desc['ProcessingOutputConfig']['Outputs'][0]['S3Output']['S3Uri']
+                        
+                        # Download metrics
+                        s3 = boto3.client('s3')
+                        bucket = s3_uri.split('/')[2]
+                        key = '/'.join(s3_uri.split('/')[3:]) + '/evaluation.json'
+                        
+                        obj = s3.get_object(Bucket=bucket, Key=key)
+                        metrics = json.loads(obj['Body'].read().decode('utf-8'))
+                        
+                        print("\n📊 Model Metrics:")
+                        for k, v in metrics.items():
+                            # Skip the nested sweep/calibration/slice sections
+                            if isinstance(v, (int, float)):
+                                print(f"  {k}: {v:.4f}")
+                    except Exception as e:
+                        print(f"  Could not fetch metrics: {e}")
+        
+        print(f"\nAPI calls while watching: {watcher.api_calls}")
             
     except KeyboardInterrupt:
         print(f"\n\n⏸️  Monitoring stopped (pipeline still running)")
@@ -0,0 +1,284 @@
+"""
+Neo vs original benchmark harness
+
+- Interleaved: every caller sends one request to each endpoint per block, in
+  a random order, so network drift during the run hits both endpoints alike
+- Concurrency sweep: the same run at each --concurrency level (closed loop),
+  reporting the combined call rate at each level; --isolated-throughput adds
+  a run per endpoint on its own, since interleaved calls share one rate
+- Calls go through a client with no retries, so retries and backoff sleeps
+  never hide inside a latency and failures show up as errors
+- Timing with perf_counter_ns; unrecorded warm-up blocks before each level
+- Percentiles with bootstrap confidence intervals; speedup = ratio of
+  medians with a CI from resampling whole blocks (keeping the pairing),
+  significant when that CI excludes 1, plus a Wilcoxon signed-rank test on
+  the per-block differences
+- JSON export (--output), and --baseline to compare with an earlier export
+
+    python benchmark_harness.py --concurrency 1 4 16 --requests 300 --output neo-bench.json
+    python benchmark_harness.py --baseline neo-bench.json
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from inference_client import RuntimeClient, endpoint_invoker
+
+PERCENTILES = (50, 95, 99)
+
+def bootstrap_ci(samples, statistic, n_boot=2000, confidence=0.95, rng=None):
+    """
+    Percentile bootstrap CI of statistic(resampled array of shape (n_boot, n))
+    """
+    rng = rng or np.random.default_rng(0)
+    samples = np.asarray(samples)
+    estimates = statistic(samples[rng.integers(0, len(samples), (n_boot, len(samples)))])
+    alpha = (1 - confidence) / 2
+    return float(np.quantile(estimates, alpha)), float(np.quantile(estimates, 1 - alpha))
+
+def wilcoxon_signed_rank_p(a, b):
+    """
+    Two-sided Wilcoxon signed-rank p-value for paired samples (normal
+    approximation; zero differences dropped, tied ranks averaged)
+    """
+    differences = np.asarray(a) - np.asarray(b)
+    differences = differences[differences != 0]
+    n = len(differences)
+    if n == 0:
+        return 1.0
+    magnitudes = np.abs(differences)
+    ranks = np.empty(n)
+    ranks[magnitudes.argsort()] = np.arange(1, n + 1)
+    # Average the ranks of tied magnitudes
+    _, inverse, counts = np.unique(magnitudes, return_inverse=True, return_counts=True)
+    ranks = (np.bincount(inverse, ranks) / counts)[inverse]
+
+    w = ranks[differences > 0].sum()
+    sigma = math.sqrt(n * (n + 1) * (2 * n + 1) / 24 - (counts ** 3 - counts).sum() / 48)
+    if sigma == 0:
+        return 1.0
+    z = (w - n * (n + 1) / 4) / sigma
+    return math.erfc(abs(z) / math.sqrt(2))
+
+def latency_stats(latencies_ms, n_boot, confidence, rng):
+    stats = {"count": len(latencies_ms), "mean": float(np.mean(latencies_ms))}
+    for q in PERCENTILES:
+        stats[f"p{q}"] = float(np.percentile(latencies_ms, q))
+        stats[f"p{q}_ci"] = bootstrap_ci(latencies_ms, lambda s, q=q: np.percentile(s, q, axis=1),
+                                         n_boot, confidence, rng)
+    return stats
+
+def speedup_stats(baseline, candidate, n_boot, confidence, rng):
+    """
+    median(baseline) / median(candidate) over paired blocks: > 1 means the
+    candidate is faster; significant when the paired bootstrap CI excludes 1
+    """
+    baseline, candidate = np.asarray(baseline), np.asarray(candidate)
+    idx = rng.integers(0, len(baseline), (n_boot, len(baseline)))
+    ratios = np.median(baseline[idx], axis=1) / np.median(candidate[idx], axis=1)
+    alpha = (1 - confidence) / 2
+    ci = (float(np.quantile(ratios, alpha)), float(np.quantile(ratios, 1 - alpha)))
+    return {
+        "speedup": float(np.median(baseline) / np.median(candidate)),
+        "ci": ci,
+        "p_value": wilcoxon_signed_rank_p(baseline, candidate),
+        "significant": not ci[0] <= 1 <= ci[1]
+    }
+
+class InterleavedRun:
+    """
+    `concurrency` callers, each sending `blocks` blocks of one request per
+    target (random order per block); latencies are kept per block so the
+    targets can be compared pairwise. Failed calls are counted, and the
+    first exception per target is kept for the report
+    """
+
+    def __init__(self, invokers, payloads, seed=0):
+        self.invokers = invokers
+        self.payloads = payloads
+        self.seed = seed
+
+    def run(self, concurrency, blocks):
+        names = list(self.invokers)
+        results = {name: [None] * (concurrency * blocks) for name in names}
+        errors = {name: 0 for name in names}
+        first_errors = {}
+        lock = threading.Lock()
+
+        def caller(worker):
+            rng = np.random.default_rng([self.seed, worker])
+            for block in range(blocks):
+                block_id = worker * blocks + block
+                payload = self.payloads[block_id % len(self.payloads)]
+                for i in rng.permutation(len(names)):
+                    name = names[i]
+                    start = time.perf_counter_ns()
+                    try:
+                        self.invokers[name](payload)
+                        results[name][block_id] = (time.perf_counter_ns() - start) / 1e6
+                    except Exception as e:
+                        with lock:
+                            errors[name] += 1
+                            first_errors.setdefault(name, f"{type(e).__name__}: {e}")
+
+        threads = [threading.Thread(target=caller, args=(w,)) for w in range(concurrency)]
+        start = time.perf_counter_ns()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = (time.perf_counter_ns() - start) / 1e9
+
+        # Blocks where any target failed are dropped from every target to keep the pairing
+        complete = [b for b in range(concurrency * blocks) if all(results[n][b] is not None for n in names)]
+        latencies = {name: np.array([results[name][b] for b in complete]) for name in names}
+        return latencies, errors, first_errors, wall
+
+def benchmark(invokers, payloads, concurrency_levels, requests, warmup, n_boot=2000, confidence=0.95, seed=0,
+              isolated=False):
+    """
+    Run every concurrency level; the first invoker is the baseline the
+    others' speedups are measured against. With isolated, each target is
+    also run on its own at every level for its throughput
+    """
+    rng = np.random.default_rng(seed)
+    runner = InterleavedRun(invokers, payloads, seed)
+    names = list(invokers)
+    levels = []
+    for concurrency in concurrency_levels:
+        blocks = max(1, -(-requests // concurrency))
+        if warmup:
+            runner.run(concurrency, max(1, -(-warmup // concurrency)))
+        latencies, errors, first_errors, wall = runner.run(concurrency, blocks)
+
+        # Every block sends each target one call, whether or not the block completed
+        level = {"concurrency": concurrency, "wall_seconds": wall,
+                 "calls_per_second": len(names) * concurrency * blocks / wall, "targets": {}, "speedup": {}}
+        for name in names:
+            # No completed blocks (e.g. an endpoint failing every call): errors only, no stats
+            stats = latency_stats(latencies[name], n_boot, confidence, rng) if len(latencies[name]) else {"count": 0}
+            stats["errors"] = errors[name]
+            stats["first_error"] = first_errors.get(name)
+            if isolated:
+                _, alone_errors, _, alone_wall = InterleavedRun({name: invokers[name]}, payloads, seed).run(
+                    concurrency, blocks)
+                # Successful calls only: fast failures are not throughput
+                stats["throughput"] = (concurrency * blocks - alone_errors[name]) / alone_wall
+                stats["throughput_errors"] = alone_errors[name]
+            stats["latencies_ms"] = latencies[name].round(3).tolist()
+            level["targets"][name] = stats
+        for name in names[1:]:
+            if len(latencies[names[0]]) and len(latencies[name]):
+                level["speedup"][name] = speedup_stats(latencies[names[0]], latencies[name], n_boot, confidence, rng)
+        levels.append(level)
+    return levels
+
+def print_level(level, baseline_name, confidence):
+    print(f"\nConcurrency {level['concurrency']} ({level['wall_seconds']:.1f}s, "
+          f"{level['calls_per_second']:.1f} calls/s across endpoints)")
+    print(f"{'Endpoint':<12}{'n':>6}{'Alone/s':>9}{'Mean':>8}" + ''.join(f"{f'p{q} [{confidence:.0%} CI]':>24}"
+                                                                    for q in PERCENTILES) + f"{'Errors':>8}")
+    print("-"*113)
+    for name, s in level['targets'].items():
+        alone = f"{s['throughput']:>9.1f}" if 'throughput' in s else f"{'-':>9}"
+        if not s['count']:
+            print(f"{name:<12}{0:>6}{alone}{'no completed blocks':>{8 + 24 * len(PERCENTILES)}}{s['errors']:>8}")
+            continue
+        cells = ''.join(f"{s[f'p{q}']:>8.1f} [{s[f'p{q}_ci'][0]:>5.1f}, {s[f'p{q}_ci'][1]:>5.1f}]" for q in PERCENTILES)
+        print(f"{name:<12}{s['count']:>6}{alone}{s['mean']:>8.1f}{cells}{s['errors']:>8}")
+    for name, s in level['targets'].items():
+        if s['errors']:
+            print(f"   ❌ {name}: {s['errors']} failed calls, first: {s['first_error']}")
+    for name, s in level['speedup'].items():
+        verdict = "significant" if s['significant'] else "not significant"
+        print(f"   {name} vs {baseline_name}: {s['speedup']:.3f}x median speedup "
+              f"[{s['ci'][0]:.3f}, {s['ci'][1]:.3f}], Wilcoxon p={s['p_value']:.2g} ({verdict})")
+
+def print_comparison(report, baseline):
+    """
+    p50 per level and endpoint against an earlier export
+    """
+    print(f"\nAgainst {baseline['timestamp']}:")
+    old_levels = {level['concurrency']: level for level in baseline['levels']}
+    for level in report['levels']:
+        old = old_levels.get(level['concurrency'])
+        if old is None:
+            continue
+        for name, s in level['targets'].items():
+            if name not in old['targets'] or not s['count'] or not old['targets'][name]['count']:
+                continue
+            before = old['targets'][name]
+            change = s['p50'] / before['p50'] - 1
+            overlap = s['p50_ci'][0] <= before['p50_ci'][1] and before['p50_ci'][0] <= s['p50_ci'][1]
+            print(f"   x{level['concurrency']:<4}{name:<12} p50 {before['p50']:.1f} → {s['p50']:.1f} ms "
+                  f"({change:+.1%}{', CIs overlap' if overlap else ', CIs disjoint'})")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Interleaved Neo vs original endpoint benchmark")
+    parser.add_argument('--endpoints', type=str, nargs=2, default=None, metavar=('ORIGINAL', 'NEO'),
+                        help='Endpoint names (default: endpoint_names.txt)')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16], help='Levels to sweep')
+    parser.add_argument('--requests', type=int, default=200, help='Recorded requests per endpoint per level')
+    parser.add_argument('--warmup', type=int, default=20, help='Unrecorded requests per endpoint per level')
+    parser.add_argument('--bootstrap', type=int, default=2000, help='Bootstrap resamples')
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--endpoint-url', type=str, default=None,
+                        help='sagemaker-runtime compatible URL, e.g. a local stand-in')
+    parser.add_argument('--isolated-throughput', action='store_true',
+                        help='Also run each endpoint alone at every level for its own calls/s')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=str, default=None, help='Write the results as JSON')
+    parser.add_argument('--baseline', type=str, default=None, help='Earlier --output to compare against')
+
+    args = parser.parse_args()
+
+    if args.endpoints:
+        original_endpoint_name, neo_endpoint_name = args.endpoints
+    else:
+        with open('endpoint_names.txt', 'r') as f:
+            original_endpoint_name, neo_endpoint_name = f.read().strip().split('\n')[:2]
+
+    # One attempt per call: a retry or backoff sleep would count as endpoint latency
+    runtime_client = RuntimeClient(pool_size=max(args.concurrency), retry_mode='standard', max_attempts=1,
+                                   endpoint_url=args.endpoint_url)
+    invokers = {
+        "original": endpoint_invoker(original_endpoint_name, runtime_client),
+        "neo": endpoint_invoker(neo_endpoint_name, runtime_client)
+    }
+
+    # Same test data as the other benchmark scripts
+    np.random.seed(42)
+    payloads = [','.join(map(str, np.random.randn(5).tolist())) for _ in range(100)]
+
+    print(f"Original: {original_endpoint_name}")
+    print(f"Neo: {neo_endpoint_name}")
+    print(f"Concurrency {', '.join(map(str, args.concurrency))}; {args.requests} requests per endpoint per level, "
+          f"{args.warmup} warm-up")
+
+    levels = benchmark(invokers, payloads, args.concurrency, args.requests, args.warmup,
+                       args.bootstrap, args.confidence, args.seed, args.isolated_throughput)
+    for level in levels:
+        print_level(level, "original", args.confidence)
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec='seconds'),
+        "endpoints": {"original": original_endpoint_name, "neo": neo_endpoint_name},
+        "config": {k: getattr(args, k) for k in ('concurrency', 'requests', 'warmup', 'bootstrap', 'confidence', 'seed',
+                                                  'isolated_throughput')},
+        "levels": levels
+    }
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            print_comparison(report, json.load(f))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📝 Results saved to: {args.output}")
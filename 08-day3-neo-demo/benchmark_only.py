@@ -4,10 +4,15 @@ Benchmark deployed models (run after deploy_and_benchmark.py errored)
 import boto3
 import time
 import numpy as np
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from inference_client import CSVBatcher, endpoint_invoker, shared_runtime_client
 
 # Configuration
 region = boto3.Session().region_name
-runtime_client = boto3.client('sagemaker-runtime', region_name=region)
+runtime_client = shared_runtime_client(region=region)
 
 print(f"Region: {region}")
 
@@ -92,6 +97,20 @@ print(f"   Average: {neo_avg:.1f} ms")
 print(f"   P50: {neo_p50:.1f} ms")
 print(f"   P95: {neo_p95:.1f} ms")
 
+# ============================================================
+# Batched scoring
+# ============================================================
+print("\n4️⃣  Scoring all 100 samples as micro-batches (one call per up to 50 rows)...")
+
+for label, endpoint_name, latencies in (('Original', original_endpoint_name, original_latencies),
+                                       ('Neo', neo_endpoint_name, neo_latencies)):
+    with CSVBatcher(endpoint_invoker(endpoint_name, runtime_client), max_rows=50) as batcher:
+        start = time.time()
+        batcher.predict_many(test_samples)
+        elapsed = (time.time() - start) * 1000
+    print(f"   {label}: {elapsed:.1f} ms in {batcher.stats()['requests']} calls - "
+          f"{elapsed / len(test_samples):.2f} ms/row vs {sum(latencies) / len(latencies):.1f} ms/row one at a time")
+
 # ============================================================
 # Results Summary
 # ============================================================
@@ -9,6 +9,11 @@ from sagemaker.serializers import CSVSerializer
 from sagemaker.deserializers import JSONDeserializer
 import time
 import numpy as np
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from inference_client import shared_runtime_client
 
 # ============================================================
 # CONFIGURATION - Update role with your SageMaker execution role
@@ -19,7 +24,7 @@ role = "arn:aws:iam::854757836160:role/service-role/AmazonSageMaker-ExecutionRol
 region = boto3.Session().region_name
 sagemaker_session = sagemaker.Session()
 sagemaker_client = boto3.client('sagemaker', region_name=region)
-runtime_client = boto3.client('sagemaker-runtime', region_name=region)
+runtime_client = shared_runtime_client(region=region)
 
 bucket = sagemaker_session.default_bucket()
 
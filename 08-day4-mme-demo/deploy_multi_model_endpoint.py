@@ -9,6 +9,9 @@ import time
 import tarfile
 import os
 
+from model_pack import copy_artifacts
+from mme_prefetch import Prefetcher, RequestLog, endpoint_warmer, print_warm_up
+
 # ============================================================
 # CONFIGURATION
 # ============================================================
@@ -22,6 +25,12 @@ s3_client = boto3.client('s3', region_name=region)
 bucket = sagemaker_session.default_bucket()
 prefix = 'mme-demo'
 
+# Warm-up after deploy: the PREFETCH_TOP_K most requested models in the request
+# log (the first ones deployed when there is no log yet), plus VIP models that
+# `python mme_prefetch.py` keeps re-warming on every cycle
+PREFETCH_TOP_K = 5
+PINNED_MODELS = []  # e.g. ['model_balanced.tar.gz']
+
 print(f"Region: {region}")
 print(f"Bucket: {bucket}")
 
@@ -39,24 +48,16 @@ print("="*70)
 mme_model_prefix = f'{prefix}/mme-models'
 print(f"\nMME model location: s3://{bucket}/{mme_model_prefix}/")
 
-# Copy each model to the MME location with a simple name
-for model_name, artifact_path in model_artifacts.items():
-    # Parse source location
-    source_path = artifact_path.replace(f's3://{bucket}/', '')
-    
-    # Destination: simple name like "model_conservative.tar.gz"
-    dest_key = f'{mme_model_prefix}/{model_name}.tar.gz'
-    
-    print(f"\n   Copying {model_name}...")
-    print(f"   From: {source_path}")
-    print(f"   To: {dest_key}")
-    
-    s3_client.copy_object(
-        Bucket=bucket,
-        CopySource={'Bucket': bucket, 'Key': source_path},
-        Key=dest_key
-    )
-    print(f"   ✅ Copied")
+# Copy each model to the MME location with a simple name ("model_conservative.tar.gz"),
+# in parallel; big artifacts are copied in parts and unchanged ones are skipped
+copies = [(artifact_path, bucket, f'{mme_model_prefix}/{model_name}.tar.gz')
+          for model_name, artifact_path in model_artifacts.items()]
+start = time.time()
+results = copy_artifacts(s3_client, copies)
+for dest_key, status, seconds in results:
+    print(f"   {'✅ Copied' if status == 'copied' else '⏭️  Unchanged'}: {dest_key} ({seconds:.1f}s)")
+print(f"\n   {sum(r[1] == 'copied' for r in results)} copied, "
+      f"{sum(r[1] == 'unchanged' for r in results)} unchanged in {time.time() - start:.1f}s")
 
 print("\n" + "="*70)
 print("STEP 2: CREATE MULTI-MODEL ENDPOINT")
@@ -123,12 +124,18 @@ while True:
         print(f"   ⏳ Status: {status}...")
         time.sleep(30)
 
+# Pre-warm so the first real requests don't pay the cold load
+print(f"\n4️⃣  Pre-warming top {PREFETCH_TOP_K} models" + (f" + {len(PINNED_MODELS)} pinned" if PINNED_MODELS else ""))
+prefetcher = Prefetcher(endpoint_warmer(endpoint_name), RequestLog(), PREFETCH_TOP_K, PINNED_MODELS)
+print_warm_up(prefetcher.warm_up(fallback=[f"{name}.tar.gz" for name in model_artifacts]))
+
 # Save endpoint info for testing and cleanup
 endpoint_info = {
     'endpoint_name': endpoint_name,
     'endpoint_config_name': endpoint_config_name,
     'model_name': model_name,
-    'models': list(model_artifacts.keys())
+    'models': list(model_artifacts.keys()),
+    'pinned_models': PINNED_MODELS
 }
 
 with open('endpoint_info.json', 'w') as f:
@@ -150,6 +157,7 @@ Models available:
 📝 Endpoint info saved to: endpoint_info.json
 
 💡 Next step: python test_mme.py
+🔥 Keep popular models warm: python mme_prefetch.py --top-k {PREFETCH_TOP_K}
 """)
 
 print("\n" + "-"*70)
@@ -0,0 +1,508 @@
+"""
+Local multi-model server emulating a SageMaker Multi-Model Endpoint
+
+Loads <model>.tar.gz from an MME-style prefix (a local directory or an
+s3://bucket/prefix/), or a model pack from model_pack.py, the first time a
+model is requested, keeps loaded models in an LRU cache bounded by memory,
+and serves TargetModel requests over HTTP:
+
+  POST /invocations              header X-Amzn-SageMaker-Target-Model: model_fast.tar.gz
+  POST /models/<target>/invoke   same, target in the path
+  POST /models/<target>/load     prefetch without counting as a request
+  POST /models/<target>/pin      load and never evict (DELETE to unpin)
+  GET  /ping
+  GET  /models                   loaded models, least recently used first
+  GET  /metrics                  cache hits/misses/evictions and load-time histograms (JSON)
+
+Use it to size the cache and try model packing offline before paying for an endpoint:
+
+    python train_multiple_models.py --mode local-shared --copies 40
+    python local_mme_server.py --model-prefix mme-models --cache-mb 2 --port 8080
+    python local_mme_server.py --model-prefix mme-models.pack --cache-mb 2 --port 8080
+"""
+import argparse
+import bisect
+import io
+import json
+import os
+import tarfile
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+import numpy as np
+
+from mme_prefetch import REQUEST_LOG, RequestLog
+
+TARGET_MODEL_HEADER = 'X-Amzn-SageMaker-Target-Model'
+# Tells a client whether its request had to load the model (cold) or not (warm)
+CACHE_STATUS_HEADER = 'X-Model-Cache'
+
+# Load-time histogram bucket upper bounds (ms); a final bucket catches the rest
+LOAD_MS_EDGES = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+# Percentiles come from log-linear microsecond buckets, 2**bits per power of two (~3% error)
+LOAD_SUB_BUCKET_BITS = 5
+
+class ModelNotFound(Exception):
+    pass
+
+class ModelTooLarge(Exception):
+    pass
+
+def extract_model(archive_bytes):
+    """
+    The `xgboost-model` member of a model.tar.gz
+    """
+    with tarfile.open(fileobj=io.BytesIO(archive_bytes), mode='r:gz') as tar:
+        return tar.extractfile('xgboost-model').read()
+
+class LocalModelRepository:
+    """
+    MME prefix on local disk: <root>/<target>
+    """
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+
+    def fetch_model(self, target):
+        """
+        (model bytes, bytes read)
+        """
+        path = os.path.abspath(os.path.join(self.root, target))
+        if not path.startswith(self.root + os.sep) or not os.path.isfile(path):
+            raise ModelNotFound(target)
+        with open(path, 'rb') as f:
+            archive = f.read()
+        return extract_model(archive), len(archive)
+
+    def list_targets(self):
+        return sorted(f for f in os.listdir(self.root) if f.endswith('.tar.gz'))
+
+class S3ModelRepository:
+    """
+    MME prefix in S3: s3://<bucket>/<prefix>/<target>
+    """
+
+    def __init__(self, uri):
+        import boto3
+        self.bucket, _, prefix = uri[len('s3://'):].partition('/')
+        self.prefix = prefix.rstrip('/')
+        self.s3 = boto3.client('s3')
+
+    def _key(self, target):
+        return f"{self.prefix}/{target}" if self.prefix else target
+
+    def fetch_model(self, target):
+        try:
+            archive = self.s3.get_object(Bucket=self.bucket, Key=self._key(target))['Body'].read()
+        except self.s3.exceptions.NoSuchKey:
+            raise ModelNotFound(target)
+        return extract_model(archive), len(archive)
+
+    def list_targets(self):
+        targets = []
+        for page in self.s3.get_paginator('list_objects_v2').paginate(Bucket=self.bucket, Prefix=self._key('')):
+            targets += [obj['Key'][len(self._key('')):] for obj in page.get('Contents', [])
+                        if obj['Key'].endswith('.tar.gz')]
+        return sorted(targets)
+
+class PackedModelRepository:
+    """
+    Every model in one pack file (local or s3://), see model_pack.py
+    """
+
+    def __init__(self, uri):
+        from model_pack import open_pack
+        self.reader = open_pack(uri)
+
+    def fetch_model(self, target):
+        if target not in self.reader.index:
+            raise ModelNotFound(target)
+        return self.reader.read(target)
+
+    def list_targets(self):
+        return self.reader.targets()
+
+def open_repository(prefix):
+    if prefix.endswith('.pack'):
+        return PackedModelRepository(prefix)
+    if prefix.startswith('s3://'):
+        return S3ModelRepository(prefix)
+    return LocalModelRepository(prefix)
+
+def load_booster(model_bytes):
+    """
+    XGBoost booster from raw model bytes
+    """
+    import xgboost as xgb
+
+    booster = xgb.Booster()
+    booster.load_model(bytearray(model_bytes))
+    return booster
+
+class Histogram:
+    """
+    Fixed-bucket histogram with exact count/sum/max, and percentiles from
+    log-linear buckets (as in mme_loadgen's HdrHistogram): memory grows with
+    the range of load times, not with the number of loads
+    """
+
+    def __init__(self, edges=LOAD_MS_EDGES):
+        self.edges = edges
+        self.counts = [0] * (len(edges) + 1)
+        self.fine_counts = {}
+        self.total = 0
+        self.sum = 0.0
+        self.max = None
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.edges, value)] += 1
+        micros = max(0, int(value * 1000))
+        shift = max(0, micros.bit_length() - LOAD_SUB_BUCKET_BITS)
+        index = (shift << LOAD_SUB_BUCKET_BITS) | (micros >> shift)
+        self.fine_counts[index] = self.fine_counts.get(index, 0) + 1
+        self.total += 1
+        self.sum += value
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, q):
+        """
+        Nearest-rank percentile, as the midpoint of its bucket (capped at max)
+        """
+        if not self.total:
+            return None
+        rank = max(1, -(-q * self.total // 100))
+        seen = 0
+        for index in sorted(self.fine_counts):
+            seen += self.fine_counts[index]
+            if seen >= rank:
+                shift, sub = index >> LOAD_SUB_BUCKET_BITS, index & ((1 << LOAD_SUB_BUCKET_BITS) - 1)
+                return min(((sub << shift) + ((1 << shift) >> 1)) / 1000, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.total,
+            "sum": self.sum,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "max": self.max,
+            "buckets": [{"le": edge, "count": count} for edge, count in zip(self.edges, self.counts)]
+                       + [{"le": None, "count": self.counts[-1]}]
+        }
+
+class ModelCache:
+    """
+    LRU cache of loaded models, bounded by total model bytes (and optionally
+    a model count), like the MME container's memory-driven unloading.
+
+    Concurrent requests for a model that is not loaded share one load. Pinned
+    models are never evicted. A model that does not fit next to the pinned
+    ones is refused (the endpoint would answer 507 Insufficient Storage).
+    """
+
+    def __init__(self, repository, max_bytes, max_models=0, load_delay=0.0):
+        self.repository = repository
+        self.max_bytes = max_bytes
+        self.max_models = max_models
+        # Extra seconds per load, to stand in for S3 download time with a local prefix
+        self.load_delay = load_delay
+
+        self.lock = threading.Lock()
+        self.models = OrderedDict()
+        self.used_bytes = 0
+        self.loading = {}
+        self.pinned = set()
+
+        self.hits = 0
+        self.misses = 0
+        self.prefetches = 0
+        self.evictions = 0
+        self.load_failures = 0
+        self.read_bytes = 0
+        self.load_ms = Histogram()
+        self.model_stats = {}
+
+    def _stats(self, target):
+        return self.model_stats.setdefault(target, {"hits": 0, "misses": 0, "loads": 0, "evictions": 0,
+                                                    "size_bytes": None, "read_bytes": 0, "load_ms": Histogram()})
+
+    def get(self, target, prefetch=False):
+        """
+        (booster, cache hit?) for a target model, loading it on a miss;
+        prefetches count separately from requests
+        """
+        with self.lock:
+            entry = self.models.get(target)
+            if prefetch:
+                self.prefetches += 1
+            if entry is not None:
+                self.models.move_to_end(target)
+                if not prefetch:
+                    self.hits += 1
+                    self._stats(target)["hits"] += 1
+                return entry[0], True
+            if not prefetch:
+                self.misses += 1
+                self._stats(target)["misses"] += 1
+            pending = self.loading.get(target)
+            if pending is None:
+                pending = self.loading[target] = {"event": threading.Event(), "result": None, "error": None}
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            pending["event"].wait()
+            if pending["error"]:
+                raise pending["error"]
+            return pending["result"], False
+
+        try:
+            booster = self._load(target)
+            pending["result"] = booster
+            return booster, False
+        except Exception as e:
+            pending["error"] = e
+            raise
+        finally:
+            with self.lock:
+                del self.loading[target]
+            pending["event"].set()
+
+    def _load(self, target):
+        start = time.perf_counter()
+        try:
+            model_bytes, read_bytes = self.repository.fetch_model(target)
+            if self.load_delay:
+                time.sleep(self.load_delay)
+            booster = load_booster(model_bytes)
+            size = len(model_bytes)
+        except Exception:
+            with self.lock:
+                self.load_failures += 1
+            raise
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        with self.lock:
+            stats = self._stats(target)
+            stats["loads"] += 1
+            stats["size_bytes"] = size
+            stats["read_bytes"] += read_bytes
+            self.read_bytes += read_bytes
+            stats["load_ms"].add(elapsed_ms)
+            self.load_ms.add(elapsed_ms)
+            self._evict_for(target, size)
+            self.models[target] = (booster, size)
+            self.used_bytes += size
+        return booster
+
+    def _evict_for(self, target, size):
+        # Caller holds the lock
+        pinned_bytes = sum(self.models[t][1] for t in self.pinned if t in self.models)
+        if pinned_bytes + size > self.max_bytes or (self.max_models and len(self.pinned) >= self.max_models):
+            raise ModelTooLarge(f"{target} needs {size:,} bytes, cache holds {self.max_bytes:,} "
+                                f"({pinned_bytes:,} pinned)")
+        victims = [t for t in self.models if t not in self.pinned]
+        while self.used_bytes + size > self.max_bytes or (self.max_models and len(self.models) >= self.max_models):
+            victim = victims.pop(0)
+            self.used_bytes -= self.models.pop(victim)[1]
+            self.evictions += 1
+            self.model_stats[victim]["evictions"] += 1
+
+    def pin(self, target):
+        """
+        Load a model if needed and keep it loaded until unpinned
+        """
+        while True:
+            self.get(target, prefetch=True)
+            with self.lock:
+                if target in self.models:
+                    self.pinned.add(target)
+                    return
+
+    def unpin(self, target):
+        with self.lock:
+            self.pinned.discard(target)
+
+    def loaded(self):
+        with self.lock:
+            return [{"model": target, "size_bytes": size, "pinned": target in self.pinned}
+                    for target, (_, size) in self.models.items()]
+
+    def metrics(self):
+        with self.lock:
+            requests = self.hits + self.misses
+            return {
+                "cache": {
+                    "max_bytes": self.max_bytes,
+                    "used_bytes": self.used_bytes,
+                    "max_models": self.max_models or None,
+                    "models_loaded": len(self.models),
+                    "models_pinned": len(self.pinned),
+                    "hits": self.hits,
+                    "misses": self.misses,
+                    "evictions": self.evictions,
+                    "load_failures": self.load_failures,
+                    "prefetches": self.prefetches,
+                    "read_bytes": self.read_bytes,
+                    "hit_rate": self.hits / requests if requests else None
+                },
+                "load_ms": self.load_ms.to_dict(),
+                "models": {
+                    target: dict(stats, load_ms=stats["load_ms"].to_dict(), loaded=target in self.models,
+                                 pinned=target in self.pinned)
+                    for target, stats in sorted(self.model_stats.items())
+                }
+            }
+
+def predict_csv(booster, body):
+    """
+    text/csv rows in (features only), one probability per line out
+    """
+    rows = np.loadtxt(io.StringIO(body.decode('utf-8')), delimiter=',', dtype=np.float32, ndmin=2)
+    predictions = booster.inplace_predict(rows)
+    return '\n'.join(f"{p:.6f}" for p in np.ravel(predictions)).encode()
+
+class MultiModelHandler(BaseHTTPRequestHandler):
+    server_version = 'LocalMME/1.0'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, body, content_type='application/json', headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body, indent=2).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/ping':
+            self._send(200, b'', 'text/plain')
+        elif self.path == '/models':
+            self._send(200, {"models": self.server.cache.loaded()})
+        elif self.path == '/metrics':
+            self._send(200, self.server.cache.metrics())
+        else:
+            self._send(404, {"error": f"No route for GET {self.path}"})
+
+    def _model_route(self):
+        """
+        (target, action) for /models/<target>/<action>
+        """
+        if not self.path.startswith('/models/'):
+            return None, None
+        target, _, action = self.path[len('/models/'):].rpartition('/')
+        return unquote(target), action
+
+    def _guarded(self, target, load):
+        """
+        (True, load()) or (False, None) once an error response has been sent
+        """
+        try:
+            return True, load()
+        except ModelNotFound:
+            self._send(404, {"error": f"Model not found: {target}"})
+        except ModelTooLarge as e:
+            self._send(507, {"error": str(e)})
+        except Exception as e:
+            self._send(500, {"error": f"Failed to load {target}: {e}"})
+        return False, None
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        target, action = self._model_route()
+        if self.path == '/invocations':
+            target, action = self.headers.get(TARGET_MODEL_HEADER), 'invoke'
+            if not target:
+                self._send(400, {"error": f"Missing {TARGET_MODEL_HEADER} header"})
+                return
+        cache = self.server.cache
+        if action in ('load', 'pin'):
+            load = cache.pin if action == 'pin' else lambda t: cache.get(t, prefetch=True)
+            if self._guarded(target, lambda: load(target))[0]:
+                self._send(200, {"model": target, "pinned": target in cache.pinned})
+            return
+        if action != 'invoke':
+            self._send(404, {"error": f"No route for POST {self.path}"})
+            return
+
+        start = time.perf_counter()
+        ok, loaded = self._guarded(target, lambda: cache.get(target))
+        if not ok:
+            return
+        booster, hit = loaded
+        try:
+            prediction = predict_csv(booster, body)
+        except ValueError as e:
+            self._send(400, {"error": f"Bad text/csv payload: {e}"})
+            return
+        self._send(200, prediction, 'text/csv', {CACHE_STATUS_HEADER: 'hit' if hit else 'miss'})
+        if self.server.request_log:
+            self.server.request_log.record(target, (time.perf_counter() - start) * 1000, 'hit' if hit else 'miss')
+
+    def do_DELETE(self):
+        target, action = self._model_route()
+        if action != 'pin':
+            self._send(404, {"error": f"No route for DELETE {self.path}"})
+            return
+        self.server.cache.unpin(target)
+        self._send(200, {"model": target, "pinned": False})
+
+def create_server(model_prefix, cache_bytes, host='127.0.0.1', port=8080, max_models=0, load_delay=0.0,
+                  verbose=False, request_log=None):
+    """
+    Multi-model server (not yet serving); server.cache is its ModelCache.
+    Invocations are appended to `request_log` (a path) for mme_prefetch.py.
+    """
+    server = ThreadingHTTPServer((host, port), MultiModelHandler)
+    server.daemon_threads = True
+    server.cache = ModelCache(open_repository(model_prefix), cache_bytes, max_models, load_delay)
+    server.verbose = verbose
+    server.request_log = RequestLog(request_log) if request_log else None
+    return server
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Local Multi-Model Endpoint with an LRU model cache")
+    parser.add_argument('--model-prefix', type=str, default='mme-models',
+                        help='Directory or s3://bucket/prefix/ holding <model>.tar.gz, or a .pack file')
+    parser.add_argument('--cache-mb', type=float, default=256,
+                        help='Memory budget for loaded models (uncompressed model bytes)')
+    parser.add_argument('--max-models', type=int, default=0, help='Also cap loaded models (0 = no cap)')
+    parser.add_argument('--load-delay-ms', type=float, default=0,
+                        help='Added to every load, to mimic S3 download time with a local prefix')
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--pin', type=str, action='append', default=[], metavar='TARGET',
+                        help='Load a model at startup and never evict it (repeatable)')
+    parser.add_argument('--request-log', type=str, default=None,
+                        help=f'Append invocations here for mme_prefetch.py (e.g. {REQUEST_LOG})')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+
+    args = parser.parse_args()
+
+    server = create_server(args.model_prefix, int(args.cache_mb * 1024 * 1024), args.host, args.port,
+                           args.max_models, args.load_delay_ms / 1000, args.verbose, args.request_log)
+    for target in args.pin:
+        server.cache.pin(target)
+    targets = server.cache.repository.list_targets()
+    print(f"🚀 Local MME on http://{args.host}:{args.port}")
+    print(f"   Models: {len(targets)} under {args.model_prefix}")
+    print(f"   Cache: {args.cache_mb:g} MB" + (f", at most {args.max_models} models" if args.max_models else ""))
+    if args.pin:
+        print(f"   Pinned: {', '.join(args.pin)}")
+    print(f"   Metrics: http://{args.host}:{args.port}/metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        metrics = server.cache.metrics()["cache"]
+        print(f"\n⏸️  Stopped - hits: {metrics['hits']}, misses: {metrics['misses']}, "
+              f"evictions: {metrics['evictions']}")
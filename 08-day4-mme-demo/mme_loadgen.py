@@ -0,0 +1,302 @@
+"""
+Load generator for Multi-Model Endpoints (the deployed one or local_mme_server.py)
+
+- Closed loop (--concurrency N): N callers send back to back
+- Open loop (--rate R): Poisson arrivals at R requests/s whatever the
+  response times; latency counts from the scheduled send time, so a
+  backed-up endpoint shows up as latency instead of a lower request rate
+- TargetModel popularity follows a Zipf law (--zipf s): model of rank k gets
+  a share proportional to 1/k^s
+- A warm-up phase (--warmup-seconds) runs the same traffic unrecorded
+
+Latencies go to HDR histograms (3 significant digits), split cold vs warm
+and per model. Cold comes from local_mme_server.py's X-Model-Cache header;
+the real endpoint doesn't say, so there a request slower than
+--cold-threshold-ms counts as cold.
+
+    python mme_loadgen.py --local-url http://127.0.0.1:8080 --model-prefix mme-models --rate 200 --duration 30
+    python mme_loadgen.py --concurrency 16 --duration 60 --output loadgen.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.request import Request, urlopen
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from inference_client import RuntimeClient
+
+# 2**11 sub-buckets: values are exact to 3 significant digits
+SUB_BUCKET_BITS = 11
+
+class HdrHistogram:
+    """
+    HDR (log-linear) histogram of integer values, here microseconds: fixed
+    relative precision over any range, in memory that grows with the range
+    rather than the sample count
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    @staticmethod
+    def _index(value):
+        shift = max(0, value.bit_length() - SUB_BUCKET_BITS)
+        return (shift << SUB_BUCKET_BITS) | (value >> shift)
+
+    @staticmethod
+    def _value(index):
+        """
+        Midpoint of the values sharing a bucket
+        """
+        shift, sub = index >> SUB_BUCKET_BITS, index & ((1 << SUB_BUCKET_BITS) - 1)
+        return (sub << shift) + ((1 << shift) >> 1)
+
+    def record(self, value):
+        value = max(0, int(value))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.total += 1
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, q):
+        if not self.total:
+            return None
+        rank = max(1, -(-q * self.total // 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._value(index), self.max)
+        return self.max
+
+    def summary(self, scale=1000):
+        """
+        Count and percentiles, in ms for microsecond values
+        """
+        if not self.total:
+            return {"count": 0}
+        return dict({"count": self.total, "min": self.min / scale, "max": self.max / scale},
+                    **{f"p{q:g}": self.percentile(q) / scale for q in (50, 90, 99, 99.9)})
+
+def zipf_weights(n, s):
+    return [1 / rank ** s for rank in range(1, n + 1)]
+
+def endpoint_target(endpoint_name, runtime_client=None):
+    """
+    invoke(target, body) -> (response body, cold or None) against a deployed MME.
+    One attempt per request, no client-side rate limiting: an open-loop
+    generator must not slow itself down, and throttles count as errors
+    """
+    runtime_client = runtime_client or RuntimeClient(pool_size=256, retry_mode='standard', max_attempts=1)
+
+    def invoke(target, body):
+        response = runtime_client.invoke_endpoint(EndpointName=endpoint_name, TargetModel=target,
+                                                  ContentType='text/csv', Body=body)
+        return response['Body'].read(), None
+    return invoke
+
+def local_target(url):
+    """
+    invoke(target, body) -> (response body, cold) against local_mme_server.py
+    """
+    from local_mme_server import CACHE_STATUS_HEADER, TARGET_MODEL_HEADER
+
+    def invoke(target, body):
+        request = Request(f"{url.rstrip('/')}/invocations", data=body.encode(), method='POST',
+                          headers={TARGET_MODEL_HEADER: target, 'Content-Type': 'text/csv'})
+        with urlopen(request) as response:
+            return response.read(), response.headers.get(CACHE_STATUS_HEADER) == 'miss'
+    return invoke
+
+class LoadGenerator:
+    def __init__(self, invoke, targets, zipf=1.1, n_features=5, cold_threshold_ms=250, seed=0):
+        self.invoke = invoke
+        self.rng = random.Random(seed)
+        # Popularity rank is independent of the model name
+        self.targets = self.rng.sample(list(targets), len(targets))
+        self.weights = zipf_weights(len(self.targets), zipf)
+        self.n_features = n_features
+        self.cold_threshold_us = cold_threshold_ms * 1000
+
+        self.lock = threading.Lock()
+        self.recording = False
+        self.reset()
+
+    def reset(self):
+        self.histograms = {"all": HdrHistogram(), "cold": HdrHistogram(), "warm": HdrHistogram()}
+        self.per_model = {}
+        self.errors = 0
+        self.requests = 0
+
+    def next_request(self):
+        with self.lock:
+            target = self.rng.choices(self.targets, self.weights)[0]
+            row = ','.join(f"{self.rng.gauss(0, 1):.4f}" for _ in range(self.n_features))
+        return target, row
+
+    def send(self, target, body, scheduled_ns):
+        try:
+            _, cold = self.invoke(target, body)
+            error = False
+        except Exception:
+            cold, error = None, True
+        latency_us = (time.perf_counter_ns() - scheduled_ns) // 1000
+        if cold is None:
+            cold = latency_us >= self.cold_threshold_us
+
+        with self.lock:
+            if not self.recording:
+                return
+            self.requests += 1
+            if error:
+                self.errors += 1
+                return
+            model = self.per_model.setdefault(target, {"all": HdrHistogram(), "cold": 0})
+            model["all"].record(latency_us)
+            model["cold"] += cold
+            self.histograms["all"].record(latency_us)
+            self.histograms["cold" if cold else "warm"].record(latency_us)
+
+    def closed_loop(self, concurrency, seconds):
+        deadline = time.perf_counter() + seconds
+
+        def caller():
+            while time.perf_counter() < deadline:
+                target, body = self.next_request()
+                self.send(target, body, time.perf_counter_ns())
+
+        threads = [threading.Thread(target=caller) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def open_loop(self, rate, seconds, max_in_flight):
+        """
+        Poisson arrivals at `rate`/s; at most max_in_flight outstanding requests
+        (the rest queue, and their queueing time counts as latency)
+        """
+        with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+            start = time.perf_counter_ns()
+            scheduled = start
+            while scheduled - start < seconds * 1e9:
+                scheduled += int(self.rng.expovariate(rate) * 1e9)
+                delay = (scheduled - time.perf_counter_ns()) / 1e9
+                if delay > 0:
+                    time.sleep(delay)
+                target, body = self.next_request()
+                pool.submit(self.send, target, body, scheduled)
+
+    def run(self, seconds, warmup_seconds=0, concurrency=8, rate=None):
+        def phase(duration):
+            if rate:
+                self.open_loop(rate, duration, concurrency)
+            else:
+                self.closed_loop(concurrency, duration)
+
+        if warmup_seconds:
+            phase(warmup_seconds)
+        self.reset()
+        self.recording = True
+        start = time.perf_counter()
+        phase(seconds)
+        elapsed = time.perf_counter() - start
+        self.recording = False
+        return self.report(elapsed, concurrency, rate)
+
+    def report(self, elapsed, concurrency, rate):
+        return {
+            "mode": f"open loop {rate:g}/s" if rate else f"closed loop x{concurrency}",
+            "seconds": elapsed,
+            "requests": self.requests,
+            "errors": self.errors,
+            "throughput": self.requests / elapsed,
+            "latency_ms": {name: h.summary() for name, h in self.histograms.items()},
+            "models": {
+                target: dict(stats["all"].summary(), cold=stats["cold"],
+                             popularity_rank=self.targets.index(target) + 1)
+                for target, stats in sorted(self.per_model.items(), key=lambda m: -m[1]["all"].total)
+            }
+        }
+
+def print_report(report, top_models=10):
+    print(f"\n{report['mode']}: {report['requests']:,} requests in {report['seconds']:.1f}s "
+          f"({report['throughput']:.1f}/s), {report['errors']} errors")
+    print(f"\n{'Latency (ms)':<14}{'Count':>8}{'p50':>9}{'p90':>9}{'p99':>9}{'p99.9':>9}{'Max':>9}")
+    print("-"*67)
+    for name, s in report['latency_ms'].items():
+        if s['count']:
+            print(f"{name:<14}{s['count']:>8}{s['p50']:>9.1f}{s['p90']:>9.1f}{s['p99']:>9.1f}"
+                  f"{s['p99.9']:>9.1f}{s['max']:>9.1f}")
+
+    print(f"\n{'Model':<32}{'Count':>8}{'Cold':>6}{'p50':>9}{'p99':>9}")
+    print("-"*64)
+    for target, s in list(report['models'].items())[:top_models]:
+        print(f"{target:<32}{s['count']:>8}{s['cold']:>6}{s['p50']:>9.1f}{s['p99']:>9.1f}")
+    if len(report['models']) > top_models:
+        print(f"... and {len(report['models']) - top_models} more models")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load-test a Multi-Model Endpoint")
+    parser.add_argument('--local-url', type=str, default=None,
+                        help='local_mme_server.py URL (default: the endpoint in endpoint_info.json)')
+    parser.add_argument('--model-prefix', type=str, default=None,
+                        help='List TargetModels from this prefix or pack (default: endpoint_info.json models)')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='Callers (closed loop) or max in-flight requests (open loop)')
+    parser.add_argument('--rate', type=float, default=None, help='Open-loop arrival rate (requests/s)')
+    parser.add_argument('--duration', type=float, default=30, help='Measured seconds')
+    parser.add_argument('--warmup-seconds', type=float, default=5)
+    parser.add_argument('--zipf', type=float, default=1.1, help='Zipf exponent of model popularity')
+    parser.add_argument('--cold-threshold-ms', type=float, default=250,
+                        help='Slower requests count as cold when the server does not say')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=str, default=None, help='Write the report as JSON')
+
+    args = parser.parse_args()
+
+    endpoint_info = None
+    if not args.local_url or not args.model_prefix:
+        with open('endpoint_info.json', 'r') as f:
+            endpoint_info = json.load(f)
+    if args.model_prefix:
+        from local_mme_server import open_repository
+        targets = open_repository(args.model_prefix).list_targets()
+    else:
+        targets = [f"{name}.tar.gz" for name in endpoint_info['models']]
+
+    if args.local_url:
+        invoke = local_target(args.local_url)
+        print(f"Target: {args.local_url}")
+    else:
+        invoke = endpoint_target(endpoint_info['endpoint_name'])
+        print(f"Endpoint: {endpoint_info['endpoint_name']}")
+    print(f"{len(targets)} models, Zipf s={args.zipf:g}, warm-up {args.warmup_seconds:g}s, "
+          f"measuring {args.duration:g}s")
+
+    generator = LoadGenerator(invoke, targets, args.zipf, cold_threshold_ms=args.cold_threshold_ms, seed=args.seed)
+    report = generator.run(args.duration, args.warmup_seconds, args.concurrency, args.rate)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📝 Report saved to: {args.output}")
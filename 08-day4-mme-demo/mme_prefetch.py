@@ -0,0 +1,262 @@
+"""
+Prefetch and pin models on a Multi-Model Endpoint
+
+An MME loads a model on its first request and evicts the least recently used
+one when memory runs out, so a customer whose model went cold pays a 1-5 s
+load. This module learns which models are about to be hit from the request log
+(test_mme.py and local_mme_server.py append to it) and warms them ahead of time:
+
+- Popularity: every request adds 1 to its model's score and scores decay with
+  a half-life, so the score mixes access frequency and recency
+- Warm-up: one small invocation per model loads it (or keeps it most recently used)
+- Pinning: VIP models are warmed on every cycle, ahead of the top-K. The real
+  endpoint has no pinning API, so this only keeps them at the MRU end;
+  local_mme_server.py pins them for real (never evicted)
+
+    python mme_prefetch.py --top-k 10 --pin model_vip.tar.gz --interval 60
+    python mme_prefetch.py --local-url http://127.0.0.1:8080 --top-k 10 --once
+    python mme_prefetch.py --simulate --cache-models 20 --top-k 10
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+from urllib.request import Request, urlopen
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from inference_client import shared_runtime_client
+
+REQUEST_LOG = 'mme_requests.jsonl'
+# The demo models take 5 features
+WARMUP_PAYLOAD = '0,0,0,0,0'
+HALF_LIFE_SECONDS = 3600
+
+class RequestLog:
+    """
+    Append-only JSON-lines log of MME requests: {"time", "model", "latency_ms", "cache"}
+    """
+
+    def __init__(self, path=REQUEST_LOG):
+        self.path = path
+        self.lock = threading.Lock()
+        self.offset = 0
+
+    def record(self, model, latency_ms=None, cache=None):
+        entry = {"time": time.time(), "model": model, "latency_ms": latency_ms, "cache": cache}
+        with self.lock, open(self.path, 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+
+    def read_new(self):
+        """
+        Entries appended since the last call (all of them on the first)
+        """
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path) as f:
+            f.seek(self.offset)
+            lines = f.readlines()
+            if lines and not lines[-1].endswith('\n'):
+                lines.pop()  # still being written
+            self.offset += sum(len(line.encode()) for line in lines)
+        return [json.loads(line) for line in lines if line.strip()]
+
+class ModelPopularity:
+    """
+    Exponentially decayed request count per model
+    """
+
+    def __init__(self, half_life=HALF_LIFE_SECONDS):
+        self.decay = math.log(2) / half_life
+        self.scores = {}
+
+    def record(self, model, timestamp):
+        score, last = self.scores.get(model, (0.0, timestamp))
+        score *= math.exp(-self.decay * max(0.0, timestamp - last))
+        self.scores[model] = (score + 1, max(timestamp, last))
+
+    def score(self, model, now):
+        score, last = self.scores.get(model, (0.0, now))
+        return score * math.exp(-self.decay * max(0.0, now - last))
+
+    def top(self, k, now=None, exclude=()):
+        now = now if now is not None else time.time()
+        ranked = sorted((m for m in self.scores if m not in exclude), key=lambda m: self.score(m, now),
+                        reverse=True)
+        return ranked[:k]
+
+def endpoint_warmer(endpoint_name, runtime_client=None, payload=WARMUP_PAYLOAD):
+    """
+    warm(target) for a deployed MME: one invoke_endpoint per model
+    """
+    runtime_client = runtime_client or shared_runtime_client()
+
+    def warm(target):
+        runtime_client.invoke_endpoint(EndpointName=endpoint_name, TargetModel=target,
+                                       ContentType='text/csv', Body=payload)['Body'].read()
+    warm.pin = warm
+    return warm
+
+def local_warmer(url):
+    """
+    warm(target) for local_mme_server.py (a prefetch, not counted as a
+    request); warm.pin(target) pins it in the cache
+    """
+    def post(path):
+        with urlopen(Request(f"{url.rstrip('/')}{path}", data=b'', method='POST')) as response:
+            response.read()
+
+    warm = lambda target: post(f"/models/{quote(target)}/load")
+    warm.pin = lambda target: post(f"/models/{quote(target)}/pin")
+    return warm
+
+class Prefetcher:
+    """
+    Keeps the pinned models and the top_k most popular ones warm
+    """
+
+    def __init__(self, warm, request_log=None, top_k=5, pinned=(), half_life=HALF_LIFE_SECONDS, workers=4):
+        self.warm = warm
+        self.request_log = request_log or RequestLog()
+        self.popularity = ModelPopularity(half_life)
+        self.top_k = top_k
+        self.pinned = list(pinned)
+        self.workers = workers
+
+    def refresh(self):
+        for entry in self.request_log.read_new():
+            self.popularity.record(entry['model'], entry['time'])
+
+    def plan(self, fallback=()):
+        """
+        Models to warm, least important first so the pinned ones end up most
+        recently used; `fallback` fills the top-K when the log is short
+        """
+        ranked = self.popularity.top(self.top_k, exclude=self.pinned)
+        ranked += [m for m in fallback if m not in ranked and m not in self.pinned][:self.top_k - len(ranked)]
+        return list(reversed(ranked)) + self.pinned
+
+    def _warm_one(self, target):
+        start = time.perf_counter()
+        try:
+            (self.warm.pin if target in self.pinned else self.warm)(target)
+            return target, (time.perf_counter() - start) * 1000, None
+        except Exception as e:
+            return target, (time.perf_counter() - start) * 1000, e
+
+    def warm_up(self, fallback=()):
+        """
+        One warm-up cycle; returns [(target, ms, error)]
+        """
+        self.refresh()
+        plan = self.plan(fallback)
+        # Parallel within each half so the pinned models are still touched last
+        results = []
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for group in (plan[:len(plan) - len(self.pinned)], self.pinned):
+                results += pool.map(self._warm_one, group)
+        return results
+
+    def run(self, interval, stop=None, fallback=()):
+        """
+        Re-warm every `interval` seconds until `stop` (a threading.Event) is set
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            print_warm_up(self.warm_up(fallback))
+            stop.wait(interval)
+
+def print_warm_up(results):
+    warmed = [r for r in results if r[2] is None]
+    print(f"🔥 Warmed {len(warmed)}/{len(results)} models"
+          + (f" ({sum(r[1] for r in warmed) / len(warmed):.0f} ms avg)" if warmed else ""))
+    for target, _, error in results:
+        if error is not None:
+            print(f"   ❌ {target}: {error}")
+
+def simulate(entries, cache_models, top_k=0, pinned=(), interval=60, half_life=HALF_LIFE_SECONDS):
+    """
+    Replay a request log against an LRU cache of `cache_models` models, with a
+    warm-up cycle every `interval` seconds of log time; returns the cold-load
+    rate of the requests (pinned models are never evicted, as on the local server)
+    """
+    popularity = ModelPopularity(half_life)
+    cache = OrderedDict()
+    pinned = list(pinned)
+
+    def touch(model):
+        hit = model in cache
+        cache[model] = True
+        cache.move_to_end(model)
+        for victim in list(cache):
+            if len(cache) <= cache_models:
+                break
+            if victim not in pinned:
+                del cache[victim]
+        return hit
+
+    cold = 0
+    next_cycle = None
+    for entry in sorted(entries, key=lambda e: e['time']):
+        if (top_k or pinned) and (next_cycle is None or entry['time'] >= next_cycle):
+            for model in list(reversed(popularity.top(top_k, entry['time'], exclude=pinned))) + pinned:
+                touch(model)
+            next_cycle = entry['time'] + interval
+        cold += not touch(entry['model'])
+        popularity.record(entry['model'], entry['time'])
+    return cold / len(entries) if entries else 0.0
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Prefetch and pin models on a Multi-Model Endpoint")
+    parser.add_argument('--request-log', type=str, default=REQUEST_LOG)
+    parser.add_argument('--top-k', type=int, default=5, help='Most popular models to keep warm')
+    parser.add_argument('--pin', type=str, action='append', default=[], metavar='TARGET',
+                        help='VIP model to keep warm on every cycle (repeatable)')
+    parser.add_argument('--half-life', type=float, default=HALF_LIFE_SECONDS,
+                        help='Seconds for a request to lose half its weight')
+    parser.add_argument('--interval', type=float, default=60, help='Seconds between re-warm cycles')
+    parser.add_argument('--once', action='store_true', help='Run one warm-up cycle and exit')
+    parser.add_argument('--local-url', type=str, default=None,
+                        help='Warm a local_mme_server.py instead of the deployed endpoint')
+    parser.add_argument('--simulate', action='store_true',
+                        help='Replay the request log against an LRU cache instead of warming anything')
+    parser.add_argument('--cache-models', type=int, default=20, help='Cache size in models (--simulate)')
+
+    args = parser.parse_args()
+
+    if args.simulate:
+        entries = RequestLog(args.request_log).read_new()
+        print(f"Replaying {len(entries):,} requests, cache of {args.cache_models} models")
+        baseline = simulate(entries, args.cache_models)
+        prefetched = simulate(entries, args.cache_models, args.top_k, args.pin, args.interval, args.half_life)
+        print(f"   Cold loads, LRU only: {baseline:.1%}")
+        print(f"   Cold loads, top-{args.top_k} + {len(args.pin)} pinned every {args.interval:g}s: "
+              f"{prefetched:.1%}")
+        raise SystemExit(0)
+
+    fallback = []
+    if args.local_url:
+        warm = local_warmer(args.local_url)
+        print(f"Target: {args.local_url}")
+    else:
+        with open('endpoint_info.json', 'r') as f:
+            endpoint_info = json.load(f)
+        warm = endpoint_warmer(endpoint_info['endpoint_name'])
+        fallback = [f"{m}.tar.gz" for m in endpoint_info['models']]
+        args.pin = args.pin or endpoint_info.get('pinned_models', [])
+        print(f"Endpoint: {endpoint_info['endpoint_name']}")
+    print(f"Top-{args.top_k} models, pinned: {', '.join(args.pin) or '-'}")
+
+    prefetcher = Prefetcher(warm, RequestLog(args.request_log), args.top_k, args.pin, args.half_life)
+    if args.once:
+        print_warm_up(prefetcher.warm_up(fallback))
+    else:
+        try:
+            prefetcher.run(args.interval, fallback=fallback)
+        except KeyboardInterrupt:
+            print("\n⏸️  Stopped")
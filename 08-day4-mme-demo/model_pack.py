@@ -0,0 +1,276 @@
+"""
+Pack many small XGBoost models into one file for the local multi-model server
+
+A model.tar.gz costs a gzip + tar decode on every cold load for a few hundred KB
+of trees. A pack holds every model of an MME prefix as raw UBJ (or
+zstd-compressed) blobs behind one index, so a cold load is one ranged read
+plus (optionally) a zstd decode:
+
+    MMEPACK1 | index length (uint64 LE) | index (JSON) | blobs
+
+The index maps each TargetModel name (model_fast.tar.gz) to the offset, length
+and sha256 of its blob; identical models are stored once.
+
+    python model_pack.py pack --model-prefix mme-models --output mme-models.pack [--codec none]
+    python model_pack.py bench --model-prefix mme-models --pack mme-models.pack
+    python local_mme_server.py --model-prefix mme-models.pack
+
+The built-in XGBoost MME container only loads <model>.tar.gz, so on the real
+endpoint copy_artifacts() is what helps: parallel copies, multipart for big
+objects and no copy when the destination is already up to date.
+"""
+import argparse
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PACK_MAGIC = b'MMEPACK1'
+PREAMBLE = struct.Struct('<8sQ')
+CODECS = ('none', 'zstd')
+# First read of a pack; big enough for the index of a few thousand models
+INDEX_READ_BYTES = 256 * 1024
+MULTIPART_THRESHOLD = 64 * 1024 * 1024
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd packs require zstandard (pip install zstandard)")
+    return zstandard
+
+def default_codec():
+    """
+    zstd when zstandard is installed, else none: raw UBJ blobs skip the
+    decode but read ~3x the bytes of the tar.gz files on a cold load
+    """
+    try:
+        _zstd()
+    except ImportError:
+        return 'none'
+    return 'zstd'
+
+def to_ubj(model_bytes):
+    """
+    Re-encode a model (JSON, UBJ or legacy binary) as UBJ, the fastest to load
+    """
+    import xgboost as xgb
+
+    booster = xgb.Booster()
+    booster.load_model(bytearray(model_bytes))
+    return bytes(booster.save_raw(raw_format='ubj'))
+
+def write_pack(models, path, codec='none', level=3):
+    """
+    Write (target, model bytes) pairs to a pack; returns size/dedup stats
+    """
+    if codec not in CODECS:
+        raise ValueError(f"Unknown codec: {codec} (expected {' or '.join(CODECS)})")
+    compress = _zstd().ZstdCompressor(level=level).compress if codec == 'zstd' else bytes
+
+    index = {}
+    blobs = {}
+    offset = 0
+    raw_bytes = 0
+    for target, model_bytes in models:
+        digest = hashlib.sha256(model_bytes).hexdigest()
+        raw_bytes += len(model_bytes)
+        if digest not in blobs:
+            blob = compress(model_bytes)
+            blobs[digest] = (offset, blob)
+            offset += len(blob)
+        blob_offset, blob = blobs[digest]
+        index[target] = {"offset": blob_offset, "length": len(blob), "raw_length": len(model_bytes),
+                         "sha256": digest}
+
+    header = json.dumps({"codec": codec, "models": index}, separators=(',', ':')).encode()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(PREAMBLE.pack(PACK_MAGIC, len(header)))
+        f.write(header)
+        for _, blob in sorted(blobs.values(), key=lambda b: b[0]):
+            f.write(blob)
+    os.replace(tmp_path, path)
+
+    return {
+        "models": len(index),
+        "unique": len(blobs),
+        "raw_bytes": raw_bytes,
+        "stored_bytes": offset,
+        "file_bytes": os.path.getsize(path)
+    }
+
+class PackReader:
+    """
+    Random access to a pack through read_range(offset, length); the index
+    is read once, then every model is a single ranged read
+    """
+
+    def __init__(self, read_range):
+        self.read_range = read_range
+        head = read_range(0, INDEX_READ_BYTES)
+        magic, header_length = PREAMBLE.unpack_from(head)
+        if magic != PACK_MAGIC:
+            raise ValueError("Not a model pack (bad magic)")
+        end = PREAMBLE.size + header_length
+        if len(head) < end:
+            head += read_range(len(head), end - len(head))
+        header = json.loads(head[PREAMBLE.size:end])
+        self.codec = header['codec']
+        self.index = header['models']
+        self.data_offset = end
+        # ZstdDecompressor instances are not thread-safe and the local server
+        # cold-loads from many threads, so each thread gets its own
+        self._local = threading.local()
+        if self.codec == 'zstd':
+            _zstd()
+
+    def targets(self):
+        return sorted(self.index)
+
+    def read(self, target):
+        """
+        (model bytes, bytes read)
+        """
+        entry = self.index[target]
+        blob = self.read_range(self.data_offset + entry['offset'], entry['length'])
+        return self._decompress(blob), len(blob)
+
+    def _decompress(self, blob):
+        if self.codec != 'zstd':
+            return bytes(blob)
+        if not hasattr(self._local, 'decompressor'):
+            self._local.decompressor = _zstd().ZstdDecompressor()
+        return self._local.decompressor.decompress(blob)
+
+def open_pack(uri):
+    """
+    PackReader over a local path or s3://bucket/key
+    """
+    if uri.startswith('s3://'):
+        import boto3
+        s3 = boto3.client('s3')
+        bucket, _, key = uri[len('s3://'):].partition('/')
+
+        def read_range(offset, length):
+            byte_range = f"bytes={offset}-{offset + length - 1}"
+            return s3.get_object(Bucket=bucket, Key=key, Range=byte_range)['Body'].read()
+        return PackReader(read_range)
+
+    def read_range(offset, length):
+        with open(uri, 'rb') as f:
+            f.seek(offset)
+            return f.read(length)
+    return PackReader(read_range)
+
+def pack_prefix(model_prefix, output, codec='none', level=3, workers=8):
+    """
+    Pack every <model>.tar.gz under an MME prefix (directory or s3://) into `output`
+    """
+    from local_mme_server import open_repository
+
+    repository = open_repository(model_prefix)
+    targets = repository.list_targets()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        models = list(pool.map(lambda t: to_ubj(repository.fetch_model(t)[0]), targets))
+
+    if not output.startswith('s3://'):
+        return write_pack(zip(targets, models), output, codec, level)
+
+    import boto3
+    from boto3.s3.transfer import TransferConfig
+    bucket, _, key = output[len('s3://'):].partition('/')
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, os.path.basename(key))
+        stats = write_pack(zip(targets, models), path, codec, level)
+        boto3.client('s3').upload_file(path, bucket, key,
+                                       Config=TransferConfig(multipart_threshold=MULTIPART_THRESHOLD))
+    return stats
+
+def copy_artifacts(s3_client, copies, workers=16, multipart_threshold=MULTIPART_THRESHOLD):
+    """
+    Copy (source s3:// URI, dest bucket, dest key) triples in parallel.
+    Objects above multipart_threshold are copied in parts; a destination
+    already copied from the same source object (matching ETag) is skipped.
+    Returns [(dest key, 'copied' | 'unchanged', seconds)].
+    """
+    from boto3.s3.transfer import TransferConfig
+
+    config = TransferConfig(multipart_threshold=multipart_threshold, max_concurrency=4)
+
+    def copy_one(copy):
+        source_uri, dest_bucket, dest_key = copy
+        start = time.perf_counter()
+        source_bucket, _, source_key = source_uri[len('s3://'):].partition('/')
+        source_etag = s3_client.head_object(Bucket=source_bucket, Key=source_key)['ETag']
+        try:
+            dest = s3_client.head_object(Bucket=dest_bucket, Key=dest_key)
+            if dest['Metadata'].get('source-etag') == source_etag:
+                return dest_key, 'unchanged', time.perf_counter() - start
+        except s3_client.exceptions.ClientError as e:
+            if e.response['Error']['Code'] not in ('404', 'NoSuchKey'):
+                raise
+        s3_client.copy({'Bucket': source_bucket, 'Key': source_key}, dest_bucket, dest_key,
+                       ExtraArgs={'Metadata': {'source-etag': source_etag}, 'MetadataDirective': 'REPLACE'},
+                       Config=config)
+        return dest_key, 'copied', time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(copy_one, copies))
+
+def bench(model_prefix, pack_path):
+    """
+    Cold-load every model from its tar.gz and from the pack: bytes read and
+    read/decode/parse time
+    """
+    import xgboost as xgb
+    from local_mme_server import open_repository
+
+    repository = open_repository(model_prefix)
+    reader = open_pack(pack_path)
+    results = {}
+    for name, fetch in (('tar.gz', repository.fetch_model), (f"pack ({reader.codec})", reader.read)):
+        read_bytes = 0
+        start = time.perf_counter()
+        for target in reader.targets():
+            model_bytes, n = fetch(target)
+            read_bytes += n
+            xgb.Booster().load_model(bytearray(model_bytes))
+        results[name] = {"bytes": read_bytes, "seconds": time.perf_counter() - start}
+    return len(reader.targets()), results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Pack MME model artifacts into a single indexed file")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    pack = commands.add_parser('pack', help='Pack every <model>.tar.gz under a prefix')
+    pack.add_argument('--model-prefix', type=str, default='mme-models')
+    pack.add_argument('--output', type=str, default='mme-models.pack', help='Path or s3://bucket/key')
+    pack.add_argument('--codec', type=str, default=default_codec(), choices=CODECS,
+                      help="zstd (default when zstandard is installed) or none: raw UBJ, no decode "
+                           "but ~3x the cold-load bytes of the tar.gz files")
+    pack.add_argument('--level', type=int, default=3, help='zstd compression level')
+
+    compare = commands.add_parser('bench', help='Compare cold loads from tar.gz and from a pack')
+    compare.add_argument('--model-prefix', type=str, default='mme-models')
+    compare.add_argument('--pack', type=str, default='mme-models.pack')
+
+    args = parser.parse_args()
+
+    if args.command == 'pack':
+        stats = pack_prefix(args.model_prefix, args.output, args.codec, args.level)
+        print(f"📦 Packed {stats['models']} models ({stats['unique']} unique) into {args.output}")
+        print(f"   Model bytes: {stats['raw_bytes']:,} → stored {stats['stored_bytes']:,} "
+              f"({args.codec}), file {stats['file_bytes']:,}")
+    else:
+        n_models, results = bench(args.model_prefix, args.pack)
+        print(f"Cold-loading {n_models} models")
+        print(f"\n{'Source':<14}{'Bytes read':>14}{'Total (s)':>11}{'Per model (ms)':>16}")
+        print("-"*55)
+        for name, result in results.items():
+            print(f"{name:<14}{result['bytes']:>14,}{result['seconds']:>11.3f}"
+                  f"{result['seconds'] * 1000 / n_models:>16.2f}")
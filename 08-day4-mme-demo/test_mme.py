@@ -5,13 +5,23 @@ import boto3
 import json
 import time
 import numpy as np
+import os
+import sys
+
+from mme_prefetch import RequestLog
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from inference_client import CSVBatcher, endpoint_invoker, shared_runtime_client
 
 # Configuration
 region = boto3.Session().region_name
-runtime_client = boto3.client('sagemaker-runtime', region_name=region)
+runtime_client = shared_runtime_client(region=region)
 
 print(f"Region: {region}")
 
+# Every call is logged so mme_prefetch.py can learn which models to keep warm
+request_log = RequestLog()
+
 # Load endpoint info
 with open('endpoint_info.json', 'r') as f:
     endpoint_info = json.load(f)
@@ -55,6 +65,7 @@ for model_name in models:
         Body=test_payload
     )
     latency = (time.time() - start) * 1000
+    request_log.record(target_model, latency)
 
     prediction = response['Body'].read().decode('utf-8')
     # Handle both "[0.123]" and "0.123" formats
@@ -124,6 +135,7 @@ for i in range(5):
         Body=test_payload
     )
     latency = (time.time() - start) * 1000
+    request_log.record(test_model, latency)
     latencies.append(latency)
     call_type = "Cold" if i == 0 else "Warm"
     print(f"   Call {i+1} ({call_type}): {latency:.1f} ms")
@@ -153,10 +165,31 @@ for model_name in switch_sequence:
         Body=test_payload
     )
     latency = (time.time() - start) * 1000
+    request_log.record(target_model, latency)
     prediction = float(response['Body'].read().decode('utf-8').strip('[]'))
     
     print(f"   {model_name.replace('model_', ''):12} → {prediction:.4f} ({latency:.0f}ms)")
 
+# ============================================================
+# Test 5: Micro-batched scoring
+# ============================================================
+print("\n" + "-"*70)
+print("TEST 5: Micro-Batched Scoring")
+print("-"*70)
+
+print("\nScoring 20 rows per model: single-row calls coalesced into multi-row CSV requests\n")
+
+batch_rows = np.random.randn(20, 5).tolist()
+for model_name in models:
+    target_model = f"{model_name}.tar.gz"
+    with CSVBatcher(endpoint_invoker(endpoint_name, runtime_client, target_model)) as batcher:
+        start = time.time()
+        predictions = batcher.predict_many(batch_rows)
+        latency = (time.time() - start) * 1000
+    request_log.record(target_model, latency)
+    print(f"   {model_name.replace('model_', ''):12} → {len(predictions)} rows in "
+          f"{batcher.stats()['requests']} call(s), {latency:.0f}ms (mean {np.mean(predictions):.4f})")
+
 print("\n" + "="*70)
 print("✅ MME TESTING COMPLETE!")
 print("="*70)
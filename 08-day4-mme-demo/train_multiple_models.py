@@ -1,70 +1,36 @@
 """
 Train 5 XGBoost model variants for Multi-Model Endpoint demo
+
+Modes:
+  sequential  one training job after another (~15 min for 5 variants)
+  concurrent  submit every job at once, bounded by the account's training
+              instance quota, and track them all with a single waiter
+  local       train every variant with local XGBoost in a process pool
+  local-shared
+              parse the data once into one quantized DMatrix and train every
+              variant against it from a thread pool (hundreds of variants)
 """
+import argparse
 import boto3
-import sagemaker
-from sagemaker import image_uris
-from sagemaker.estimator import Estimator
-from sagemaker.inputs import TrainingInput
 import pandas as pd
 import numpy as np
+import io
 import json
+import os
+import tarfile
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
 # ============================================================
 # CONFIGURATION - Update role with your SageMaker execution role
 # ============================================================
 role = "arn:aws:iam::854757836160:role/service-role/AmazonSageMaker-ExecutionRole-20251019T120276"
 
-# Configuration
-region = boto3.Session().region_name
-boto_session = boto3.Session(region_name=region)
-sagemaker_session = sagemaker.Session(boto_session=boto_session)
-
-bucket = sagemaker_session.default_bucket()
 prefix = 'mme-demo'
-
-print(f"Region: {region}")
-print(f"Bucket: {bucket}")
-print(f"Prefix: {prefix}")
-
-print("\n" + "="*70)
-print("STEP 1: CREATE TRAINING DATASET")
-print("="*70)
-
-# Create a classification dataset
-np.random.seed(42)
-n_samples = 2000
-
-data = {
-    'feature_1': np.random.randn(n_samples),
-    'feature_2': np.random.randn(n_samples),
-    'feature_3': np.random.randn(n_samples),
-    'feature_4': np.random.randn(n_samples),
-    'feature_5': np.random.randn(n_samples),
-}
-
-df = pd.DataFrame(data)
-df['target'] = ((df['feature_1'] + df['feature_2'] * 0.5 + np.random.randn(n_samples) * 0.3) > 0).astype(int)
-
-# XGBoost format: target first, no headers
-train_df = df[['target', 'feature_1', 'feature_2', 'feature_3', 'feature_4', 'feature_5']]
-
-print(f"\nDataset shape: {train_df.shape}")
-print(f"Target distribution:\n{train_df['target'].value_counts()}")
-
-# Save and upload
+instance_type = 'ml.m5.large'
 train_file = 'train.csv'
-train_df.to_csv(train_file, index=False, header=False)
-
-train_s3_path = f's3://{bucket}/{prefix}/train/{train_file}'
-sagemaker_session.upload_data(train_file, bucket=bucket, key_prefix=f'{prefix}/train')
-
-print(f"\n✅ Training data uploaded to: {train_s3_path}")
-
-print("\n" + "="*70)
-print("STEP 2: DEFINE 5 MODEL VARIANTS")
-print("="*70)
+artifacts_file = 'model_artifacts.json'
 
 # 5 different hyperparameter configurations
 # Simulating customer-specific or A/B test variants
@@ -101,82 +67,472 @@ model_variants = {
     }
 }
 
-print("\nModel variants to train:")
-for name, config in model_variants.items():
-    print(f"\n   {name}:")
-    print(f"      num_round: {config['num_round']}")
-    print(f"      max_depth: {config['max_depth']}")
-    print(f"      eta: {config['eta']}")
-    print(f"      → {config['description']}")
-
-print("\n" + "="*70)
-print("STEP 3: TRAIN ALL 5 MODELS")
-print("="*70)
-
-# Get XGBoost container
-container = image_uris.retrieve('xgboost', region, '1.5-1')
-print(f"\nUsing container: {container}")
-
-# Store model artifacts
-model_artifacts = {}
-
-for i, (model_name, config) in enumerate(model_variants.items(), 1):
-    print(f"\n{'─'*70}")
-    print(f"Training model {i}/5: {model_name}")
-    print(f"{'─'*70}")
-    print(f"   Hyperparameters: num_round={config['num_round']}, "
-          f"max_depth={config['max_depth']}, eta={config['eta']}")
-    
-    # Create estimator
+def create_training_data(path=train_file):
+    """
+    Classification dataset in XGBoost format: target first, no headers
+    """
+    np.random.seed(42)
+    n_samples = 2000
+
+    data = {
+        'feature_1': np.random.randn(n_samples),
+        'feature_2': np.random.randn(n_samples),
+        'feature_3': np.random.randn(n_samples),
+        'feature_4': np.random.randn(n_samples),
+        'feature_5': np.random.randn(n_samples),
+    }
+
+    df = pd.DataFrame(data)
+    df['target'] = ((df['feature_1'] + df['feature_2'] * 0.5 + np.random.randn(n_samples) * 0.3) > 0).astype(int)
+
+    train_df = df[['target', 'feature_1', 'feature_2', 'feature_3', 'feature_4', 'feature_5']]
+
+    print(f"\nDataset shape: {train_df.shape}")
+    print(f"Target distribution:\n{train_df['target'].value_counts()}")
+
+    train_df.to_csv(path, index=False, header=False)
+    return train_df
+
+def variant_hyperparameters(config):
+    return {
+        'objective': 'binary:logistic',
+        'num_round': config['num_round'],
+        'max_depth': config['max_depth'],
+        'eta': config['eta'],
+        'subsample': 0.8,
+        'colsample_bytree': 0.8
+    }
+
+def save_artifacts(model_artifacts, path=artifacts_file):
+    """
+    Rewrite model_artifacts.json atomically, so it is always complete for the
+    models finished so far
+    """
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(model_artifacts, f, indent=2)
+    os.replace(tmp, path)
+
+def print_timing(wall_seconds, job_seconds):
+    """
+    End-to-end time against the slowest single job (the floor for a
+    concurrent run) and the sum of all jobs (what a sequential run pays)
+    """
+    if not job_seconds:
+        return
+    print(f"\n⏱️  End to end: {wall_seconds:.0f}s | slowest job: {max(job_seconds.values()):.0f}s | "
+          f"sum of jobs: {sum(job_seconds.values()):.0f}s")
+
+# ============================================================
+# SageMaker training jobs
+# ============================================================
+def make_estimator(model_name, config, container, bucket, sagemaker_session):
+    from sagemaker.estimator import Estimator
+
     estimator = Estimator(
         image_uri=container,
         role=role,
         instance_count=1,
-        instance_type='ml.m5.large',
+        instance_type=instance_type,
         output_path=f's3://{bucket}/{prefix}/models/{model_name}/',
         sagemaker_session=sagemaker_session,
         base_job_name=f'mme-{model_name.replace("_", "-")}'
     )
-    
-    # Set hyperparameters
-    estimator.set_hyperparameters(
-        objective='binary:logistic',
-        num_round=config['num_round'],
-        max_depth=config['max_depth'],
-        eta=config['eta'],
-        subsample=0.8,
-        colsample_bytree=0.8
-    )
-    
-    # Train
-    print(f"   Starting training job...")
-    start_time = time.time()
-    
-    estimator.fit(
-        {'train': TrainingInput(train_s3_path, content_type='text/csv')},
-        wait=True,
-        logs=False  # Suppress detailed logs
-    )
-    
-    elapsed = time.time() - start_time
-    
-    # Store artifact location
-    model_artifacts[model_name] = estimator.model_data
-    
-    print(f"   ✅ Completed in {elapsed:.0f}s")
-    print(f"   📦 Artifact: {estimator.model_data}")
-
-print("\n" + "="*70)
-print("✅ ALL 5 MODELS TRAINED!")
-print("="*70)
-
-print("\nModel artifacts:")
-for name, artifact in model_artifacts.items():
-    print(f"   {name}: {artifact}")
-
-# Save model artifacts for next step
-with open('model_artifacts.json', 'w') as f:
-    json.dump(model_artifacts, f, indent=2)
-
-print("\n📝 Model artifacts saved to: model_artifacts.json")
-print("\n💡 Next step: python deploy_multi_model_endpoint.py")
\ No newline at end of file
+    estimator.set_hyperparameters(**variant_hyperparameters(config))
+    return estimator
+
+def train_sequential(variants, train_s3_path, container, bucket, sagemaker_session):
+    from sagemaker.inputs import TrainingInput
+
+    model_artifacts = {}
+    job_seconds = {}
+
+    for i, (model_name, config) in enumerate(variants.items(), 1):
+        print(f"\n{'─'*70}")
+        print(f"Training model {i}/{len(variants)}: {model_name}")
+        print(f"{'─'*70}")
+        print(f"   Hyperparameters: num_round={config['num_round']}, "
+              f"max_depth={config['max_depth']}, eta={config['eta']}")
+
+        estimator = make_estimator(model_name, config, container, bucket, sagemaker_session)
+
+        # Train
+        print(f"   Starting training job...")
+        start_time = time.time()
+
+        estimator.fit(
+            {'train': TrainingInput(train_s3_path, content_type='text/csv')},
+            wait=True,
+            logs=False  # Suppress detailed logs
+        )
+
+        elapsed = time.time() - start_time
+        job_seconds[model_name] = elapsed
+
+        # Store artifact location
+        model_artifacts[model_name] = estimator.model_data
+        save_artifacts(model_artifacts)
+
+        print(f"   ✅ Completed in {elapsed:.0f}s")
+        print(f"   📦 Artifact: {estimator.model_data}")
+
+    return model_artifacts, job_seconds
+
+def training_instance_quota(region, instance_type=instance_type):
+    """
+    Account quota for concurrently running training instances of this type
+    (Service Quotas), or None if it can't be read
+    """
+    from botocore.exceptions import ClientError
+
+    client = boto3.client('service-quotas', region_name=region)
+    quota_name = f"{instance_type} for training job usage"
+    try:
+        for page in client.get_paginator('list_service_quotas').paginate(ServiceCode='sagemaker'):
+            for quota in page['Quotas']:
+                if quota['QuotaName'] == quota_name:
+                    return int(quota['Value'])
+    except ClientError as e:
+        print(f"   ⚠️  Could not read training quota: {e.response['Error']['Code']}")
+    return None
+
+def training_instances_in_use(sm_client, instance_type=instance_type):
+    """
+    Instances of this type held by training jobs already running in the account
+    """
+    in_use = 0
+    for page in sm_client.get_paginator('list_training_jobs').paginate(StatusEquals='InProgress'):
+        for job in page['TrainingJobSummaries']:
+            resources = sm_client.describe_training_job(TrainingJobName=job['TrainingJobName'])['ResourceConfig']
+            if resources.get('InstanceType') == instance_type:
+                in_use += resources.get('InstanceCount', 1)
+    return in_use
+
+def train_concurrent(variants, train_s3_path, container, bucket, sagemaker_session, region,
+                     max_concurrent=None, poll_seconds=15):
+    """
+    Submit every variant's job without waiting, holding at most `slots` jobs
+    in flight (free quota for the instance type, capped by max_concurrent).
+
+    One waiter loop polls all in-flight jobs with a single ListTrainingJobs
+    call per cycle, releases a slot when a job ends and rewrites
+    model_artifacts.json as each one completes.
+    """
+    from botocore.exceptions import ClientError
+    from sagemaker.inputs import TrainingInput
+
+    sm_client = sagemaker_session.sagemaker_client
+
+    quota = training_instance_quota(region)
+    in_use = training_instances_in_use(sm_client)
+    slots = min(max_concurrent or len(variants), len(variants))
+    if quota is not None:
+        slots = max(1, min(slots, quota - in_use))
+    print(f"\nQuota for {instance_type} training: {quota if quota is not None else 'unknown'}, "
+          f"in use: {in_use} → {slots} concurrent job(s)")
+    semaphore = threading.BoundedSemaphore(slots)
+
+    pending = list(variants.items())
+    running = {}
+    model_artifacts = {}
+    job_seconds = {}
+    failures = {}
+    started_after = time.time() - 60
+
+    while pending or running:
+        # Submit while there are free slots
+        while pending and semaphore.acquire(blocking=False):
+            model_name, config = pending.pop(0)
+            estimator = make_estimator(model_name, config, container, bucket, sagemaker_session)
+            try:
+                estimator.fit({'train': TrainingInput(train_s3_path, content_type='text/csv')},
+                              wait=False, logs=False)
+            except ClientError as e:
+                semaphore.release()
+                if e.response['Error']['Code'] != 'ResourceLimitExceeded':
+                    raise
+                # Someone else took the quota: retry this variant when a job of ours finishes
+                pending.insert(0, (model_name, config))
+                if not running:
+                    print(f"   ⏳ Instance quota exhausted, retrying in {poll_seconds}s...")
+                    time.sleep(poll_seconds)
+                break
+            job_name = estimator.latest_training_job.name
+            running[job_name] = (model_name, time.time())
+            print(f"   🚀 Submitted {model_name}: {job_name}")
+
+        if not running:
+            continue
+        time.sleep(poll_seconds)
+
+        # Single waiter: one list call covers every in-flight job (all names start with
+        # make_estimator's 'mme-' base_job_name); jobs it misses are described directly
+        statuses = {}
+        for page in sm_client.get_paginator('list_training_jobs').paginate(
+                NameContains='mme-', CreationTimeAfter=started_after):
+            statuses.update((job['TrainingJobName'], job['TrainingJobStatus'])
+                            for job in page['TrainingJobSummaries'] if job['TrainingJobName'] in running)
+        for job_name in set(running) - set(statuses):
+            statuses[job_name] = sm_client.describe_training_job(TrainingJobName=job_name)['TrainingJobStatus']
+
+        for job_name in list(running):
+            status = statuses[job_name]
+            if status in ('InProgress', 'Stopping'):
+                continue
+            model_name, submitted = running.pop(job_name)
+            semaphore.release()
+            job_seconds[model_name] = time.time() - submitted
+            if status == 'Completed':
+                desc = sm_client.describe_training_job(TrainingJobName=job_name)
+                model_artifacts[model_name] = desc['ModelArtifacts']['S3ModelArtifacts']
+                save_artifacts(model_artifacts)
+                print(f"   ✅ {model_name} completed in {job_seconds[model_name]:.0f}s "
+                      f"({len(model_artifacts)}/{len(variants)})")
+            else:
+                desc = sm_client.describe_training_job(TrainingJobName=job_name)
+                failures[model_name] = desc.get('FailureReason', status)
+                print(f"   ❌ {model_name} {status}: {failures[model_name]}")
+
+    if failures:
+        print(f"\n⚠️  {len(failures)} variant(s) failed: {', '.join(failures)}")
+    return model_artifacts, job_seconds
+
+# ============================================================
+# Local training
+# ============================================================
+def write_model_archive(path, booster):
+    """
+    model.tar.gz with a single `xgboost-model` member, as the XGBoost
+    container writes it and the MME loads it. JSON, since the 1.5-1 container
+    the endpoint runs predates UBJSON support (XGBoost 1.6)
+    """
+    model_bytes = bytes(booster.save_raw(raw_format='json'))
+    with tarfile.open(path, 'w:gz') as tar:
+        member = tarfile.TarInfo('xgboost-model')
+        member.size = len(model_bytes)
+        tar.addfile(member, io.BytesIO(model_bytes))
+
+def train_variant_local(model_name, config, train_path, output_dir, nthread=1):
+    """
+    One variant in its own process: parse train.csv, train, and write
+    <output_dir>/<model_name>.tar.gz (the flat MME prefix layout)
+    """
+    import xgboost as xgb
+
+    start = time.perf_counter()
+    data = pd.read_csv(train_path, header=None).to_numpy(dtype=np.float32)
+    dtrain = xgb.DMatrix(data[:, 1:], label=data[:, 0], nthread=nthread)
+
+    params = variant_hyperparameters(config)
+    num_round = params.pop('num_round')
+    booster = xgb.train(dict(params, nthread=nthread), dtrain, num_round)
+
+    path = os.path.join(output_dir, f"{model_name}.tar.gz")
+    write_model_archive(path, booster)
+    return model_name, os.path.abspath(path), time.perf_counter() - start
+
+def train_local(variants, train_path, output_dir, workers=0):
+    """
+    Train every variant at once in a process pool; cores are split between
+    the workers. Artifacts are listed in <output_dir>/model_artifacts.json so
+    the S3 list used by deploy_multi_model_endpoint.py is left alone.
+    """
+    local_artifacts_file = os.path.join(output_dir, artifacts_file)
+    workers = workers or min(len(variants), os.cpu_count() or 1)
+    nthread = max(1, (os.cpu_count() or 1) // workers)
+    os.makedirs(output_dir, exist_ok=True)
+    print(f"\nTraining {len(variants)} variants with {workers} processes ({nthread} threads each)...")
+
+    model_artifacts = {}
+    job_seconds = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(train_variant_local, name, config, train_path, output_dir, nthread)
+                   for name, config in variants.items()]
+        for future in as_completed(futures):
+            model_name, path, seconds = future.result()
+            model_artifacts[model_name] = path
+            job_seconds[model_name] = seconds
+            save_artifacts(model_artifacts, local_artifacts_file)
+            print(f"   ✅ {model_name} in {seconds:.2f}s → {path}")
+
+    # Keep model_artifacts.json in variant order
+    model_artifacts = {name: model_artifacts[name] for name in variants if name in model_artifacts}
+    save_artifacts(model_artifacts, local_artifacts_file)
+    return model_artifacts, job_seconds
+
+def load_training_matrix(train_path, nthread=None):
+    """
+    Parse train.csv once and quantize it into histogram bins: a
+    QuantileDMatrix that every hist-method variant can train on read-only
+    """
+    import xgboost as xgb
+
+    data = pd.read_csv(train_path, header=None).to_numpy(dtype=np.float32)
+    return xgb.QuantileDMatrix(data[:, 1:], label=data[:, 0], nthread=nthread or os.cpu_count())
+
+def train_variant_shared(model_name, config, dtrain, output_dir, nthread=1):
+    """
+    One variant on the shared matrix (runs in a thread; XGBoost releases the GIL)
+    """
+    import xgboost as xgb
+
+    start = time.perf_counter()
+    params = variant_hyperparameters(config)
+    num_round = params.pop('num_round')
+    booster = xgb.train(dict(params, tree_method='hist', nthread=nthread), dtrain, num_round)
+
+    path = os.path.join(output_dir, f"{model_name}.tar.gz")
+    write_model_archive(path, booster)
+    return model_name, os.path.abspath(path), time.perf_counter() - start
+
+def train_local_shared(variants, train_path, output_dir, workers=0):
+    """
+    Single pass over the data for the whole variant set: load and bin
+    train.csv once, then train every variant against that one matrix in
+    `workers` threads with the cores partitioned between them. Data loading
+    costs 1x instead of once per variant.
+    """
+    local_artifacts_file = os.path.join(output_dir, artifacts_file)
+    cpus = os.cpu_count() or 1
+    workers = workers or min(len(variants), cpus)
+    nthread = max(1, cpus // workers)
+    os.makedirs(output_dir, exist_ok=True)
+    import xgboost  # keep the one-off import out of the load timing
+
+    start = time.perf_counter()
+    dtrain = load_training_matrix(train_path)
+    load_seconds = time.perf_counter() - start
+    print(f"\nLoaded {dtrain.num_row():,} rows once in {load_seconds:.2f}s; training {len(variants)} "
+          f"variants with {workers} threads ({nthread} XGBoost threads each)...")
+
+    model_artifacts = {}
+    job_seconds = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(train_variant_shared, name, config, dtrain, output_dir, nthread)
+                   for name, config in variants.items()]
+        for future in as_completed(futures):
+            model_name, path, seconds = future.result()
+            model_artifacts[model_name] = path
+            job_seconds[model_name] = seconds
+            if len(variants) <= 20:
+                print(f"   ✅ {model_name} in {seconds:.2f}s → {path}")
+
+    model_artifacts = {name: model_artifacts[name] for name in variants}
+    save_artifacts(model_artifacts, local_artifacts_file)
+    print(f"   Data loading: {load_seconds:.2f}s once (vs ~{load_seconds * len(variants):.2f}s "
+          f"loading per variant)")
+    return model_artifacts, job_seconds
+
+def replicate_variants(variants, copies):
+    """
+    `copies` per-customer copies of every variant (model_fast_c001, ...) to
+    exercise training and serving at hundreds of models
+    """
+    if copies <= 1:
+        return variants
+    return {f"{name}_c{i:03d}": config for i in range(1, copies + 1) for name, config in variants.items()}
+
+def print_variants(variants):
+    print("\nModel variants to train:")
+    if len(variants) > 10:
+        print(f"\n   {len(variants)} variants: {', '.join(list(variants)[:5])}, ...")
+        return
+    for name, config in variants.items():
+        print(f"\n   {name}:")
+        print(f"      num_round: {config['num_round']}")
+        print(f"      max_depth: {config['max_depth']}")
+        print(f"      eta: {config['eta']}")
+        print(f"      → {config['description']}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Train the MME model variants")
+    parser.add_argument('--mode', choices=['sequential', 'concurrent', 'local', 'local-shared'],
+                        default='sequential')
+    parser.add_argument('--max-concurrent', type=int, default=None,
+                        help='Cap on training jobs in flight (concurrent mode; default: free quota)')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Local processes/threads (local modes; 0 = one per variant up to the core count)')
+    parser.add_argument('--output-dir', type=str, default='mme-models',
+                        help='Where local modes write <model>.tar.gz')
+    parser.add_argument('--variants-file', type=str, default=None,
+                        help='JSON file of name -> {num_round, max_depth, eta, description} replacing the 5 variants')
+    parser.add_argument('--copies', type=int, default=1,
+                        help='Per-customer copies of every variant (e.g. 40 x 5 = 200 models)')
+
+    args = parser.parse_args()
+
+    if args.variants_file:
+        with open(args.variants_file) as f:
+            model_variants = json.load(f)
+    model_variants = replicate_variants(model_variants, args.copies)
+
+    print("\n" + "="*70)
+    print("STEP 1: CREATE TRAINING DATASET")
+    print("="*70)
+    create_training_data(train_file)
+
+    print("\n" + "="*70)
+    print(f"STEP 2: DEFINE {len(model_variants)} MODEL VARIANTS")
+    print("="*70)
+    print_variants(model_variants)
+
+    print("\n" + "="*70)
+    print(f"STEP 3: TRAIN ALL {len(model_variants)} MODELS ({args.mode})")
+    print("="*70)
+
+    start = time.time()
+    if args.mode == 'local':
+        model_artifacts, job_seconds = train_local(model_variants, train_file, args.output_dir, args.workers)
+    elif args.mode == 'local-shared':
+        model_artifacts, job_seconds = train_local_shared(model_variants, train_file, args.output_dir,
+                                                          args.workers)
+    else:
+        import sagemaker
+        from botocore.config import Config
+        from sagemaker import image_uris
+
+        # Configuration
+        region = boto3.Session().region_name
+        boto_session = boto3.Session(region_name=region)
+        sagemaker_session = sagemaker.Session(
+            boto_session=boto_session,
+            sagemaker_client=boto_session.client('sagemaker', config=Config(
+                retries={'mode': 'adaptive', 'max_attempts': 10}))
+        )
+        bucket = sagemaker_session.default_bucket()
+
+        print(f"\nRegion: {region}")
+        print(f"Bucket: {bucket}")
+        print(f"Prefix: {prefix}")
+
+        train_s3_path = f's3://{bucket}/{prefix}/train/{train_file}'
+        sagemaker_session.upload_data(train_file, bucket=bucket, key_prefix=f'{prefix}/train')
+        print(f"\n✅ Training data uploaded to: {train_s3_path}")
+
+        # Get XGBoost container
+        container = image_uris.retrieve('xgboost', region, '1.5-1')
+        print(f"\nUsing container: {container}")
+
+        if args.mode == 'concurrent':
+            model_artifacts, job_seconds = train_concurrent(model_variants, train_s3_path, container, bucket,
+                                                            sagemaker_session, region, args.max_concurrent)
+        else:
+            model_artifacts, job_seconds = train_sequential(model_variants, train_s3_path, container, bucket,
+                                                            sagemaker_session)
+
+    print("\n" + "="*70)
+    print(f"✅ {len(model_artifacts)}/{len(model_variants)} MODELS TRAINED!")
+    print("="*70)
+    print_timing(time.time() - start, job_seconds)
+
+    print("\nModel artifacts:")
+    for name, artifact in list(model_artifacts.items())[:10]:
+        print(f"   {name}: {artifact}")
+    if len(model_artifacts) > 10:
+        print(f"   ... and {len(model_artifacts) - 10} more")
+
+    if args.mode.startswith('local'):
+        print(f"\n📝 Model artifacts saved to: {os.path.join(args.output_dir, artifacts_file)}")
+    else:
+        print(f"\n📝 Model artifacts saved to: {artifacts_file}")
+        print("\n💡 Next step: python deploy_multi_model_endpoint.py")
@@ -5,10 +5,15 @@ import boto3
 import json
 import time
 import numpy as np
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from inference_client import CSVBatcher, endpoint_invoker, shared_runtime_client
 
 # Configuration
 region = boto3.Session().region_name
-runtime_client = boto3.client('sagemaker-runtime', region_name=region)
+runtime_client = shared_runtime_client(region=region)
 s3_client = boto3.client('s3', region_name=region)
 
 print(f"Region: {region}")
@@ -29,16 +34,10 @@ print("\n" + "="*70)
 print("SENDING TRAFFIC TO ENDPOINT")
 print("="*70)
 
-# Helper function to invoke endpoint
-def invoke_endpoint(features):
-    """Send a prediction request"""
-    payload = ','.join(map(str, features))
-    response = runtime_client.invoke_endpoint(
-        EndpointName=endpoint_name,
-        ContentType='text/csv',
-        Body=payload
-    )
-    return float(response['Body'].read().decode('utf-8').strip('[]'))
+# Rows are sent as multi-row CSV micro-batches; data capture then records one
+# entry per batch, so keep batches small enough to spread over a few captures
+BATCH_ROWS = 10
+batcher = CSVBatcher(endpoint_invoker(endpoint_name, runtime_client), max_rows=BATCH_ROWS)
 
 # ============================================================
 # Phase 1: Send NORMAL traffic (matches training distribution)
@@ -57,7 +56,7 @@ Normal data distributions:
 """)
 
 np.random.seed(42)
-normal_predictions = []
+normal_rows = []
 
 print("Sending 50 normal requests...")
 for i in range(50):
@@ -69,12 +68,11 @@ for i in range(50):
         np.random.normal(25000, 10000), # loan_amount
         np.random.normal(8, 5)          # employment_years
     ]
-    
-    prediction = invoke_endpoint(features)
-    normal_predictions.append(prediction)
-    
-    if (i + 1) % 10 == 0:
-        print(f"   Sent {i + 1}/50 requests...")
+    normal_rows.append(features)
+
+calls_before = batcher.stats()['requests']
+normal_predictions = batcher.predict_many(normal_rows)
+print(f"   Sent 50/50 requests in {batcher.stats()['requests'] - calls_before} endpoint calls")
 
 avg_normal = sum(normal_predictions) / len(normal_predictions)
 print(f"\n   ✅ Normal traffic sent!")
@@ -96,7 +94,7 @@ Drifted data distributions (simulating economic downturn):
 - employment_years: mean=3, std=2 (less stable employment)
 """)
 
-drifted_predictions = []
+drifted_rows = []
 
 print("Sending 50 drifted requests...")
 for i in range(50):
@@ -108,12 +106,12 @@ for i in range(50):
         np.random.normal(40000, 15000), # loan_amount - higher
         np.random.normal(3, 2)          # employment_years - less
     ]
-    
-    prediction = invoke_endpoint(features)
-    drifted_predictions.append(prediction)
-    
-    if (i + 1) % 10 == 0:
-        print(f"   Sent {i + 1}/50 requests...")
+    drifted_rows.append(features)
+
+calls_before = batcher.stats()['requests']
+drifted_predictions = batcher.predict_many(drifted_rows)
+batcher.close()
+print(f"   Sent 50/50 requests in {batcher.stats()['requests'] - calls_before} endpoint calls")
 
 avg_drifted = sum(drifted_predictions) / len(drifted_predictions)
 print(f"\n   ✅ Drifted traffic sent!")
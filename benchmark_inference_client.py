@@ -0,0 +1,152 @@
+"""
+Benchmark inference_client.RuntimeClient against a default boto3 client
+
+A local HTTP/1.1 stand-in for sagemaker-runtime answers
+POST /endpoints/<name>/invocations after --latency-ms and, like an endpoint
+at capacity, throws ThrottlingException at requests beyond --capacity in
+flight. Many callers share one client per configuration; the report shows
+throughput, latency, errors, requests the stand-in saw (retries included)
+and how many TCP connections each client opened.
+
+    python benchmark_inference_client.py --callers 64 128 --capacity 96 --duration 10
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from inference_client import RuntimeClient
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with self.server.lock:
+            self.server.requests += 1
+            throttled = self.server.in_flight >= self.server.capacity
+            if not throttled:
+                self.server.in_flight += 1
+        if throttled:
+            self._send(400, json.dumps({"message": "Rate exceeded"}).encode(),
+                       {'Content-Type': 'application/json', 'x-amzn-ErrorType': 'ThrottlingException'})
+            return
+        time.sleep(self.server.latency)
+        with self.server.lock:
+            self.server.in_flight -= 1
+        predictions = '\n'.join('0.5' for _ in body.decode().splitlines())
+        self._send(200, predictions.encode(), {'Content-Type': 'text/csv'})
+
+def start_stand_in(latency_ms, capacity):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.daemon_threads = True
+    server.request_queue_size = 1024
+    server.lock = threading.Lock()
+    server.latency = latency_ms / 1000
+    server.capacity = capacity
+    server.in_flight = 0
+    server.connections = 0
+    server.requests = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def run_callers(client, callers, seconds):
+    """
+    `callers` threads invoking back to back through one shared client
+    """
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def caller():
+        local, failed = [], 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter_ns()
+            try:
+                client.invoke_endpoint(EndpointName='stand-in', ContentType='text/csv',
+                                       Body='0.1,0.2,0.3,0.4,0.5')['Body'].read()
+                local.append((time.perf_counter_ns() - start) / 1e6)
+            except Exception:
+                failed += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=caller) for _ in range(callers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(q / 100 * len(latencies)))] if latencies else float('nan')
+    return {"ok": len(latencies), "errors": errors[0], "throughput": len(latencies) / elapsed,
+            "p50": pick(50), "p99": pick(99)}
+
+def client_factories(callers):
+    """
+    (name, make(endpoint_url)) for each client configuration to compare
+    """
+    import boto3
+
+    return [
+        ("boto3 default", lambda url: boto3.session.Session().client('sagemaker-runtime', endpoint_url=url)),
+        ("RuntimeClient standard", lambda url: RuntimeClient(pool_size=callers, endpoint_url=url)),
+        ("RuntimeClient adaptive", lambda url: RuntimeClient(pool_size=callers, retry_mode='adaptive',
+                                                              endpoint_url=url))
+    ]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark pooled sagemaker-runtime clients against a local stand-in")
+    parser.add_argument('--callers', type=int, nargs='+', default=[64, 128])
+    parser.add_argument('--duration', type=float, default=10, help='Seconds per run')
+    parser.add_argument('--latency-ms', type=float, default=200, help='Stand-in model latency')
+    parser.add_argument('--capacity', type=int, default=96, help='Requests in flight before the stand-in throttles')
+
+    args = parser.parse_args()
+
+    # The stand-in ignores signatures, but botocore still signs every request
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'stand-in')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'stand-in')
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    # "Connection pool is full, discarding connection" would flood the output
+    logging.getLogger('urllib3').setLevel(logging.ERROR)
+
+    print(f"Stand-in: {args.latency_ms:g} ms per call, throttles above {args.capacity} in flight, "
+          f"{args.duration:g}s per run")
+    print(f"\n{'Callers':>8}  {'Client':<26}{'Calls/s':>9}{'p50 (ms)':>10}{'p99 (ms)':>10}"
+          f"{'Errors':>8}{'Retries':>9}{'Conns':>7}{'Sent':>8}")
+    print("-"*97)
+    for callers in args.callers:
+        for name, make_client in client_factories(callers):
+            server = start_stand_in(args.latency_ms, args.capacity)
+            client = make_client(f"http://127.0.0.1:{server.server_address[1]}")
+            result = run_callers(client, callers, args.duration)
+            server.shutdown()
+            server.server_close()
+            # boto3 retries internally without counting them
+            retries = client.stats()['retries'] if hasattr(client, 'stats') else '-'
+            print(f"{callers:>8}  {name:<26}{result['throughput']:>9.0f}{result['p50']:>10.1f}{result['p99']:>10.1f}"
+                  f"{result['errors']:>8}{retries:>9}{server.connections:>7}{server.requests:>8}")
@@ -0,0 +1,283 @@
+"""
+Shared client-side helpers for calling SageMaker CSV endpoints
+
+RuntimeClient wraps one pooled, thread-safe sagemaker-runtime client: a
+connection pool sized for the callers, TCP keep-alive, connect/read timeouts
+(overridable per call; reads wait botocore's 60 s so slow cold loads aren't
+cancelled), and retries of throttles/5xx/connection errors with jittered
+backoff, capped by a RetryBudget shared by every thread so an outage can't
+multiply the load on the endpoint. Read timeouts are not retried: the
+endpoint is still working on the first request. botocore's adaptive
+client-side rate limiting is opt-in (retry_mode='adaptive'); under load it
+cuts throughput by an order of magnitude. shared_runtime_client() returns one
+instance per configuration for the whole process.
+
+CSVBatcher coalesces single-row requests from any number of threads into
+multi-row text/csv payloads (the XGBoost container scores every line of a
+CSV body), so one invoke_endpoint call carries up to max_rows rows. A batch
+is sent once it is full or its oldest row has waited max_wait_ms; the
+response is split back into one prediction per caller.
+
+Scripts in the project folders import it from the repo root:
+
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+    from inference_client import CSVBatcher, endpoint_invoker, shared_runtime_client
+
+    runtime_client = shared_runtime_client(region=region)
+    with CSVBatcher(endpoint_invoker(endpoint_name, runtime_client)) as batcher:
+        predictions = batcher.predict_many(rows)
+"""
+import random
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Throttles and server-side failures; ModelError (the model container failed) is not retried
+RETRYABLE_ERROR_CODES = {'ThrottlingException', 'Throttling', 'TooManyRequestsException',
+                         'ServiceUnavailable', 'InternalFailure', 'InternalServerError', 'RequestTimeout'}
+
+class RetryBudget:
+    """
+    Token bucket shared by all callers: each request deposits `ratio` of a
+    retry, each retry spends one, plus a floor of min_per_second retries
+    """
+
+    def __init__(self, ratio=0.1, min_per_second=10, max_tokens=100):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self.tokens = float(max_tokens)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, amount):
+        now = time.monotonic()
+        self.tokens = min(self.max_tokens, self.tokens + amount + (now - self.updated) * self.min_per_second)
+        self.updated = now
+
+    def deposit(self):
+        with self.lock:
+            self._refill(self.ratio)
+
+    def withdraw(self):
+        with self.lock:
+            self._refill(0)
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+class RuntimeClient:
+    """
+    Thread-safe sagemaker-runtime client with pooling, keep-alive, timeouts
+    and budgeted retries; invoke_endpoint() takes the boto3 arguments plus
+    an optional timeout (read timeout in seconds) for that call
+    """
+
+    def __init__(self, pool_size=64, keepalive=True, connect_timeout=2, read_timeout=60, max_attempts=4,
+                 retry_budget=None, retry_mode='standard', region=None, endpoint_url=None, backoff_base=0.05,
+                 backoff_cap=2.0):
+        import boto3
+
+        self.session = boto3.session.Session(region_name=region)
+        self.options = {"pool_size": pool_size, "keepalive": keepalive, "connect_timeout": connect_timeout,
+                        "retry_mode": retry_mode, "endpoint_url": endpoint_url}
+        self.read_timeout = read_timeout
+        self.max_attempts = max_attempts
+        self.retry_budget = retry_budget or RetryBudget()
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+        self.lock = threading.Lock()
+        self.clients = {}
+        self.calls = 0
+        self.retries = 0
+        self.budget_exhausted = 0
+        self.client = self._client(read_timeout)
+
+    def _client(self, read_timeout):
+        """
+        botocore clients are thread-safe but timeouts are per client, so each
+        distinct per-call timeout gets its own pooled client
+        """
+        from botocore.config import Config
+
+        with self.lock:
+            if read_timeout not in self.clients:
+                config = Config(max_pool_connections=self.options["pool_size"],
+                                tcp_keepalive=self.options["keepalive"],
+                                connect_timeout=self.options["connect_timeout"],
+                                read_timeout=read_timeout,
+                                # Retries happen below, against the budget; retry_mode='adaptive'
+                                # also slows every sender down once the endpoint throttles
+                                retries={'mode': self.options["retry_mode"], 'total_max_attempts': 1})
+                self.clients[read_timeout] = self.session.client(
+                    'sagemaker-runtime', config=config, endpoint_url=self.options["endpoint_url"])
+            return self.clients[read_timeout]
+
+    @staticmethod
+    def retryable(error):
+        from botocore.exceptions import ClientError, ConnectionError, HTTPClientError, ReadTimeoutError
+
+        if isinstance(error, ClientError):
+            code = error.response.get('Error', {}).get('Code')
+            status = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode', 0)
+            return code in RETRYABLE_ERROR_CODES or (status >= 500 and code != 'ModelError')
+        # A read timeout means the endpoint got the request; resending it doubles the load
+        if isinstance(error, ReadTimeoutError):
+            return False
+        return isinstance(error, (ConnectionError, HTTPClientError))
+
+    def invoke_endpoint(self, timeout=None, **kwargs):
+        client = self._client(timeout) if timeout is not None else self.client
+        with self.lock:
+            self.calls += 1
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                response = client.invoke_endpoint(**kwargs)
+                self.retry_budget.deposit()
+                return response
+            except Exception as e:
+                if attempt == self.max_attempts or not self.retryable(e):
+                    raise
+                if not self.retry_budget.withdraw():
+                    with self.lock:
+                        self.budget_exhausted += 1
+                    raise
+                with self.lock:
+                    self.retries += 1
+                time.sleep(random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt)))
+
+    def stats(self):
+        with self.lock:
+            return {"calls": self.calls, "retries": self.retries, "budget_exhausted": self.budget_exhausted}
+
+_shared_clients = {}
+_shared_lock = threading.Lock()
+
+def shared_runtime_client(**options):
+    """
+    One RuntimeClient per distinct set of options for the whole process
+    """
+    key = tuple(sorted(options.items()))
+    with _shared_lock:
+        if key not in _shared_clients:
+            _shared_clients[key] = RuntimeClient(**options)
+        return _shared_clients[key]
+
+def to_csv_row(features):
+    return features if isinstance(features, str) else ','.join(map(str, features))
+
+def split_predictions(response_text, n_rows):
+    """
+    One float per row from a CSV/JSON-list response: "0.1\\n0.2", "0.1,0.2" or "[0.1, 0.2]"
+    """
+    values = [v for v in re.split(r'[\n,]', response_text.strip().strip('[]')) if v.strip()]
+    if len(values) != n_rows:
+        raise ValueError(f"Expected {n_rows} predictions, got {len(values)}: {response_text[:200]!r}")
+    return [float(v) for v in values]
+
+def endpoint_invoker(endpoint_name, runtime_client=None, target_model=None):
+    """
+    invoke(csv body) -> response text for an endpoint (and TargetModel on an MME)
+    """
+    runtime_client = runtime_client or shared_runtime_client()
+    extra = {'TargetModel': target_model} if target_model else {}
+
+    def invoke(body):
+        response = runtime_client.invoke_endpoint(EndpointName=endpoint_name, ContentType='text/csv',
+                                                  Body=body, **extra)
+        return response['Body'].read().decode('utf-8')
+    return invoke
+
+class CSVBatcher:
+    """
+    Micro-batching CSV client: thread-safe submit()/predict() of single rows,
+    at most max_in_flight batches outstanding at once
+    """
+
+    def __init__(self, invoke, max_rows=100, max_wait_ms=10, max_in_flight=4):
+        self.invoke = invoke
+        self.max_rows = max_rows
+        self.max_wait = max_wait_ms / 1000
+        self.pool = ThreadPoolExecutor(max_workers=max_in_flight)
+
+        self.cond = threading.Condition()
+        self.pending = []
+        self.closed = False
+        self.requests = 0
+        self.rows = 0
+
+        self.flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self.flusher.start()
+
+    def submit(self, features):
+        """
+        Future for the prediction of one row (a CSV string or a list of values)
+        """
+        future = Future()
+        with self.cond:
+            if self.closed:
+                raise RuntimeError("CSVBatcher is closed")
+            self.pending.append((to_csv_row(features), future, time.perf_counter()))
+            self.cond.notify()
+        return future
+
+    def predict(self, features, timeout=None):
+        return self.submit(features).result(timeout)
+
+    def predict_many(self, rows):
+        futures = [self.submit(row) for row in rows]
+        return [future.result() for future in futures]
+
+    def _flush_loop(self):
+        while True:
+            with self.cond:
+                while not self.pending and not self.closed:
+                    self.cond.wait()
+                if not self.pending:
+                    return
+                deadline = self.pending[0][2] + self.max_wait
+                while len(self.pending) < self.max_rows and not self.closed:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self.cond.wait(remaining)
+                batch, self.pending = self.pending[:self.max_rows], self.pending[self.max_rows:]
+            self.pool.submit(self._send, batch)
+
+    def _send(self, batch):
+        try:
+            predictions = split_predictions(self.invoke('\n'.join(row for row, _, _ in batch)), len(batch))
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        finally:
+            with self.cond:
+                self.requests += 1
+                self.rows += len(batch)
+        for (_, future, _), prediction in zip(batch, predictions):
+            future.set_result(prediction)
+
+    def stats(self):
+        with self.cond:
+            return {"requests": self.requests, "rows": self.rows,
+                    "rows_per_request": self.rows / self.requests if self.requests else None}
+
+    def close(self):
+        """
+        Send whatever is queued, then stop
+        """
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+        self.flusher.join()
+        self.pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()